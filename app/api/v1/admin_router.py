@@ -0,0 +1,40 @@
+from datetime import datetime
+from typing import Annotated, Literal, Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from sqlmodel import Session
+
+from app.api.v1.auth_router import get_current_admin
+from app.core.database import get_session
+from app.core.usage import get_usage_writer
+from app.models.user_model import User
+from app.nlp.llm_router import get_llm_router
+from app.repositories.usage_repository import UsageRepository
+
+router = APIRouter(prefix="/api/v1/admin", tags=["admin"])
+
+
+@router.get("/llm-backends")
+def llm_backends(current_admin: Annotated[User, Depends(get_current_admin)]) -> dict:
+    """Retorna latencia EWMA, taxa de erro e saude de cada backend LLM."""
+    _ = current_admin
+    return {"backends": get_llm_router().snapshot()}
+
+
+@router.get("/usage")
+def provider_usage(
+    current_admin: Annotated[User, Depends(get_current_admin)],
+    session: Annotated[Session, Depends(get_session)],
+    agrupar: Literal["dia", "usuario", "email"] = "dia",
+    data_inicio: Optional[datetime] = None,
+    data_fim: Optional[datetime] = None,
+    usuario_id: Optional[int] = None,
+    limite: Annotated[int, Query(ge=1, le=1000)] = 100,
+) -> dict:
+    """Retorna o uso dos provedores de IA (chamadas, tokens, custo e latencia) agregado por dia, usuario ou email."""
+    _ = current_admin
+    if data_inicio and data_fim and data_inicio >= data_fim:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Intervalo de datas invalido")
+    get_usage_writer().flush()
+    rows = UsageRepository(session).rollup(agrupar, data_inicio, data_fim, usuario_id, limite)
+    return {"agrupamento": agrupar, "linhas": rows}
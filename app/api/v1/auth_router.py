@@ -6,7 +6,8 @@ from jose import JWTError
 from sqlmodel import Session
 
 from app.core.database import get_session
-from app.core.security import decode_token
+from app.core.security import decode_token, is_admin_email
+from app.core.timing import span
 from app.models.user_model import User
 from app.repositories.user_repository import UserRepository
 from app.schemas.auth_schema import ChangePasswordRequest, LoginRequest, MessageResponse, TokenResponse
@@ -35,20 +36,28 @@ def get_current_user(
     user_repository: Annotated[UserRepository, Depends(get_user_repository)],
 ) -> User:
     """Recupera o usuario autenticado a partir do token JWT."""
-    try:
-        payload = decode_token(token)
-        email = payload.get("sub")
-        if not email:
-            raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Token invalido")
-    except JWTError as exc:
-        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Token invalido") from exc
-
-    user = user_repository.get_by_email(email)
+    with span("auth"):
+        try:
+            payload = decode_token(token)
+            email = payload.get("sub")
+            if not email:
+                raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Token invalido")
+        except JWTError as exc:
+            raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Token invalido") from exc
+
+        user = user_repository.get_by_email(email)
     if user is None:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Usuario nao encontrado")
     return user
 
 
+def get_current_admin(current_user: Annotated[User, Depends(get_current_user)]) -> User:
+    """Garante que o usuario autenticado esta listado em ADMIN_EMAILS."""
+    if not is_admin_email(current_user.email_institucional):
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Acesso restrito a administradores")
+    return current_user
+
+
 @router.post("/login", response_model=TokenResponse)
 def login(
     payload: LoginRequest,
@@ -1,21 +1,43 @@
+from datetime import datetime
 from io import BytesIO
 import logging
-from typing import Annotated, Optional
+import time
+from typing import Annotated, Any, Callable, Literal, Optional
 
-import pdfplumber
-from fastapi import APIRouter, Depends, File, Form, HTTPException, UploadFile, status
-from pydantic import EmailStr
+from fastapi import APIRouter, Depends, File, Form, Header, HTTPException, Request, Response, UploadFile, status
+from fastapi.responses import ORJSONResponse, StreamingResponse
+from pydantic import BaseModel, EmailStr
 from sqlmodel import Session
 
 from app.api.v1.auth_router import get_current_user
+from app.core.cache import Cache, build_result_cache
+from app.core.config import get_settings
 from app.core.database import get_session
+from app.core.http_cache import cache_headers, etag_matches, make_etag, not_modified
+from app.core.metrics import FILE_EXTRACTION_DURATION
+from app.core.timing import span
 from app.models.user_model import User
+from app.nlp.classifier_cascade import ClassifierCascade, build_classifier_cascade
 from app.nlp.classifier_client import ClassifierClient
-from app.nlp.exceptions import ConfigurationError, ExternalServiceError
+from app.nlp.exceptions import ConfigurationError, ExternalServiceError, RateLimitExceededError
+from app.nlp.knn_classifier import KnnIndexStore, build_knn_index_store
 from app.nlp.llm_client import LlmClient
+from app.repositories.archive_repository import EmailArchiveRepository
 from app.repositories.email_repository import EmailRepository
-from app.schemas.email_schema import EmailDetailResponse, EmailHistoryResponse, EmailResponse
+from app.schemas.email_schema import (
+    EmailDetailResponse,
+    EmailHistoryResponse,
+    EmailRelabelRequest,
+    EmailResponse,
+)
 from app.services.email_service import EmailService
+from app.services.idempotency_service import (
+    IdempotencyConflictError,
+    IdempotencyInProgressError,
+    IdempotencyService,
+    request_fingerprint,
+)
+from app.services.pregeneration_service import PregenerationWorker
 
 router = APIRouter(prefix="/api/v1/emails", tags=["emails"])
 logger = logging.getLogger(__name__)
@@ -23,6 +45,8 @@ logger = logging.getLogger(__name__)
 MAX_UPLOAD_BYTES = 2 * 1024 * 1024
 ALLOWED_EXTENSIONS = {".txt", ".pdf"}
 ALLOWED_MIME_TYPES = {"text/plain", "application/pdf"}
+EXPORT_MEDIA_TYPES = {"ndjson": "application/x-ndjson", "csv": "text/csv; charset=utf-8"}
+MAX_IDEMPOTENCY_KEY_LENGTH = 255
 
 
 def get_email_repository(session: Annotated[Session, Depends(get_session)]) -> EmailRepository:
@@ -30,11 +54,109 @@ def get_email_repository(session: Annotated[Session, Depends(get_session)]) -> E
     return EmailRepository(session)
 
 
+def get_archive_repository() -> EmailArchiveRepository:
+    """Fornece o repositorio de emails arquivados."""
+    return EmailArchiveRepository(get_settings().archive_dir)
+
+
+def get_classifier_client(request: Request) -> ClassifierClient:
+    """Retorna o cliente de classificacao compartilhado pela aplicacao."""
+    client = getattr(request.app.state, "classifier_client", None)
+    if client is None:
+        client = request.app.state.classifier_client = ClassifierClient()
+    return client
+
+
+def get_classifier(
+    request: Request, classifier_client: Annotated[ClassifierClient, Depends(get_classifier_client)]
+) -> ClassifierCascade:
+    """Retorna a cascata de classificadores (regras, modelo local, API remota) da aplicacao."""
+    cascade = getattr(request.app.state, "classifier", None)
+    if cascade is None:
+        local = getattr(request.app.state, "local_classifier", None)
+        cascade = request.app.state.classifier = build_classifier_cascade(classifier_client, local)
+    return cascade
+
+
+def get_llm_client(request: Request) -> LlmClient:
+    """Retorna o cliente LLM compartilhado pela aplicacao."""
+    client = getattr(request.app.state, "llm_client", None)
+    if client is None:
+        client = request.app.state.llm_client = LlmClient()
+    return client
+
+
+def get_result_cache(request: Request) -> Cache:
+    """Retorna o cache de resultados de classificacao/resposta compartilhado pela aplicacao."""
+    cache = getattr(request.app.state, "result_cache", None)
+    if cache is None:
+        cache = request.app.state.result_cache = build_result_cache()
+    return cache
+
+
+def get_pregenerator(request: Request) -> Optional[PregenerationWorker]:
+    """Retorna o worker de pre-geracao de respostas, quando habilitado."""
+    return getattr(request.app.state, "pregenerator", None)
+
+
+def get_knn_index(request: Request) -> Optional[KnnIndexStore]:
+    """Retorna os indices pessoais de classificacao compartilhados pela aplicacao."""
+    if not hasattr(request.app.state, "knn_index"):
+        request.app.state.knn_index = build_knn_index_store()
+    return request.app.state.knn_index
+
+
 def get_email_service(
     email_repository: Annotated[EmailRepository, Depends(get_email_repository)],
+    classifier: Annotated[ClassifierCascade, Depends(get_classifier)],
+    llm_client: Annotated[LlmClient, Depends(get_llm_client)],
+    archive_repository: Annotated[EmailArchiveRepository, Depends(get_archive_repository)],
+    result_cache: Annotated[Cache, Depends(get_result_cache)],
+    pregenerator: Annotated[Optional[PregenerationWorker], Depends(get_pregenerator)],
+    knn_index: Annotated[Optional[KnnIndexStore], Depends(get_knn_index)],
 ) -> EmailService:
     """Fornece o servico de emails para uso nas rotas."""
-    return EmailService(email_repository, ClassifierClient(), LlmClient())
+    return EmailService(
+        email_repository,
+        classifier,
+        llm_client,
+        archive_repository,
+        result_cache,
+        pregenerator,
+        knn_index=knn_index,
+    )
+
+
+def get_idempotency_service() -> IdempotencyService:
+    """Fornece o servico de chaves de idempotencia."""
+    return IdempotencyService()
+
+
+def run_idempotent(
+    idempotency_service: IdempotencyService,
+    response: Response,
+    idempotency_key: Optional[str],
+    user_id: int,
+    endpoint: str,
+    fingerprint: str,
+    action: Callable[[], BaseModel],
+) -> Any:
+    """Executa a acao uma unica vez por Idempotency-Key, repetindo a resposta gravada nas retentativas."""
+    if not idempotency_key:
+        return action()
+    if len(idempotency_key) > MAX_IDEMPOTENCY_KEY_LENGTH:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Idempotency-Key muito longa")
+    try:
+        body, replayed = idempotency_service.execute(
+            user_id, idempotency_key, endpoint, fingerprint, lambda: action().model_dump(mode="json")
+        )
+    except IdempotencyConflictError as exc:
+        raise HTTPException(status_code=status.HTTP_422_UNPROCESSABLE_ENTITY, detail=str(exc)) from exc
+    except IdempotencyInProgressError as exc:
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=str(exc), headers={"Retry-After": "1"}) from exc
+    if replayed:
+        response.headers["Idempotent-Replayed"] = "true"
+    return body
 
 
 def extract_text_from_file(file: UploadFile) -> str:
@@ -47,11 +169,32 @@ def extract_text_from_file(file: UploadFile) -> str:
     content = file.file.read(MAX_UPLOAD_BYTES + 1)
     if len(content) > MAX_UPLOAD_BYTES:
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Arquivo excede o limite permitido")
+    started = time.perf_counter()
     if filename.endswith(".pdf"):
+        import pdfplumber
+
         with pdfplumber.open(BytesIO(content)) as pdf:
             pages = [page.extract_text() or "" for page in pdf.pages]
+        FILE_EXTRACTION_DURATION.labels("pdf").observe(time.perf_counter() - started)
         return "\n".join(pages)
-    return content.decode("utf-8", errors="ignore")
+    text = content.decode("utf-8", errors="ignore")
+    FILE_EXTRACTION_DURATION.labels("txt").observe(time.perf_counter() - started)
+    return text
+
+
+def rate_limit_http_exception(exc: RateLimitExceededError) -> HTTPException:
+    """Converte saturacao do rate limit local em resposta 429 com Retry-After."""
+    logger.warning("Rate limit local do provedor %s: %s", exc.service, exc.detail)
+    headers = {"Retry-After": str(max(int(exc.retry_after or 1), 1))}
+    return HTTPException(
+        status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+        detail={
+            "erro": "limite_provedor_ia",
+            "provedor": exc.service,
+            "mensagem": f"Provedor de IA saturado. Detalhe: {exc.detail}",
+        },
+        headers=headers,
+    )
 
 
 @router.post("/classify", response_model=EmailResponse)
@@ -59,22 +202,35 @@ def classify_email(
     current_user: Annotated[User, Depends(get_current_user)],
     email_destinatario: Annotated[EmailStr, Form(...)],
     email_service: Annotated[EmailService, Depends(get_email_service)],
+    idempotency_service: Annotated[IdempotencyService, Depends(get_idempotency_service)],
+    response: Response,
     email_body: Annotated[Optional[str], Form()] = None,
     assunto: Annotated[Optional[str], Form()] = None,
     arquivo: Annotated[Optional[UploadFile], File()] = None,
+    idempotency_key: Annotated[Optional[str], Header()] = None,
 ) -> EmailResponse:
     """Processa o email recebido e retorna classificacao e resposta sugerida."""
     if email_body is None and arquivo is None:
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Email vazio")
 
     if arquivo is not None:
-        email_body = extract_text_from_file(arquivo)
+        with span("extract"):
+            email_body = extract_text_from_file(arquivo)
 
     if not email_body:
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Email vazio")
 
+    user_id = current_user.id or 0
     try:
-        return email_service.process_email(current_user.id or 0, email_body, email_destinatario, assunto)
+        return run_idempotent(
+            idempotency_service,
+            response,
+            idempotency_key,
+            user_id,
+            "classify",
+            request_fingerprint(email_destinatario, assunto, email_body),
+            lambda: email_service.process_email(user_id, email_body, email_destinatario, assunto),
+        )
     except ConfigurationError as exc:
         logger.warning("Configuracao de IA invalida ou ausente: %s", exc, exc_info=True)
         raise HTTPException(
@@ -85,6 +241,8 @@ def classify_email(
                 "acao": "Verifique as chaves e variaveis no .env",
             },
         ) from exc
+    except RateLimitExceededError as exc:
+        raise rate_limit_http_exception(exc) from exc
     except ExternalServiceError as exc:
         status_label = f"Status: {exc.status_code}. " if exc.status_code else ""
         endpoint_label = f"Endpoint: {exc.endpoint}. " if exc.endpoint else ""
@@ -130,15 +288,43 @@ def mark_responded(
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=str(exc)) from exc
 
 
+@router.post("/{email_id}/relabel", response_model=EmailDetailResponse)
+def relabel_email(
+    email_id: int,
+    payload: EmailRelabelRequest,
+    current_user: Annotated[User, Depends(get_current_user)],
+    email_service: Annotated[EmailService, Depends(get_email_service)],
+) -> EmailDetailResponse:
+    """Corrige a classificacao de um email e ensina o classificador pessoal do usuario."""
+    try:
+        return email_service.relabel(email_id, current_user.id or 0, payload.classification)
+    except ValueError as exc:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=str(exc)) from exc
+
+
 @router.post("/{email_id}/generate-response", response_model=EmailDetailResponse)
 def generate_response(
     email_id: int,
     current_user: Annotated[User, Depends(get_current_user)],
     email_service: Annotated[EmailService, Depends(get_email_service)],
+    idempotency_service: Annotated[IdempotencyService, Depends(get_idempotency_service)],
+    response: Response,
+    regenerar: bool = False,
+    usar_llm: bool = False,
+    idempotency_key: Annotated[Optional[str], Header()] = None,
 ) -> EmailDetailResponse:
-    """Gera a resposta sugerida para um email ja classificado."""
+    """Retorna a resposta sugerida do email, gerando por template ou LLM (nova com regenerar, LLM com usar_llm)."""
+    user_id = current_user.id or 0
     try:
-        return email_service.generate_response(email_id, current_user.id or 0)
+        return run_idempotent(
+            idempotency_service,
+            response,
+            idempotency_key,
+            user_id,
+            "generate-response",
+            request_fingerprint(email_id, regenerar, usar_llm),
+            lambda: email_service.generate_response(email_id, user_id, regenerar, usar_llm),
+        )
     except ConfigurationError as exc:
         logger.warning("Configuracao de IA invalida ou ausente: %s", exc, exc_info=True)
         raise HTTPException(
@@ -149,6 +335,8 @@ def generate_response(
                 "acao": "Verifique as chaves e variaveis no .env",
             },
         ) from exc
+    except RateLimitExceededError as exc:
+        raise rate_limit_http_exception(exc) from exc
     except ExternalServiceError as exc:
         status_label = f"Status: {exc.status_code}. " if exc.status_code else ""
         endpoint_label = f"Endpoint: {exc.endpoint}. " if exc.endpoint else ""
@@ -186,24 +374,67 @@ def generate_response(
 
 
 
-@router.get("/history", response_model=EmailHistoryResponse)
+@router.get("/history", response_model=EmailHistoryResponse, response_class=ORJSONResponse)
 def get_history(
     current_user: Annotated[User, Depends(get_current_user)],
     email_service: Annotated[EmailService, Depends(get_email_service)],
     respondido: Optional[bool] = None,
-) -> EmailHistoryResponse:
-    """Retorna o historico de emails do usuario autenticado."""
-    return email_service.list_history(current_user.id or 0, respondido)
+    incluir_arquivados: bool = False,
+    if_none_match: Annotated[Optional[str], Header()] = None,
+) -> Response:
+    """Retorna o historico de emails do usuario autenticado, com 304 quando nada mudou."""
+    user_id = current_user.id or 0
+    etag = make_etag(*email_service.history_version(user_id, respondido, incluir_arquivados))
+    if etag_matches(if_none_match, etag):
+        return not_modified(etag)
+    payload = email_service.list_history_payload(user_id, respondido, incluir_arquivados)
+    return ORJSONResponse(payload, headers=cache_headers(etag))
+
+
+@router.get("/export")
+def export_history(
+    current_user: Annotated[User, Depends(get_current_user)],
+    email_service: Annotated[EmailService, Depends(get_email_service)],
+    formato: Literal["ndjson", "csv"] = "ndjson",
+    respondido: Optional[bool] = None,
+    classification: Optional[str] = None,
+    data_inicio: Optional[datetime] = None,
+    data_fim: Optional[datetime] = None,
+    incluir_arquivados: bool = False,
+) -> StreamingResponse:
+    """Exporta o historico completo do usuario em streaming (NDJSON ou CSV)."""
+    if data_inicio and data_fim and data_inicio >= data_fim:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Intervalo de datas invalido")
+    chunks = email_service.export_history(
+        current_user.id or 0,
+        formato=formato,
+        respondido=respondido,
+        classification=classification,
+        created_from=data_inicio,
+        created_to=data_fim,
+        include_archived=incluir_arquivados,
+    )
+    filename = f"historico-emails-{datetime.utcnow():%Y%m%d%H%M%S}.{formato}"
+    return StreamingResponse(
+        chunks,
+        media_type=EXPORT_MEDIA_TYPES[formato],
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
+    )
 
 
-@router.get("/{email_id}", response_model=EmailDetailResponse)
+@router.get("/{email_id}", response_model=EmailDetailResponse, response_class=ORJSONResponse)
 def get_email_detail(
     email_id: int,
     current_user: Annotated[User, Depends(get_current_user)],
     email_service: Annotated[EmailService, Depends(get_email_service)],
-) -> EmailDetailResponse:
-    """Retorna o detalhe de um email especifico."""
+    if_none_match: Annotated[Optional[str], Header()] = None,
+) -> Response:
+    """Retorna o detalhe de um email especifico, com 304 quando nada mudou."""
     try:
-        return email_service.get_email_detail(email_id, current_user.id or 0)
+        payload, version = email_service.get_email_detail_payload(email_id, current_user.id or 0)
     except ValueError as exc:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=str(exc)) from exc
+    etag = make_etag(*version)
+    if etag_matches(if_none_match, etag):
+        return not_modified(etag)
+    return ORJSONResponse(payload, headers=cache_headers(etag))
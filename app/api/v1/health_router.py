@@ -1,4 +1,8 @@
-from fastapi import APIRouter
+from fastapi import APIRouter, Depends, Request
+from fastapi.responses import JSONResponse
+
+from app.api.v1.metrics_router import verify_metrics_access
+from app.nlp.rate_limiter import list_rate_limiters
 
 router = APIRouter(prefix="/api/v1/health", tags=["health"])
 
@@ -7,3 +11,20 @@ router = APIRouter(prefix="/api/v1/health", tags=["health"])
 def health_check() -> dict:
     """Retorna status basico de disponibilidade da API."""
     return {"status": "ok"}
+
+
+@router.get("/ready")
+def readiness(request: Request) -> JSONResponse:
+    """Retorna 200 somente apos o aquecimento do worker ter concluido com sucesso."""
+    warmup = getattr(request.app.state, "warmup", None)
+    if warmup is None:
+        return JSONResponse(status_code=503, content={"status": "starting", "ready": False})
+    snapshot = warmup.snapshot()
+    status_code = 200 if snapshot["ready"] else 503
+    return JSONResponse(status_code=status_code, content={"status": "ready" if snapshot["ready"] else "warming", **snapshot})
+
+
+@router.get("/rate-limits", dependencies=[Depends(verify_metrics_access)])
+def rate_limits() -> dict:
+    """Retorna capacidade aprendida e profundidade de fila dos limitadores de provedores."""
+    return {"limiters": [limiter.snapshot() for limiter in list_rate_limiters()]}
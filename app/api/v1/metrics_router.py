@@ -0,0 +1,61 @@
+import hmac
+from typing import Annotated, Optional
+
+from anyio import to_thread
+from fastapi import APIRouter, Depends, Header, HTTPException, status
+from fastapi.responses import PlainTextResponse
+
+from app.api.v1.auth_router import get_current_admin, get_current_user, get_user_repository
+from app.core.config import get_settings
+from app.core.metrics import REGISTRY
+from app.repositories.user_repository import UserRepository
+
+router = APIRouter(tags=["metrics"])
+
+
+def _threadpool_samples():
+    """Amostra a ocupacao do threadpool usado por rotas e dependencias sincronas."""
+    limiter = to_thread.current_default_thread_limiter()
+    yield {"state": "in_use"}, float(limiter.borrowed_tokens)
+    yield {"state": "total"}, float(limiter.total_tokens)
+    yield {"state": "waiting"}, float(limiter.statistics().tasks_waiting)
+
+
+REGISTRY.register_callback(
+    "threadpool_tokens",
+    "Ocupacao do threadpool do servidor (in_use/total/waiting).",
+    _threadpool_samples,
+)
+
+
+def verify_metrics_access(
+    user_repository: Annotated[UserRepository, Depends(get_user_repository)],
+    authorization: Annotated[Optional[str], Header()] = None,
+) -> None:
+    """Libera /metrics para o token de METRICS_TOKEN ou, sem ele, para administradores autenticados."""
+    settings = get_settings()
+    if not settings.metrics_enabled:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Not Found")
+    scheme, _, token = (authorization or "").partition(" ")
+    if scheme.lower() != "bearer" or not token:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Nao autenticado",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+    if settings.metrics_token:
+        if not hmac.compare_digest(token, settings.metrics_token):
+            raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Token invalido")
+        return
+    get_current_admin(get_current_user(token, user_repository))
+
+
+@router.get(
+    "/metrics",
+    response_class=PlainTextResponse,
+    include_in_schema=False,
+    dependencies=[Depends(verify_metrics_access)],
+)
+async def metrics() -> PlainTextResponse:
+    """Exporta metricas no formato de texto do Prometheus."""
+    return PlainTextResponse(REGISTRY.render(), media_type="text/plain; version=0.0.4")
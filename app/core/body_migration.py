@@ -0,0 +1,105 @@
+"""Migra a tabela emails para corpos comprimidos e preenche body_size/normalized_hash em lotes.
+
+Uso:
+    python -m app.core.body_migration --batch-size 500
+"""
+import argparse
+import logging
+import time
+from typing import Optional
+
+from sqlalchemy import inspect, text, update
+from sqlalchemy.engine import Engine
+from sqlmodel import Session, select
+
+from app.core.database import get_engine
+from app.models.email_model import Email
+from app.models.user_model import User  # noqa: F401 - registra a tabela referenciada por emails.user_id
+from app.nlp.text_normalizer import normalized_hash
+
+logger = logging.getLogger(__name__)
+
+NEW_COLUMNS = {
+    "body_size": "INTEGER",
+    "normalized_hash": "VARCHAR(64)",
+    "classification_score": "FLOAT",
+    "classifier_tier": "VARCHAR(20)",
+}
+BINARY_COLUMNS = ("raw_body", "generated_response")
+
+
+def ensure_schema(engine: Engine) -> None:
+    """Adiciona as colunas novas e converte os corpos para binario quando necessario."""
+    inspector = inspect(engine)
+    columns = {column["name"]: column for column in inspector.get_columns("emails")}
+    with engine.begin() as connection:
+        for name, ddl_type in NEW_COLUMNS.items():
+            if name not in columns:
+                connection.execute(text(f"ALTER TABLE emails ADD COLUMN {name} {ddl_type}"))
+                logger.info("Coluna emails.%s criada", name)
+        if "ix_emails_normalized_hash" not in {index["name"] for index in inspector.get_indexes("emails")}:
+            connection.execute(text("CREATE INDEX ix_emails_normalized_hash ON emails (normalized_hash)"))
+        if engine.dialect.name == "postgresql":
+            for name in BINARY_COLUMNS:
+                if columns[name]["type"].python_type is str:
+                    connection.execute(
+                        text(f"ALTER TABLE emails ALTER COLUMN {name} TYPE BYTEA USING convert_to({name}, 'UTF8')")
+                    )
+                    logger.info("Coluna emails.%s convertida para BYTEA", name)
+
+
+def migrate_bodies(engine: Engine, batch_size: int = 500, limit: Optional[int] = None) -> int:
+    """Regrava corpos legados comprimidos e calcula body_size/normalized_hash, um lote por transacao."""
+    migrated = 0
+    last_id = 0
+    while limit is None or migrated < limit:
+        size = batch_size if limit is None else min(batch_size, limit - migrated)
+        with Session(engine) as session:
+            statement = (
+                select(Email.id, Email.raw_body, Email.generated_response)
+                .where(Email.id > last_id, Email.body_size.is_(None))
+                .order_by(Email.id)
+                .limit(size)
+            )
+            rows = session.exec(statement).all()
+            if not rows:
+                break
+            session.execute(
+                update(Email),
+                [
+                    {
+                        "id": email_id,
+                        "raw_body": raw_body,
+                        "generated_response": generated_response,
+                        "body_size": len(raw_body.encode("utf-8")),
+                        "normalized_hash": normalized_hash(raw_body),
+                    }
+                    for email_id, raw_body, generated_response in rows
+                ],
+            )
+            session.commit()
+        last_id = rows[-1][0]
+        migrated += len(rows)
+        logger.info("Emails migrados: %s (ultimo id %s)", migrated, last_id)
+    return migrated
+
+
+def main() -> None:
+    """Executa a migracao conforme argumentos de linha de comando."""
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--batch-size", type=int, default=500)
+    parser.add_argument("--limit", type=int, help="Quantidade maxima de emails nesta execucao")
+    parser.add_argument("--skip-schema", action="store_true", help="Nao altera o schema, apenas migra os dados")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
+
+    engine = get_engine()
+    if not args.skip_schema:
+        ensure_schema(engine)
+    started = time.perf_counter()
+    migrated = migrate_bodies(engine, args.batch_size, args.limit)
+    print(f"{migrated} emails migrados em {time.perf_counter() - started:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
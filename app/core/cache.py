@@ -0,0 +1,307 @@
+import json
+import logging
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from typing import Any, List, Optional, Tuple
+
+from sqlalchemy import delete
+from sqlalchemy.exc import SQLAlchemyError
+from sqlmodel import Session, select
+
+from app.core.config import get_settings
+from app.core.database import get_engine
+from app.core.metrics import record_cache_tier_lookup
+from app.models.cache_model import CacheEntry
+
+logger = logging.getLogger(__name__)
+
+
+class Cache(ABC):
+    """Interface comum dos caches de resultados (valores serializaveis em JSON)."""
+
+    name = "cache"
+
+    @abstractmethod
+    def get(self, key: str) -> Optional[Any]:
+        """Retorna o valor armazenado ou None quando ausente/expirado."""
+
+    @abstractmethod
+    def set(self, key: str, value: Any, ttl: Optional[float] = None) -> None:
+        """Armazena o valor com TTL opcional (segundos)."""
+
+    @abstractmethod
+    def delete(self, key: str) -> None:
+        """Remove a chave do cache."""
+
+    def recent(self, limit: int) -> List[Tuple[str, Any, float]]:
+        """Retorna as entradas validas mais recentes como (chave, valor, segundos restantes)."""
+        return []
+
+    def warm_up(self, limit: int) -> int:
+        """Prepara o cache para as primeiras requisicoes; retorna quantas entradas carregou."""
+        return 0
+
+
+class NullCache(Cache):
+    """Cache desativado: nunca armazena nada."""
+
+    name = "none"
+
+    def get(self, key: str) -> Optional[Any]:
+        return None
+
+    def set(self, key: str, value: Any, ttl: Optional[float] = None) -> None:
+        return None
+
+    def delete(self, key: str) -> None:
+        return None
+
+
+class MemoryCache(Cache):
+    """Cache LRU com TTL local ao processo."""
+
+    name = "memory"
+
+    def __init__(self, max_entries: int = 1024, ttl: float = 3600.0) -> None:
+        """Inicializa o cache com limite de entradas e TTL padrao."""
+        self._max_entries = max_entries
+        self._ttl = ttl
+        self._entries: "OrderedDict[str, Tuple[float, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[Any]:
+        with self._lock:
+            item = self._entries.get(key)
+            if item is None:
+                return None
+            expires_at, value = item
+            if expires_at <= time.time():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key: str, value: Any, ttl: Optional[float] = None) -> None:
+        with self._lock:
+            self._entries[key] = (time.time() + (ttl or self._ttl), value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self._max_entries:
+                self._entries.popitem(last=False)
+
+    def delete(self, key: str) -> None:
+        with self._lock:
+            self._entries.pop(key, None)
+
+
+class SqliteCache(Cache):
+    """Cache em arquivo SQLite (WAL) compartilhado pelos workers do mesmo no."""
+
+    name = "sqlite"
+    _PRUNE_EVERY = 256
+
+    def __init__(self, path: str, max_entries: int = 100_000, ttl: float = 3600.0) -> None:
+        """Abre (ou cria) o arquivo de cache e configura WAL."""
+        self._path = path
+        self._max_entries = max_entries
+        self._ttl = ttl
+        self._local = threading.local()
+        self._writes = 0
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        connection = self._connection()
+        connection.execute(
+            "CREATE TABLE IF NOT EXISTS cache (key TEXT PRIMARY KEY, value TEXT NOT NULL, "
+            "expires_at REAL NOT NULL, accessed_at REAL NOT NULL)"
+        )
+        connection.execute("CREATE INDEX IF NOT EXISTS ix_cache_accessed ON cache (accessed_at)")
+
+    def _connection(self) -> sqlite3.Connection:
+        """Retorna a conexao da thread atual, criando-a na primeira utilizacao."""
+        connection = getattr(self._local, "connection", None)
+        if connection is None:
+            connection = sqlite3.connect(self._path, timeout=1.0, isolation_level=None)
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("PRAGMA synchronous=NORMAL")
+            self._local.connection = connection
+        return connection
+
+    def get(self, key: str) -> Optional[Any]:
+        now = time.time()
+        try:
+            connection = self._connection()
+            row = connection.execute("SELECT value, expires_at FROM cache WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                return None
+            if row[1] <= now:
+                connection.execute("DELETE FROM cache WHERE key = ?", (key,))
+                return None
+            connection.execute("UPDATE cache SET accessed_at = ? WHERE key = ?", (now, key))
+            return json.loads(row[0])
+        except sqlite3.Error as exc:
+            logger.debug("Falha ao ler cache SQLite: %s", exc)
+            return None
+
+    def set(self, key: str, value: Any, ttl: Optional[float] = None) -> None:
+        now = time.time()
+        try:
+            connection = self._connection()
+            connection.execute(
+                "INSERT OR REPLACE INTO cache (key, value, expires_at, accessed_at) VALUES (?, ?, ?, ?)",
+                (key, json.dumps(value, ensure_ascii=False), now + (ttl or self._ttl), now),
+            )
+            self._writes += 1
+            if self._writes % self._PRUNE_EVERY == 0:
+                self.prune()
+        except sqlite3.Error as exc:
+            logger.debug("Falha ao gravar cache SQLite: %s", exc)
+
+    def delete(self, key: str) -> None:
+        try:
+            self._connection().execute("DELETE FROM cache WHERE key = ?", (key,))
+        except sqlite3.Error as exc:
+            logger.debug("Falha ao remover do cache SQLite: %s", exc)
+
+    def recent(self, limit: int) -> List[Tuple[str, Any, float]]:
+        now = time.time()
+        try:
+            rows = self._connection().execute(
+                "SELECT key, value, expires_at FROM cache WHERE expires_at > ? ORDER BY accessed_at DESC LIMIT ?",
+                (now, limit),
+            ).fetchall()
+        except sqlite3.Error as exc:
+            logger.debug("Falha ao listar cache SQLite: %s", exc)
+            return []
+        return [(key, json.loads(value), expires_at - now) for key, value, expires_at in rows]
+
+    def prune(self) -> None:
+        """Remove entradas expiradas e as menos usadas acima do limite."""
+        connection = self._connection()
+        connection.execute("DELETE FROM cache WHERE expires_at <= ?", (time.time(),))
+        connection.execute(
+            "DELETE FROM cache WHERE key IN (SELECT key FROM cache ORDER BY accessed_at DESC LIMIT -1 OFFSET ?)",
+            (self._max_entries,),
+        )
+
+
+class DatabaseCache(Cache):
+    """Cache na tabela cache_entries do banco principal, compartilhado entre nos."""
+
+    name = "database"
+    _PRUNE_EVERY = 256
+
+    def __init__(self, ttl: float = 3600.0) -> None:
+        """Inicializa o cache usando o engine da aplicacao."""
+        self._ttl = ttl
+        self._writes = 0
+
+    def get(self, key: str) -> Optional[Any]:
+        try:
+            with Session(get_engine()) as session:
+                entry = session.get(CacheEntry, key)
+                if entry is None or entry.expires_at <= datetime.utcnow():
+                    return None
+                return json.loads(entry.value)
+        except SQLAlchemyError as exc:
+            logger.debug("Falha ao ler cache no banco: %s", exc)
+            return None
+
+    def set(self, key: str, value: Any, ttl: Optional[float] = None) -> None:
+        expires_at = datetime.utcnow() + timedelta(seconds=ttl or self._ttl)
+        try:
+            with Session(get_engine()) as session:
+                session.merge(CacheEntry(key=key, value=json.dumps(value, ensure_ascii=False), expires_at=expires_at))
+                self._writes += 1
+                if self._writes % self._PRUNE_EVERY == 0:
+                    session.exec(delete(CacheEntry).where(CacheEntry.expires_at <= datetime.utcnow()))
+                session.commit()
+        except SQLAlchemyError as exc:
+            logger.debug("Falha ao gravar cache no banco: %s", exc)
+
+    def delete(self, key: str) -> None:
+        try:
+            with Session(get_engine()) as session:
+                session.exec(delete(CacheEntry).where(CacheEntry.key == key))
+                session.commit()
+        except SQLAlchemyError as exc:
+            logger.debug("Falha ao remover do cache no banco: %s", exc)
+
+    def recent(self, limit: int) -> List[Tuple[str, Any, float]]:
+        now = datetime.utcnow()
+        try:
+            with Session(get_engine()) as session:
+                entries = session.exec(
+                    select(CacheEntry)
+                    .where(CacheEntry.expires_at > now)
+                    .order_by(CacheEntry.expires_at.desc())
+                    .limit(limit)
+                ).all()
+        except SQLAlchemyError as exc:
+            logger.debug("Falha ao listar cache no banco: %s", exc)
+            return []
+        return [
+            (entry.key, json.loads(entry.value), (entry.expires_at - now).total_seconds()) for entry in entries
+        ]
+
+
+class TieredCache(Cache):
+    """Consulta os niveis em ordem e repopula os niveis mais rapidos apos um acerto."""
+
+    name = "tiered"
+
+    def __init__(self, tiers: List[Cache]) -> None:
+        """Inicializa com os niveis do mais rapido para o mais lento."""
+        self._tiers = tiers
+
+    def get(self, key: str) -> Optional[Any]:
+        for index, tier in enumerate(self._tiers):
+            value = tier.get(key)
+            record_cache_tier_lookup(tier.name, value is not None)
+            if value is not None:
+                for upper in self._tiers[:index]:
+                    upper.set(key, value)
+                return value
+        return None
+
+    def set(self, key: str, value: Any, ttl: Optional[float] = None) -> None:
+        for tier in self._tiers:
+            tier.set(key, value, ttl)
+
+    def delete(self, key: str) -> None:
+        for tier in self._tiers:
+            tier.delete(key)
+
+    def warm_up(self, limit: int) -> int:
+        """Abre os niveis persistentes e copia as entradas recentes de cada um para os niveis acima."""
+        loaded = 0
+        for index in range(len(self._tiers) - 1, 0, -1):
+            for key, value, remaining in self._tiers[index].recent(limit):
+                for upper in self._tiers[:index]:
+                    upper.set(key, value, remaining)
+                loaded += 1
+        return loaded
+
+
+def build_result_cache() -> Cache:
+    """Monta o cache de resultados conforme CACHE_BACKENDS (ex.: memory,sqlite,database)."""
+    settings = get_settings()
+    tiers: List[Cache] = []
+    for backend in [item.strip() for item in settings.cache_backends.split(",") if item.strip()]:
+        if backend == "memory":
+            tiers.append(MemoryCache(settings.cache_memory_max_entries, settings.cache_ttl_seconds))
+        elif backend == "sqlite":
+            path = settings.cache_sqlite_path or os.path.join(tempfile.gettempdir(), "email-ai-cache.sqlite3")
+            tiers.append(SqliteCache(path, settings.cache_sqlite_max_entries, settings.cache_ttl_seconds))
+        elif backend == "database":
+            tiers.append(DatabaseCache(settings.cache_ttl_seconds))
+        else:
+            raise ValueError(f"Backend de cache desconhecido: {backend}")
+    if not tiers:
+        return NullCache()
+    return TieredCache(tiers)
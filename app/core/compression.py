@@ -0,0 +1,66 @@
+import zlib
+from typing import Any, Optional
+
+from sqlalchemy.types import LargeBinary, TypeDecorator
+
+from app.core.config import get_settings
+
+try:
+    import zstandard
+except ImportError:  # pragma: no cover - dependencia opcional
+    zstandard = None
+
+PLAIN_MARKER = b"\x00p"
+ZLIB_MARKER = b"\x00z"
+ZSTD_MARKER = b"\x00s"
+
+
+def compress_text(value: str, min_bytes: Optional[int] = None, codec: Optional[str] = None) -> bytes:
+    """Codifica o texto com marcador de formato, comprimindo quando compensa."""
+    settings = get_settings()
+    min_bytes = settings.body_compression_min_bytes if min_bytes is None else min_bytes
+    codec = codec or settings.body_compression_codec
+    raw = value.encode("utf-8")
+    if len(raw) < min_bytes or codec == "none":
+        return PLAIN_MARKER + raw
+    if codec == "zstd" and zstandard is not None:
+        compressed = ZSTD_MARKER + zstandard.ZstdCompressor(level=3).compress(raw)
+    else:
+        compressed = ZLIB_MARKER + zlib.compress(raw, 6)
+    return compressed if len(compressed) < len(raw) else PLAIN_MARKER + raw
+
+
+def decompress_text(value: Any) -> str:
+    """Decodifica valores gravados por compress_text ou texto legado sem marcador."""
+    if isinstance(value, str):
+        return value
+    data = bytes(value)
+    marker, payload = data[:2], data[2:]
+    if marker == PLAIN_MARKER:
+        return payload.decode("utf-8")
+    if marker == ZLIB_MARKER:
+        return zlib.decompress(payload).decode("utf-8")
+    if marker == ZSTD_MARKER:
+        if zstandard is None:
+            raise RuntimeError("Corpo comprimido com zstd, mas o pacote zstandard nao esta instalado")
+        return zstandard.ZstdDecompressor().decompress(payload).decode("utf-8")
+    return data.decode("utf-8")
+
+
+class CompressedText(TypeDecorator):
+    """Coluna de texto armazenada como binario com compressao transparente."""
+
+    impl = LargeBinary
+    cache_ok = True
+
+    def process_bind_param(self, value: Optional[str], dialect: Any) -> Optional[bytes]:
+        """Comprime o texto antes de gravar."""
+        if value is None:
+            return None
+        return compress_text(value)
+
+    def process_result_value(self, value: Any, dialect: Any) -> Optional[str]:
+        """Descomprime o valor lido do banco."""
+        if value is None:
+            return None
+        return decompress_text(value)
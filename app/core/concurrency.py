@@ -0,0 +1,168 @@
+import json
+import re
+import threading
+import time
+from typing import Any, Dict, List, Optional, Pattern, Tuple
+
+from app.core.config import get_settings
+from app.core.metrics import counter, gauge
+from app.core.timing import current_timings
+
+CONCURRENCY_LIMIT = gauge(
+    "adaptive_concurrency_limit",
+    "Limite atual de requisicoes simultaneas por grupo de endpoints.",
+    ("endpoint",),
+)
+CONCURRENCY_IN_FLIGHT = gauge(
+    "adaptive_concurrency_in_flight",
+    "Requisicoes em andamento por grupo de endpoints limitados.",
+    ("endpoint",),
+)
+CONCURRENCY_REJECTED = counter(
+    "adaptive_concurrency_rejected_total",
+    "Requisicoes recusadas com 503 por excesso de concorrencia.",
+    ("endpoint",),
+)
+
+# Somente indisponibilidade/timeout do provedor indica sobrecarga; erros da aplicacao nao reduzem o limite.
+OVERLOAD_STATUSES = frozenset({502, 503, 504})
+
+
+class AimdLimiter:
+    """Limite de concorrencia AIMD: cresce 1 por janela de sucesso e cai multiplicativamente com lentidao ou erro."""
+
+    def __init__(
+        self,
+        name: str,
+        latency_target: float,
+        initial_limit: int = 8,
+        min_limit: int = 1,
+        max_limit: int = 16,
+        backoff_ratio: float = 0.7,
+    ) -> None:
+        """Inicializa o limitador com a latencia alvo (segundos) e os limites."""
+        self.name = name
+        self._latency_target = latency_target
+        self._min_limit = min_limit
+        self._max_limit = max_limit
+        self._backoff_ratio = backoff_ratio
+        self._limit = float(initial_limit)
+        self._in_flight = 0
+        self._last_decrease = 0.0
+        self._lock = threading.Lock()
+        CONCURRENCY_LIMIT.labels(name).set(int(self._limit))
+
+    @property
+    def limit(self) -> int:
+        """Limite atual (inteiro) de requisicoes simultaneas."""
+        return int(self._limit)
+
+    def try_acquire(self) -> bool:
+        """Reserva uma vaga se houver; nunca espera."""
+        with self._lock:
+            if self._in_flight >= int(self._limit):
+                return False
+            self._in_flight += 1
+            CONCURRENCY_IN_FLIGHT.labels(self.name).set(self._in_flight)
+            return True
+
+    def release(self, latency: float, overloaded: bool) -> None:
+        """Libera a vaga e ajusta o limite conforme a latencia observada e o desfecho."""
+        now = time.monotonic()
+        with self._lock:
+            self._in_flight -= 1
+            if overloaded or latency > self._latency_target:
+                # Uma reducao por janela de latencia: respostas lentas da mesma rajada nao derrubam o limite a zero.
+                if now - self._last_decrease >= self._latency_target:
+                    self._limit = max(float(self._min_limit), self._limit * self._backoff_ratio)
+                    self._last_decrease = now
+            else:
+                self._limit = min(float(self._max_limit), self._limit + 1.0 / self._limit)
+            CONCURRENCY_IN_FLIGHT.labels(self.name).set(self._in_flight)
+            CONCURRENCY_LIMIT.labels(self.name).set(int(self._limit))
+
+
+def build_limiters() -> List[Tuple[str, Pattern[str], AimdLimiter]]:
+    """Cria os limitadores dos endpoints de IA conforme as configuracoes."""
+    settings = get_settings()
+    groups = [
+        ("classify", r"^/api/v1/emails/classify$", settings.concurrency_classify_target_seconds),
+        ("generate-response", r"^/api/v1/emails/\d+/generate-response$", settings.concurrency_generate_target_seconds),
+    ]
+    return [
+        (
+            "POST",
+            re.compile(pattern),
+            AimdLimiter(
+                name,
+                target,
+                settings.concurrency_initial_limit,
+                settings.concurrency_min_limit,
+                settings.concurrency_max_limit,
+            ),
+        )
+        for name, pattern, target in groups
+    ]
+
+
+class AdaptiveConcurrencyMiddleware:
+    """Middleware ASGI que recusa com 503 o excesso de requisicoes nos endpoints de IA em vez de enfileira-las."""
+
+    def __init__(self, app: Any) -> None:
+        """Envolve a aplicacao ASGI com os limitadores configurados."""
+        self.app = app
+        settings = get_settings()
+        self._enabled = settings.concurrency_limit_enabled
+        self._retry_after = str(settings.concurrency_retry_after_seconds)
+        self._limiters = build_limiters() if self._enabled else []
+
+    def _limiter_for(self, scope: Dict[str, Any]) -> Optional[AimdLimiter]:
+        """Retorna o limitador da rota, ou None para endpoints sem limite."""
+        for method, pattern, limiter in self._limiters:
+            if scope["method"] == method and pattern.match(scope["path"]):
+                return limiter
+        return None
+
+    async def __call__(self, scope: Dict[str, Any], receive: Any, send: Any) -> None:
+        limiter = self._limiter_for(scope) if scope["type"] == "http" and self._enabled else None
+        if limiter is None:
+            await self.app(scope, receive, send)
+            return
+        if not limiter.try_acquire():
+            CONCURRENCY_REJECTED.labels(limiter.name).inc()
+            await self._reject(send)
+            return
+        started = time.perf_counter()
+        timings = current_timings()
+        status_holder = {"status": 500}
+
+        async def send_wrapper(message: Dict[str, Any]) -> None:
+            if message["type"] == "http.response.start":
+                status_holder["status"] = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            # Esperas em fila (rate limit, escalonador justo, pre-geracao) nao medem a capacidade do servico.
+            queued = timings.queued() if timings is not None else 0.0
+            latency = max(time.perf_counter() - started - queued, 0.0)
+            limiter.release(latency, status_holder["status"] in OVERLOAD_STATUSES)
+
+    async def _reject(self, send: Any) -> None:
+        """Responde 503 com Retry-After sem executar a rota."""
+        body = json.dumps(
+            {"detail": {"erro": "sobrecarga", "mensagem": "Servico de IA sobrecarregado. Tente novamente em instantes."}}
+        ).encode("utf-8")
+        await send(
+            {
+                "type": "http.response.start",
+                "status": 503,
+                "headers": [
+                    (b"content-type", b"application/json"),
+                    (b"content-length", str(len(body)).encode("latin-1")),
+                    (b"retry-after", self._retry_after.encode("latin-1")),
+                ],
+            }
+        )
+        await send({"type": "http.response.body", "body": body})
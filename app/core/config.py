@@ -1,8 +1,20 @@
 from functools import lru_cache
+from typing import List
 
+from pydantic import BaseModel
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
 
+class LlmBackendConfig(BaseModel):
+    """Define um backend LLM compativel com a API de chat completions da OpenAI."""
+
+    endpoint: str
+    model: str
+    api_key: str = ""
+    weight: float = 1.0
+    name: str = ""
+
+
 class Settings(BaseSettings):
     """Centraliza configuracoes da aplicacao a partir de variaveis de ambiente."""
 
@@ -18,11 +30,92 @@ class Settings(BaseSettings):
     huggingface_api_key: str = ""
     huggingface_model: str = "joeddav/xlm-roberta-base-xnli"
     huggingface_endpoint_base: str = "https://router.huggingface.co/hf-inference/models"
+    local_classifier_model: str = ""
+    local_classifier_device: int = -1
+    local_classifier_quantize: bool = False
+    classifier_window_tokens: int = 256
+    classifier_window_overlap: int = 32
+    classifier_max_windows: int = 8
+    classifier_window_aggregation: str = "max"
+    classifier_window_first_n: int = 3
+    classifier_cascade: str = "local,remote"
+    classifier_rules_threshold: float = 0.95
+    classifier_local_threshold: float = 0.85
     llm_api_key: str = ""
     llm_endpoint: str = "https://openrouter.ai/api/v1/chat/completions"
     llm_model: str = "tngtech/deepseek-r1t2-chimera:free"
+    llm_backends: List[LlmBackendConfig] = []
+    llm_router_ewma_alpha: float = 0.3
+    llm_router_error_threshold: float = 0.5
+    llm_router_cooldown_seconds: float = 30.0
     openrouter_referer: str = ""
     openrouter_title: str = ""
+    rate_limit_enabled: bool = True
+    rate_limit_default_requests: int = 20
+    rate_limit_window_seconds: float = 60.0
+    rate_limit_max_queue: int = 16
+    rate_limit_max_wait_seconds: float = 30.0
+    admin_emails: str = ""
+    metrics_enabled: bool = True
+    metrics_token: str = ""
+    warmup_enabled: bool = True
+    warmup_db_connections: int = 5
+    warmup_cache_entries: int = 500
+    body_compression_codec: str = "zstd"
+    body_compression_min_bytes: int = 1024
+    cache_backends: str = "memory,sqlite"
+    cache_ttl_seconds: float = 7 * 24 * 3600.0
+    cache_memory_max_entries: int = 2048
+    cache_sqlite_path: str = ""
+    cache_sqlite_max_entries: int = 200_000
+    knn_enabled: bool = False
+    knn_index_dir: str = "knn_index"
+    knn_reload_interval_seconds: float = 5.0
+    knn_dimensions: int = 1024
+    knn_max_examples: int = 2000
+    knn_neighbors: int = 5
+    knn_min_similarity: float = 0.5
+    knn_threshold: float = 0.8
+    reply_template_classifications: str = "Improdutivo,Propaganda"
+    reply_templates_path: str = ""
+    pregeneration_enabled: bool = False
+    pregeneration_classifications: str = "Produtivo"
+    pregeneration_queue_size: int = 100
+    pregeneration_workers: int = 1
+    pregeneration_budget_per_hour: int = 500
+    pregeneration_wait_seconds: float = 20.0
+    usage_tracking_enabled: bool = True
+    usage_batch_size: int = 200
+    usage_flush_seconds: float = 2.0
+    usage_prices: str = ""
+    fair_scheduler_enabled: bool = True
+    fair_scheduler_classifier_slots: int = 8
+    fair_scheduler_llm_slots: int = 4
+    fair_scheduler_user_concurrency: int = 2
+    fair_scheduler_max_queue_per_user: int = 32
+    fair_scheduler_max_wait_seconds: float = 30.0
+    fair_scheduler_quota_per_hour: float = 0
+    fair_scheduler_weights: str = ""
+    fair_scheduler_background_weight: float = 0.25
+    concurrency_limit_enabled: bool = True
+    concurrency_initial_limit: int = 8
+    concurrency_min_limit: int = 1
+    concurrency_max_limit: int = 16
+    concurrency_classify_target_seconds: float = 5.0
+    concurrency_generate_target_seconds: float = 20.0
+    concurrency_retry_after_seconds: int = 2
+    idempotency_ttl_seconds: int = 24 * 3600
+    idempotency_wait_seconds: float = 30.0
+    idempotency_lock_seconds: float = 120.0
+    partitioning_months_ahead: int = 3
+    partitioning_interval_seconds: float = 86400.0
+    retention_enabled: bool = False
+    retention_days: int = 365
+    retention_interval_seconds: float = 3600.0
+    retention_batch_size: int = 1000
+    archive_dir: str = "archive"
+    profile_dir: str = "profiles"
+    profile_sample_interval_ms: float = 5.0
     debug: bool = False
     seed_enabled: bool = False
     environment: str = "development"
@@ -1,20 +1,37 @@
-from typing import Generator
+from typing import Generator, Optional
 
+from sqlalchemy.engine import Engine
 from sqlmodel import Session, SQLModel, create_engine
 
 from app.core.config import get_settings
 
 
-settings = get_settings()
-engine = create_engine(settings.database_url, echo=settings.debug)
+engine: Optional[Engine] = None
+
+
+def get_engine() -> Engine:
+    """Retorna o engine do processo, criando-o na primeira utilizacao."""
+    global engine
+    if engine is None:
+        settings = get_settings()
+        engine = create_engine(settings.database_url, echo=settings.debug)
+    return engine
+
+
+def dispose_engine() -> None:
+    """Fecha as conexoes do pool e descarta o engine atual."""
+    global engine
+    if engine is not None:
+        engine.dispose()
+        engine = None
 
 
 def get_session() -> Generator[Session, None, None]:
     """Fornece uma sessao de banco para uso em dependencias."""
-    with Session(engine) as session:
+    with Session(get_engine()) as session:
         yield session
 
 
 def create_db_and_tables() -> None:
     """Cria as tabelas no banco com base nos modelos registrados."""
-    SQLModel.metadata.create_all(engine)
+    SQLModel.metadata.create_all(get_engine())
@@ -0,0 +1,32 @@
+import hashlib
+from typing import Optional
+
+from fastapi import Response, status
+
+CACHE_CONTROL = "private, no-cache"
+
+
+def make_etag(*parts: object) -> str:
+    """Gera um ETag fraco a partir dos componentes que definem a versao do recurso."""
+    digest = hashlib.sha1("|".join(str(part) for part in parts).encode("utf-8")).hexdigest()[:20]
+    return f'W/"{digest}"'
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """Compara o If-None-Match recebido com o ETag atual usando comparacao fraca."""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    current = etag.removeprefix("W/")
+    return any(candidate.strip().removeprefix("W/") == current for candidate in if_none_match.split(","))
+
+
+def not_modified(etag: str) -> Response:
+    """Retorna 304 sem corpo mantendo os cabecalhos de validacao."""
+    return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=cache_headers(etag))
+
+
+def cache_headers(etag: str) -> dict:
+    """Cabecalhos que obrigam o navegador a revalidar com o ETag a cada leitura."""
+    return {"ETag": etag, "Cache-Control": CACHE_CONTROL, "Vary": "Authorization"}
@@ -0,0 +1,384 @@
+import functools
+import threading
+import time
+from abc import ABC, abstractmethod
+from bisect import bisect_left
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from app.core.timing import record_span
+
+DEFAULT_BUCKETS: Tuple[float, ...] = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+LabelValues = Tuple[str, ...]
+GaugeSample = Tuple[Dict[str, str], float]
+
+
+def _escape(value: str) -> str:
+    """Escapa valores de label no formato de exposicao do Prometheus."""
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    """Formata pares de labels como {a="1",b="2"}."""
+    parts = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+def _format_value(value: float) -> str:
+    """Formata numeros sem casas decimais desnecessarias."""
+    if value == int(value):
+        return str(int(value))
+    return repr(float(value))
+
+
+class _Metric(ABC):
+    """Base das metricas com filhos indexados por valores de label."""
+
+    kind = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> None:
+        """Inicializa a metrica; filhos sao criados sob demanda."""
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._children: Dict[LabelValues, Any] = {}
+        self._lock = threading.Lock()
+
+    def labels(self, *values: Any) -> Any:
+        """Retorna o filho para os valores de label; o lock so e usado na criacao."""
+        key = tuple(str(value) for value in values)
+        child = self._children.get(key)
+        if child is None:
+            with self._lock:
+                child = self._children.get(key)
+                if child is None:
+                    child = self._new_child()
+                    self._children[key] = child
+        return child
+
+    @abstractmethod
+    def _new_child(self) -> Any:
+        """Cria o valor de uma nova combinacao de labels."""
+
+    def _items(self) -> List[Tuple[LabelValues, Any]]:
+        """Copia os filhos para renderizacao sem segurar o lock."""
+        with self._lock:
+            return list(self._children.items())
+
+    def render(self) -> List[str]:
+        """Gera as linhas de exposicao da metrica."""
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        for values, child in self._items():
+            lines.extend(self._render_child(values, child))
+        return lines
+
+    def _render_child(self, values: LabelValues, child: Any) -> List[str]:
+        return [f"{self.name}{_format_labels(self.labelnames, values)} {_format_value(child.value)}"]
+
+
+class _ValueChild:
+    """Valor numerico com lock proprio, sem contencao entre series distintas."""
+
+    __slots__ = ("value", "_lock")
+
+    def __init__(self) -> None:
+        self.value = 0.0
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1.0) -> None:
+        """Incrementa o valor."""
+        with self._lock:
+            self.value += amount
+
+    def dec(self, amount: float = 1.0) -> None:
+        """Decrementa o valor."""
+        with self._lock:
+            self.value -= amount
+
+    def set(self, value: float) -> None:
+        """Define o valor atual."""
+        self.value = float(value)
+
+
+class Counter(_Metric):
+    """Contador monotonicamente crescente."""
+
+    kind = "counter"
+
+    def _new_child(self) -> _ValueChild:
+        return _ValueChild()
+
+
+class Gauge(_Metric):
+    """Valor instantaneo que pode subir ou descer."""
+
+    kind = "gauge"
+
+    def _new_child(self) -> _ValueChild:
+        return _ValueChild()
+
+
+class _HistogramChild:
+    """Acumula contagem por bucket, soma e total de observacoes."""
+
+    __slots__ = ("_bounds", "counts", "sum", "count", "_lock")
+
+    def __init__(self, bounds: Tuple[float, ...]) -> None:
+        self._bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)
+        self.sum = 0.0
+        self.count = 0
+        self._lock = threading.Lock()
+
+    def observe(self, value: float) -> None:
+        """Registra uma observacao; a busca do bucket ocorre fora do lock."""
+        index = bisect_left(self._bounds, value)
+        with self._lock:
+            self.counts[index] += 1
+            self.sum += value
+            self.count += 1
+
+
+class Histogram(_Metric):
+    """Histograma com buckets fixos no formato do Prometheus."""
+
+    kind = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS,
+    ) -> None:
+        """Inicializa o histograma com os limites de bucket informados."""
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def _new_child(self) -> _HistogramChild:
+        return _HistogramChild(self.buckets)
+
+    def _render_child(self, values: LabelValues, child: _HistogramChild) -> List[str]:
+        with child._lock:
+            counts = list(child.counts)
+            total_sum = child.sum
+            total = child.count
+        lines = []
+        cumulative = 0
+        for bound, count in zip(self.buckets + (float("inf"),), counts):
+            cumulative += count
+            le = "+Inf" if bound == float("inf") else _format_value(bound)
+            labels = _format_labels(self.labelnames, values, f'le="{le}"')
+            lines.append(f"{self.name}_bucket{labels} {cumulative}")
+        base = _format_labels(self.labelnames, values)
+        lines.append(f"{self.name}_sum{base} {repr(total_sum)}")
+        lines.append(f"{self.name}_count{base} {total}")
+        return lines
+
+
+class MetricsRegistry:
+    """Registro de metricas do processo e de gauges calculados na coleta."""
+
+    def __init__(self) -> None:
+        """Inicializa o registro vazio."""
+        self._metrics: Dict[str, _Metric] = {}
+        self._callbacks: List[Tuple[str, str, Callable[[], Iterable[GaugeSample]]]] = []
+        self._lock = threading.Lock()
+
+    def register(self, metric: _Metric) -> _Metric:
+        """Registra a metrica, reaproveitando a existente com o mesmo nome."""
+        with self._lock:
+            existing = self._metrics.get(metric.name)
+            if existing is not None:
+                return existing
+            self._metrics[metric.name] = metric
+            return metric
+
+    def register_callback(
+        self,
+        name: str,
+        documentation: str,
+        callback: Callable[[], Iterable[GaugeSample]],
+    ) -> None:
+        """Registra um gauge avaliado somente no momento da coleta."""
+        with self._lock:
+            self._callbacks = [item for item in self._callbacks if item[0] != name]
+            self._callbacks.append((name, documentation, callback))
+
+    def render(self) -> str:
+        """Gera o texto completo no formato de exposicao do Prometheus."""
+        with self._lock:
+            metrics = list(self._metrics.values())
+            callbacks = list(self._callbacks)
+        lines: List[str] = []
+        for metric in metrics:
+            lines.extend(metric.render())
+        for name, documentation, callback in callbacks:
+            lines.append(f"# HELP {name} {documentation}")
+            lines.append(f"# TYPE {name} gauge")
+            try:
+                samples = list(callback())
+            except Exception:
+                continue
+            for labels, value in samples:
+                label_text = _format_labels(list(labels.keys()), list(labels.values()))
+                lines.append(f"{name}{label_text} {_format_value(value)}")
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = MetricsRegistry()
+
+
+def counter(name: str, documentation: str, labelnames: Sequence[str] = ()) -> Counter:
+    """Cria ou recupera um contador no registro global."""
+    return REGISTRY.register(Counter(name, documentation, labelnames))
+
+
+def gauge(name: str, documentation: str, labelnames: Sequence[str] = ()) -> Gauge:
+    """Cria ou recupera um gauge no registro global."""
+    return REGISTRY.register(Gauge(name, documentation, labelnames))
+
+
+def histogram(
+    name: str,
+    documentation: str,
+    labelnames: Sequence[str] = (),
+    buckets: Sequence[float] = DEFAULT_BUCKETS,
+) -> Histogram:
+    """Cria ou recupera um histograma no registro global."""
+    return REGISTRY.register(Histogram(name, documentation, labelnames, buckets))
+
+
+HTTP_REQUEST_DURATION = histogram(
+    "http_request_duration_seconds",
+    "Latencia das requisicoes HTTP por rota.",
+    ("method", "route", "status"),
+)
+PROVIDER_CALL_DURATION = histogram(
+    "provider_call_duration_seconds",
+    "Duracao das chamadas a provedores de IA por status.",
+    ("provider", "status"),
+)
+PROVIDER_CALLS_IN_FLIGHT = gauge(
+    "provider_calls_in_flight",
+    "Chamadas a provedores de IA em andamento.",
+    ("provider",),
+)
+DB_QUERY_DURATION = histogram(
+    "db_query_duration_seconds",
+    "Duracao das operacoes de banco por metodo de repositorio.",
+    ("repository", "method"),
+    buckets=(0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5),
+)
+FILE_EXTRACTION_DURATION = histogram(
+    "file_extraction_duration_seconds",
+    "Duracao da extracao de texto de arquivos enviados.",
+    ("file_type",),
+)
+CACHE_REQUESTS = counter(
+    "cache_requests_total",
+    "Consultas a caches por resultado (hit/miss).",
+    ("cache", "result"),
+)
+
+
+CACHE_TIER_REQUESTS = counter(
+    "cache_tier_requests_total",
+    "Consultas a cada nivel do cache de resultados por resultado (hit/miss).",
+    ("tier", "result"),
+)
+
+
+def record_cache_lookup(cache: str, hit: bool) -> None:
+    """Contabiliza um acerto ou falha de cache."""
+    CACHE_REQUESTS.labels(cache, "hit" if hit else "miss").inc()
+
+
+def record_cache_tier_lookup(tier: str, hit: bool) -> None:
+    """Contabiliza um acerto ou falha em um nivel do cache em camadas."""
+    CACHE_TIER_REQUESTS.labels(tier, "hit" if hit else "miss").inc()
+
+
+_usage_sink: Optional[Callable[..., None]] = None
+
+
+def set_usage_sink(sink: Optional[Callable[..., None]]) -> None:
+    """Define o destino que recebe cada chamada de provedor (provider, model, latency, status, tokens)."""
+    global _usage_sink
+    _usage_sink = sink
+
+
+class provider_call:
+    """Mede duracao, chamadas em andamento e span Server-Timing de um provedor de IA."""
+
+    __slots__ = ("_provider", "_started", "model", "status", "input_tokens", "output_tokens")
+
+    def __init__(self, provider: str, model: Optional[str] = None) -> None:
+        """Prepara a medicao; defina `status` (e tokens, se conhecidos) antes de sair do bloco."""
+        self._provider = provider
+        self._started = 0.0
+        self.model = model
+        self.status: Optional[str] = None
+        self.input_tokens: Optional[int] = None
+        self.output_tokens: Optional[int] = None
+
+    def __enter__(self) -> "provider_call":
+        PROVIDER_CALLS_IN_FLIGHT.labels(self._provider).inc()
+        self._started = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, traceback) -> None:
+        elapsed = time.perf_counter() - self._started
+        PROVIDER_CALLS_IN_FLIGHT.labels(self._provider).dec()
+        status = self.status or ("network_error" if exc_type else "ok")
+        PROVIDER_CALL_DURATION.labels(self._provider, status).observe(elapsed)
+        record_span(self._provider, elapsed)
+        if _usage_sink is not None:
+            _usage_sink(self._provider, self.model, elapsed, status, self.input_tokens, self.output_tokens)
+
+
+def timed_query(func: Callable[..., Any]) -> Callable[..., Any]:
+    """Decora metodos de repositorio registrando a duracao da consulta."""
+    repository, _, method = func.__qualname__.partition(".")
+    child = DB_QUERY_DURATION.labels(repository, method)
+
+    @functools.wraps(func)
+    def wrapper(*args: Any, **kwargs: Any) -> Any:
+        started = time.perf_counter()
+        try:
+            return func(*args, **kwargs)
+        finally:
+            child.observe(time.perf_counter() - started)
+
+    return wrapper
+
+
+class MetricsMiddleware:
+    """Middleware ASGI que registra latencia por rota (template) e status."""
+
+    def __init__(self, app: Any) -> None:
+        """Envolve a aplicacao ASGI."""
+        self.app = app
+
+    async def __call__(self, scope: Dict[str, Any], receive: Any, send: Any) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        started = time.perf_counter()
+        status_holder = {"status": 500}
+
+        async def send_wrapper(message: Dict[str, Any]) -> None:
+            if message["type"] == "http.response.start":
+                status_holder["status"] = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            route = scope.get("route")
+            route_path = getattr(route, "path", None) or "unmatched"
+            HTTP_REQUEST_DURATION.labels(scope["method"], route_path, status_holder["status"]).observe(
+                time.perf_counter() - started
+            )
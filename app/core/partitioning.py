@@ -0,0 +1,177 @@
+"""Particionamento mensal da tabela emails por created_at (somente Postgres).
+
+Uso:
+    python -m app.core.partitioning --convert
+    python -m app.core.partitioning --ensure
+"""
+import argparse
+import asyncio
+import logging
+from datetime import date, datetime
+from typing import List, Optional
+
+from sqlalchemy import text
+from sqlalchemy.engine import Connection, Engine
+
+from app.core.config import get_settings
+from app.core.database import get_engine
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_PARTITION = "emails_default"
+
+
+def month_start(value: date) -> date:
+    """Primeiro dia do mes da data informada."""
+    return date(value.year, value.month, 1)
+
+
+def add_months(value: date, months: int) -> date:
+    """Soma meses a uma data posicionada no primeiro dia do mes."""
+    index = value.year * 12 + value.month - 1 + months
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def partition_name(month: date) -> str:
+    """Nome da particao mensal."""
+    return f"emails_{month:%Y_%m}"
+
+
+def is_partitioned(connection: Connection) -> bool:
+    """Indica se a tabela emails ja e particionada."""
+    if connection.dialect.name != "postgresql":
+        return False
+    query = text(
+        "SELECT 1 FROM pg_partitioned_table p JOIN pg_class c ON c.oid = p.partrelid WHERE c.relname = 'emails'"
+    )
+    return connection.execute(query).first() is not None
+
+
+def ensure_default_partition(connection: Connection) -> None:
+    """Cria a particao DEFAULT que recebe linhas fora das particoes mensais existentes."""
+    connection.execute(text(f"CREATE TABLE IF NOT EXISTS {DEFAULT_PARTITION} PARTITION OF emails DEFAULT"))
+
+
+def ensure_partitions(connection: Connection, first: date, last: date) -> List[str]:
+    """Cria as particoes mensais de first ate last (inclusive), movendo para elas as linhas ja na DEFAULT."""
+    created = []
+    month = month_start(first)
+    while month <= month_start(last):
+        name = partition_name(month)
+        start, end = month.isoformat(), add_months(month, 1).isoformat()
+        if connection.execute(text("SELECT to_regclass(:name)"), {"name": name}).scalar() is None:
+            # Particao criada avulsa e anexada depois: a DEFAULT nao pode conter linhas do novo intervalo.
+            connection.execute(text(
+                f"CREATE TABLE {name} (LIKE emails INCLUDING DEFAULTS INCLUDING CONSTRAINTS)"
+            ))
+            connection.execute(text(
+                f"WITH moved AS (DELETE FROM {DEFAULT_PARTITION} WHERE created_at >= :start AND created_at < :end "
+                f"RETURNING *) INSERT INTO {name} SELECT * FROM moved"
+            ), {"start": start, "end": end})
+            connection.execute(text(
+                f"ALTER TABLE emails ATTACH PARTITION {name} FOR VALUES FROM ('{start}') TO ('{end}')"
+            ))
+        created.append(name)
+        month = add_months(month, 1)
+    return created
+
+
+def lock_partitions(connection: Connection) -> None:
+    """Serializa a manutencao de particoes entre workers ate o fim da transacao."""
+    connection.execute(text("SELECT pg_advisory_xact_lock(hashtext('emails_partitions'))"))
+
+
+def ensure_future_partitions(engine: Engine, months_ahead: Optional[int] = None) -> List[str]:
+    """Garante a DEFAULT e as particoes do mes atual ate months_ahead meses a frente; sem efeito fora do Postgres."""
+    months_ahead = get_settings().partitioning_months_ahead if months_ahead is None else months_ahead
+    with engine.begin() as connection:
+        if not is_partitioned(connection):
+            return []
+        lock_partitions(connection)
+        ensure_default_partition(connection)
+        today = datetime.utcnow().date()
+        return ensure_partitions(connection, today, add_months(month_start(today), months_ahead))
+
+
+async def partition_maintenance_loop(interval_seconds: float) -> None:
+    """Garante periodicamente as particoes futuras fora do event loop ate ser cancelado."""
+    while True:
+        try:
+            await asyncio.to_thread(ensure_future_partitions, get_engine())
+        except Exception as exc:
+            logger.error("Falha na manutencao de particoes: %s", exc, exc_info=True)
+        await asyncio.sleep(interval_seconds)
+
+
+def drop_empty_partitions_before(engine: Engine, cutoff: datetime) -> List[str]:
+    """Remove particoes inteiramente anteriores ao corte que ja foram esvaziadas pelo arquivamento."""
+    dropped: List[str] = []
+    with engine.begin() as connection:
+        if not is_partitioned(connection):
+            return dropped
+        rows = connection.execute(text(
+            "SELECT c.relname FROM pg_inherits i JOIN pg_class c ON c.oid = i.inhrelid "
+            "JOIN pg_class p ON p.oid = i.inhparent WHERE p.relname = 'emails' ORDER BY c.relname"
+        )).scalars()
+        for name in rows:
+            try:
+                month = datetime.strptime(name, "emails_%Y_%m").date()
+            except ValueError:
+                continue
+            if add_months(month, 1) > cutoff.date():
+                continue
+            if connection.execute(text(f"SELECT 1 FROM {name} LIMIT 1")).first() is None:
+                connection.execute(text(f"DROP TABLE {name}"))
+                dropped.append(name)
+    return dropped
+
+
+def convert_to_partitioned(engine: Engine) -> None:
+    """Converte a tabela emails existente em tabela particionada por mes, copiando os dados."""
+    if engine.dialect.name != "postgresql":
+        raise RuntimeError("Particionamento disponivel apenas para Postgres")
+    with engine.begin() as connection:
+        lock_partitions(connection)
+        if is_partitioned(connection):
+            logger.info("Tabela emails ja particionada")
+            return
+        bounds = connection.execute(text("SELECT min(created_at), max(created_at) FROM emails")).one()
+        connection.execute(text("ALTER TABLE emails RENAME TO emails_legacy"))
+        connection.execute(text("ALTER TABLE emails_legacy RENAME CONSTRAINT emails_pkey TO emails_legacy_pkey"))
+        connection.execute(text("ALTER INDEX IF EXISTS ix_emails_normalized_hash RENAME TO ix_emails_legacy_normalized_hash"))
+        connection.execute(text(
+            "CREATE TABLE emails (LIKE emails_legacy INCLUDING DEFAULTS INCLUDING CONSTRAINTS) "
+            "PARTITION BY RANGE (created_at)"
+        ))
+        connection.execute(text("ALTER TABLE emails ADD PRIMARY KEY (id, created_at)"))
+        connection.execute(text("ALTER TABLE emails ADD FOREIGN KEY (user_id) REFERENCES users (id)"))
+        connection.execute(text("CREATE INDEX ix_emails_user_created ON emails (user_id, created_at DESC)"))
+        connection.execute(text("CREATE INDEX ix_emails_normalized_hash ON emails (normalized_hash)"))
+        connection.execute(text("ALTER SEQUENCE IF EXISTS emails_id_seq OWNED BY emails.id"))
+        today = datetime.utcnow().date()
+        first = bounds[0].date() if bounds[0] else today
+        last = add_months(month_start(today), get_settings().partitioning_months_ahead)
+        # A DEFAULT vem antes: ensure_partitions move dela as linhas de cada mes criado.
+        ensure_default_partition(connection)
+        ensure_partitions(connection, first, max(last, bounds[1].date() if bounds[1] else last))
+        connection.execute(text("INSERT INTO emails SELECT * FROM emails_legacy"))
+        connection.execute(text("DROP TABLE emails_legacy"))
+    logger.info("Tabela emails convertida para particionamento mensal")
+
+
+def main() -> None:
+    """Executa as operacoes de particionamento conforme argumentos."""
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--convert", action="store_true", help="Converte a tabela emails em particionada")
+    parser.add_argument("--ensure", action="store_true", help="Cria as particoes dos proximos meses")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
+    engine = get_engine()
+    if args.convert:
+        convert_to_partitioned(engine)
+    if args.ensure or args.convert:
+        print("Particoes garantidas: " + ", ".join(ensure_future_partitions(engine)))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+import os
+import sys
+import threading
+import time
+from collections import Counter
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Optional
+
+_APP_ROOT = str(Path(__file__).resolve().parents[1])
+
+
+class SamplingProfiler:
+    """Profiler por amostragem de pilhas que grava relatorio em formato collapsed."""
+
+    def __init__(self, interval: float = 0.005, output_dir: str = "profiles") -> None:
+        """Prepara o profiler com o intervalo de amostragem e diretorio de saida."""
+        self._interval = interval
+        self._output_dir = Path(output_dir)
+        self._samples: Counter = Counter()
+        self._stop_event = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._started = 0.0
+        self._report_path: Optional[str] = None
+        self._lock = threading.Lock()
+
+    def start(self) -> None:
+        """Inicia a thread de amostragem."""
+        self._started = time.perf_counter()
+        self._thread = threading.Thread(target=self._run, name="sampling-profiler", daemon=True)
+        self._thread.start()
+
+    def _run(self) -> None:
+        """Coleta pilhas de todas as threads que executam codigo da aplicacao."""
+        own_id = threading.get_ident()
+        while not self._stop_event.wait(self._interval):
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == own_id:
+                    continue
+                stack = []
+                touches_app = False
+                while frame is not None:
+                    code = frame.f_code
+                    if code.co_filename.startswith(_APP_ROOT):
+                        touches_app = True
+                    stack.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{frame.f_lineno})")
+                    frame = frame.f_back
+                if touches_app:
+                    self._samples[";".join(reversed(stack))] += 1
+
+    def stop(self, label: str) -> str:
+        """Encerra a amostragem e grava o relatorio, retornando o nome do arquivo."""
+        with self._lock:
+            if self._report_path is not None:
+                return self._report_path
+            self._stop_event.set()
+            if self._thread is not None:
+                self._thread.join()
+            elapsed = time.perf_counter() - self._started
+            self._output_dir.mkdir(parents=True, exist_ok=True)
+            timestamp = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%S%f")
+            filename = f"profile-{timestamp}.txt"
+            lines = [
+                f"# {label}",
+                f"# duracao={elapsed * 1000:.1f}ms intervalo={self._interval * 1000:.1f}ms amostras={sum(self._samples.values())}",
+            ]
+            lines.extend(f"{stack} {count}" for stack, count in self._samples.most_common())
+            (self._output_dir / filename).write_text("\n".join(lines) + "\n", encoding="utf-8")
+            self._report_path = filename
+            return filename
@@ -0,0 +1,215 @@
+"""Reclassifica os emails armazenados em lotes por id, com checkpoint para retomar apos interrupcao.
+
+Uso:
+    python -m app.core.reclassification --batch-size 200 --workers 4 --rate 5
+"""
+import argparse
+import json
+import logging
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from sqlalchemy.engine import Engine
+from sqlmodel import Session
+
+from app.core.config import get_settings
+from app.core.database import get_engine
+from app.core.metrics import counter
+from app.models.user_model import User  # noqa: F401 - registra a tabela referenciada por emails.user_id
+from app.nlp.classifier_cascade import build_classifier_cascade
+from app.nlp.classifier_client import ClassifierClient
+from app.nlp.exceptions import ExternalServiceError, RateLimitExceededError
+from app.nlp.local_classifier import LocalClassifierClient
+from app.repositories.email_repository import EmailRepository
+
+logger = logging.getLogger(__name__)
+
+RECLASSIFIED_EMAILS = counter(
+    "emails_reclassified_total",
+    "Emails processados pelo job de reclassificacao.",
+    ("outcome",),
+)
+
+
+class Throttle:
+    """Limita a vazao global de chamadas ao classificador entre as threads do job."""
+
+    def __init__(self, rate_per_second: float) -> None:
+        """Inicializa com a vazao maxima (0 desativa o limite)."""
+        self._interval = 1.0 / rate_per_second if rate_per_second > 0 else 0.0
+        self._next = time.monotonic()
+        self._lock = threading.Lock()
+
+    def wait(self) -> None:
+        """Bloqueia ate o proximo horario livre."""
+        if not self._interval:
+            return
+        with self._lock:
+            now = time.monotonic()
+            scheduled = max(self._next, now)
+            self._next = scheduled + self._interval
+        if scheduled > now:
+            time.sleep(scheduled - now)
+
+
+def load_checkpoint(path: Path) -> Dict[str, Any]:
+    """Le o checkpoint salvo ou retorna o estado inicial."""
+    if path.exists():
+        with open(path, encoding="utf-8") as handle:
+            return json.load(handle)
+    return {
+        "last_id": 0,
+        "processed": 0,
+        "changed": 0,
+        "failed": 0,
+        "failed_ids": [],
+        "started_at": datetime.utcnow().isoformat(),
+    }
+
+
+def save_checkpoint(path: Path, state: Dict[str, Any]) -> None:
+    """Grava o checkpoint de forma atomica."""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    temporary = path.with_name(f".{path.name}.tmp")
+    with open(temporary, "w", encoding="utf-8") as handle:
+        json.dump(state, handle)
+        handle.flush()
+        os.fsync(handle.fileno())
+    os.replace(temporary, path)
+
+
+def _classify(classifier: Any, throttle: Throttle, row: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    """Classifica um email respeitando o limite de vazao; retorna None em falha do provedor."""
+    text = f"Assunto: {row['assunto']}\n\n{row['raw_body']}" if row["assunto"] else row["raw_body"]
+    for attempt in range(3):
+        throttle.wait()
+        try:
+            return classifier.classify_email(text)
+        except RateLimitExceededError as exc:
+            time.sleep(max(exc.retry_after or 1.0, 1.0) * (attempt + 1))
+        except ExternalServiceError as exc:
+            logger.warning("Falha ao reclassificar email %s: %s", row["id"], exc)
+            return None
+    return None
+
+
+def _reclassify_rows(
+    pool: ThreadPoolExecutor,
+    classifier: Any,
+    throttle: Throttle,
+    repository: EmailRepository,
+    rows: List[Dict[str, Any]],
+    state: Dict[str, Any],
+) -> List[int]:
+    """Classifica o lote em paralelo, grava as mudancas em bloco e retorna os ids que falharam."""
+    results = list(pool.map(lambda row: _classify(classifier, throttle, row), rows))
+    updates = []
+    failed_ids = []
+    for row, result in zip(rows, results):
+        if result is None:
+            failed_ids.append(row["id"])
+            RECLASSIFIED_EMAILS.labels("failed").inc()
+            continue
+        label = str(result.get("label"))
+        changed = label != row["classification"]
+        state["changed"] += int(changed)
+        RECLASSIFIED_EMAILS.labels("changed" if changed else "unchanged").inc()
+        updates.append(
+            {
+                "id": row["id"],
+                "classification": label,
+                "classification_score": result.get("score"),
+                "classifier_tier": result.get("tier"),
+                "updated_at": datetime.now(timezone.utc),
+            }
+        )
+    repository.bulk_update_classification(updates)
+    return failed_ids
+
+
+def reclassify(
+    engine: Engine,
+    classifier: Any,
+    checkpoint_path: Path,
+    batch_size: int = 200,
+    workers: int = 4,
+    rate_per_second: float = 5.0,
+    limit: Optional[int] = None,
+    include_corrected: bool = False,
+) -> Dict[str, Any]:
+    """Refaz as falhas do checkpoint e reclassifica os emails apos o ultimo id, gravando cada lote em bloco."""
+    state = load_checkpoint(checkpoint_path)
+    state.setdefault("failed_ids", [])
+    throttle = Throttle(rate_per_second)
+    processed_now = 0
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="reclassify") as pool:
+        pending, still_failing = list(state["failed_ids"]), []
+        while pending:
+            chunk, pending = pending[:batch_size], pending[batch_size:]
+            with Session(engine) as session:
+                repository = EmailRepository(session)
+                rows = repository.list_for_reclassification_by_ids(chunk, include_corrected)
+                still_failing += _reclassify_rows(pool, classifier, throttle, repository, rows, state)
+            state["failed_ids"] = still_failing + pending
+            state["failed"] = len(state["failed_ids"])
+            save_checkpoint(checkpoint_path, state)
+        while limit is None or processed_now < limit:
+            size = batch_size if limit is None else min(batch_size, limit - processed_now)
+            with Session(engine) as session:
+                repository = EmailRepository(session)
+                rows = repository.list_for_reclassification(state["last_id"], size, include_corrected)
+                if not rows:
+                    break
+                state["failed_ids"] += _reclassify_rows(pool, classifier, throttle, repository, rows, state)
+            state["failed"] = len(state["failed_ids"])
+            state["last_id"] = rows[-1]["id"]
+            state["processed"] += len(rows)
+            processed_now += len(rows)
+            save_checkpoint(checkpoint_path, state)
+            logger.info("Reclassificados: %s (ultimo id %s)", state["processed"], state["last_id"])
+    return state
+
+
+def main() -> None:
+    """Executa a reclassificacao conforme argumentos de linha de comando."""
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--batch-size", type=int, default=200)
+    parser.add_argument("--workers", type=int, default=4, help="Chamadas simultaneas ao classificador")
+    parser.add_argument("--rate", type=float, default=5.0, help="Classificacoes por segundo (0 = sem limite)")
+    parser.add_argument("--limit", type=int, help="Quantidade maxima de emails nesta execucao")
+    parser.add_argument("--checkpoint", default="reclassification.checkpoint.json")
+    parser.add_argument("--reset", action="store_true", help="Ignora o checkpoint e recomeca do inicio")
+    parser.add_argument("--include-corrected", action="store_true", help="Inclui emails corrigidos pelo usuario")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
+
+    checkpoint = Path(args.checkpoint)
+    if args.reset and checkpoint.exists():
+        checkpoint.unlink()
+    local = LocalClassifierClient() if get_settings().local_classifier_model else None
+    classifier = build_classifier_cascade(ClassifierClient(), local)
+    started = time.perf_counter()
+    state = reclassify(
+        get_engine(),
+        classifier,
+        checkpoint,
+        args.batch_size,
+        args.workers,
+        args.rate,
+        args.limit,
+        args.include_corrected,
+    )
+    elapsed = time.perf_counter() - started
+    print(
+        f"{state['processed']} emails reclassificados ({state['changed']} alterados, {state['failed']} com falha) "
+        f"em {elapsed:.1f}s"
+    )
+
+
+if __name__ == "__main__":
+    main()
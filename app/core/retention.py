@@ -0,0 +1,102 @@
+"""Job de retencao: move emails antigos para arquivos NDJSON gzip e remove do banco.
+
+Uso:
+    python -m app.core.retention --days 365
+"""
+import argparse
+import asyncio
+import fcntl
+import logging
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Dict, Optional
+
+from sqlalchemy.engine import Engine
+from sqlmodel import Session
+
+from app.core.config import get_settings
+from app.core.database import get_engine
+from app.core.metrics import counter
+from app.core.partitioning import drop_empty_partitions_before, ensure_future_partitions
+from app.repositories.archive_repository import EmailArchiveRepository
+from app.repositories.email_repository import EmailRepository
+
+logger = logging.getLogger(__name__)
+
+ARCHIVED_EMAILS = counter("emails_archived_total", "Emails movidos do banco para o arquivo.")
+
+
+def archive_older_than(
+    engine: Engine,
+    archive: EmailArchiveRepository,
+    cutoff: datetime,
+    batch_size: int = 1000,
+) -> int:
+    """Arquiva em lotes os emails criados antes do corte; grava o arquivo antes de apagar do banco."""
+    archived = 0
+    after_id = 0
+    while True:
+        with Session(engine) as session:
+            repository = EmailRepository(session)
+            rows = repository.list_archivable(cutoff, after_id, batch_size)
+            if not rows:
+                break
+            archive.append(rows)
+            repository.delete_by_ids([row["id"] for row in rows])
+        after_id = rows[-1]["id"]
+        archived += len(rows)
+        ARCHIVED_EMAILS.labels().inc(len(rows))
+    return archived
+
+
+def run_retention(engine: Optional[Engine] = None, days: Optional[int] = None) -> Dict[str, object]:
+    """Executa um ciclo de retencao com lock entre workers e retorna o resumo."""
+    settings = get_settings()
+    engine = engine or get_engine()
+    days = settings.retention_days if days is None else days
+    archive_dir = Path(settings.archive_dir)
+    archive_dir.mkdir(parents=True, exist_ok=True)
+    cutoff = datetime.utcnow() - timedelta(days=days)
+    with open(archive_dir / ".retention.lock", "w") as lock_file:
+        try:
+            fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            return {"skipped": True}
+        started = time.perf_counter()
+        ensure_future_partitions(engine)
+        archived = archive_older_than(
+            engine, EmailArchiveRepository(str(archive_dir)), cutoff, settings.retention_batch_size
+        )
+        dropped = drop_empty_partitions_before(engine, cutoff)
+    summary = {
+        "archived": archived,
+        "dropped_partitions": dropped,
+        "cutoff": cutoff.isoformat(),
+        "seconds": round(time.perf_counter() - started, 3),
+    }
+    logger.info("Retencao concluida: %s", summary)
+    return summary
+
+
+async def retention_loop(interval_seconds: float) -> None:
+    """Executa a retencao periodicamente fora do event loop ate ser cancelado."""
+    while True:
+        try:
+            await asyncio.to_thread(run_retention)
+        except Exception as exc:
+            logger.error("Falha no job de retencao: %s", exc, exc_info=True)
+        await asyncio.sleep(interval_seconds)
+
+
+def main() -> None:
+    """Executa um ciclo de retencao pela linha de comando."""
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--days", type=int, help="Idade minima (dias) para arquivar; padrao RETENTION_DAYS")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
+    print(run_retention(days=args.days))
+
+
+if __name__ == "__main__":
+    main()
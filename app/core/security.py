@@ -35,3 +35,9 @@ def create_access_token(data: Dict[str, Any], expires_delta: timedelta | None =
 def decode_token(token: str) -> Dict[str, Any]:
     """Decodifica e valida um token JWT retornando o payload."""
     return jwt.decode(token, settings.secret_key, algorithms=[settings.algorithm])
+
+
+def is_admin_email(email: str) -> bool:
+    """Verifica se o email pertence a lista de administradores configurada."""
+    admins = {item.strip().lower() for item in get_settings().admin_emails.split(",") if item.strip()}
+    return email.lower() in admins
@@ -1,7 +1,7 @@
 from app.core.config import get_settings
 from sqlmodel import Session
 
-from app.core.database import create_db_and_tables, engine
+from app.core.database import create_db_and_tables, get_engine
 from app.core.security import hash_password
 from app.models.user_model import User
 from app.repositories.user_repository import UserRepository
@@ -15,7 +15,7 @@ def seed_user() -> User:
     if not email or not password:
         raise ValueError("SEED_EMAIL e SEED_PASSWORD devem estar configurados no .env")
 
-    with Session(engine) as session:
+    with Session(get_engine()) as session:
         repository = UserRepository(session)
         existing = repository.get_by_email(email)
         if existing:
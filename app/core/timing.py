@@ -0,0 +1,137 @@
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+from urllib.parse import parse_qs
+
+from jose import JWTError
+from starlette.concurrency import run_in_threadpool
+
+from app.core.config import get_settings
+from app.core.profiler import SamplingProfiler
+from app.core.security import decode_token, is_admin_email
+
+
+WAIT_SUFFIX = "_wait"
+
+
+class RequestTimings:
+    """Acumula a duracao de spans nomeados ao longo de uma requisicao."""
+
+    def __init__(self) -> None:
+        """Inicializa o acumulador vazio."""
+        self._spans: Dict[str, float] = {}
+        self._lock = threading.Lock()
+
+    def add(self, name: str, duration: float) -> None:
+        """Soma a duracao ao span informado."""
+        with self._lock:
+            self._spans[name] = self._spans.get(name, 0.0) + duration
+
+    def items(self) -> List[Tuple[str, float]]:
+        """Retorna os spans na ordem em que foram registrados."""
+        with self._lock:
+            return list(self._spans.items())
+
+    def queued(self) -> float:
+        """Soma os spans de espera em fila (nomes terminados em _wait)."""
+        with self._lock:
+            return sum(duration for name, duration in self._spans.items() if name.endswith(WAIT_SUFFIX))
+
+
+_current_timings: ContextVar[Optional[RequestTimings]] = ContextVar("request_timings", default=None)
+
+
+@contextmanager
+def span(name: str) -> Iterator[None]:
+    """Mede um trecho da requisicao atual; sem requisicao ativa nao faz nada."""
+    timings = _current_timings.get()
+    if timings is None:
+        yield
+        return
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        timings.add(name, time.perf_counter() - started)
+
+
+def current_timings() -> Optional[RequestTimings]:
+    """Retorna o acumulador de spans da requisicao atual, se houver."""
+    return _current_timings.get()
+
+
+def record_span(name: str, duration: float) -> None:
+    """Registra uma duracao ja medida na requisicao atual."""
+    timings = _current_timings.get()
+    if timings is not None:
+        timings.add(name, duration)
+
+
+def format_server_timing(spans: List[Tuple[str, float]], total: float) -> str:
+    """Formata spans no padrao do header Server-Timing (duracoes em ms)."""
+    parts = [f"{name};dur={duration * 1000:.1f}" for name, duration in spans]
+    parts.append(f"total;dur={total * 1000:.1f}")
+    return ", ".join(parts)
+
+
+def _profile_requested(scope: Dict[str, Any]) -> bool:
+    """Indica se a requisicao pediu profiling e vem de um administrador."""
+    query = parse_qs(scope.get("query_string", b"").decode("latin-1"))
+    if query.get("profile", ["0"])[0] not in {"1", "true"}:
+        return False
+    for key, value in scope.get("headers", []):
+        if key == b"authorization":
+            scheme, _, token = value.decode("latin-1").partition(" ")
+            if scheme.lower() != "bearer" or not token:
+                return False
+            try:
+                payload = decode_token(token)
+            except JWTError:
+                return False
+            return is_admin_email(str(payload.get("sub") or ""))
+    return False
+
+
+class ServerTimingMiddleware:
+    """Middleware ASGI que expoe spans da requisicao no header Server-Timing."""
+
+    def __init__(self, app: Any) -> None:
+        """Envolve a aplicacao ASGI."""
+        self.app = app
+
+    async def __call__(self, scope: Dict[str, Any], receive: Any, send: Any) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        timings = RequestTimings()
+        token = _current_timings.set(timings)
+        started = time.perf_counter()
+        profiler: Optional[SamplingProfiler] = None
+        if _profile_requested(scope):
+            settings = get_settings()
+            profiler = SamplingProfiler(
+                interval=settings.profile_sample_interval_ms / 1000.0,
+                output_dir=settings.profile_dir,
+            )
+            profiler.start()
+
+        async def send_wrapper(message: Dict[str, Any]) -> None:
+            if message["type"] == "http.response.start":
+                headers = list(message.get("headers", []))
+                value = format_server_timing(timings.items(), time.perf_counter() - started)
+                headers.append((b"server-timing", value.encode("latin-1")))
+                if profiler is not None:
+                    report = await run_in_threadpool(profiler.stop, f"{scope['method']} {scope['path']}")
+                    headers.append((b"x-profile-report", report.encode("latin-1")))
+                message = {**message, "headers": headers}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            if profiler is not None:
+                # join da thread de amostragem e escrita do relatorio fora do event loop
+                await run_in_threadpool(profiler.stop, f"{scope['method']} {scope['path']}")
+            _current_timings.reset(token)
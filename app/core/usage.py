@@ -0,0 +1,183 @@
+import json
+import logging
+import threading
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass
+from datetime import datetime
+from functools import lru_cache
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from sqlalchemy.exc import SQLAlchemyError
+from sqlmodel import Session
+
+from app.core.config import get_settings
+from app.core.database import get_engine
+from app.core.metrics import counter, set_usage_sink
+from app.repositories.usage_repository import UsageRepository
+
+logger = logging.getLogger(__name__)
+
+USAGE_RECORDS = counter(
+    "provider_usage_records_total",
+    "Registros de uso de provedores por desfecho da gravacao.",
+    ("outcome",),
+)
+
+@dataclass
+class UsageScope:
+    """Usuario e email associados as chamadas de provedores; o email pode ser definido ate o fim do escopo."""
+
+    user_id: Optional[int] = None
+    email_id: Optional[int] = None
+    open: bool = True
+
+
+_usage_context: ContextVar[Optional[UsageScope]] = ContextVar("usage_context", default=None)
+
+
+@contextmanager
+def usage_scope(user_id: Optional[int], email_id: Optional[int] = None) -> Iterator[UsageScope]:
+    """Associa as chamadas de provedores feitas no bloco ao usuario e email informados."""
+    # Os registros so sao gravados apos o fim do escopo: o email criado dentro do bloco (ex.: apos a
+    # classificacao) pode ser informado em scope.email_id e vale para todas as chamadas do escopo.
+    scope = UsageScope(user_id, email_id)
+    token = _usage_context.set(scope)
+    try:
+        yield scope
+    finally:
+        scope.open = False
+        _usage_context.reset(token)
+
+
+def current_usage() -> Tuple[Optional[int], Optional[int]]:
+    """Retorna o usuario e o email do escopo de uso atual."""
+    scope = _usage_context.get()
+    return (scope.user_id, scope.email_id) if scope is not None else (None, None)
+
+
+def parse_prices(raw: str) -> Dict[str, Tuple[float, float]]:
+    """Le USAGE_PRICES ({"modelo": [entrada_por_1k, saida_por_1k]}) em um dicionario."""
+    if not raw:
+        return {}
+    return {model: (float(prices[0]), float(prices[1])) for model, prices in json.loads(raw).items()}
+
+
+class UsageWriter:
+    """Acumula registros de uso em memoria e grava em lotes numa thread de fundo."""
+
+    def __init__(
+        self,
+        batch_size: int = 200,
+        flush_interval: float = 2.0,
+        max_buffer: int = 10_000,
+        prices: Optional[Dict[str, Tuple[float, float]]] = None,
+    ) -> None:
+        """Inicializa o writer; a thread de gravacao inicia no primeiro registro."""
+        self._batch_size = batch_size
+        self._flush_interval = flush_interval
+        self._max_buffer = max_buffer
+        self._prices = prices or {}
+        self._buffer: List[Dict[str, Any]] = []
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stopped = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def record(
+        self,
+        provider: str,
+        model: Optional[str],
+        latency: float,
+        status: str,
+        input_tokens: Optional[int] = None,
+        output_tokens: Optional[int] = None,
+    ) -> None:
+        """Enfileira um registro de uso com o usuario/email do contexto atual; nunca bloqueia em I/O."""
+        cost = None
+        if model in self._prices and (input_tokens is not None or output_tokens is not None):
+            input_price, output_price = self._prices[model]
+            cost = ((input_tokens or 0) * input_price + (output_tokens or 0) * output_price) / 1000
+        row = {
+            "created_at": datetime.utcnow(),
+            "provider": provider,
+            "model": model,
+            "scope": _usage_context.get(),
+            "status": status,
+            "latency_ms": round(latency * 1000, 3),
+            "input_tokens": input_tokens,
+            "output_tokens": output_tokens,
+            "cost": cost,
+        }
+        with self._lock:
+            if len(self._buffer) >= self._max_buffer:
+                USAGE_RECORDS.labels("dropped").inc()
+                return
+            self._buffer.append(row)
+            full = len(self._buffer) >= self._batch_size
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._loop, name="usage-writer", daemon=True)
+                self._thread.start()
+        if full:
+            self._wake.set()
+
+    def flush(self, force: bool = False) -> int:
+        """Grava os registros de escopos ja encerrados (todos, se force) em uma transacao e retorna a quantidade."""
+        ready: List[Dict[str, Any]] = []
+        held: List[Dict[str, Any]] = []
+        with self._lock:
+            for row in self._buffer:
+                scope = row["scope"]
+                (held if scope is not None and scope.open and not force else ready).append(row)
+            self._buffer = held
+        if not ready:
+            return 0
+        rows = []
+        for row in ready:
+            scope = row.pop("scope") or UsageScope()
+            rows.append({**row, "user_id": scope.user_id, "email_id": scope.email_id})
+        try:
+            with Session(get_engine()) as session:
+                UsageRepository(session).insert_many(rows)
+        except SQLAlchemyError as exc:
+            USAGE_RECORDS.labels("failed").inc(len(rows))
+            logger.warning("Falha ao gravar %s registros de uso: %s", len(rows), exc)
+            return 0
+        USAGE_RECORDS.labels("written").inc(len(rows))
+        return len(rows)
+
+    def stop(self) -> None:
+        """Encerra a thread de gravacao apos gravar o que restou no buffer."""
+        self._stopped.set()
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join(5.0)
+            self._thread = None
+        self.flush(force=True)
+
+    def _loop(self) -> None:
+        """Grava o buffer a cada intervalo ou quando o lote enche."""
+        while not self._stopped.is_set():
+            self._wake.wait(self._flush_interval)
+            self._wake.clear()
+            self.flush()
+
+
+@lru_cache
+def get_usage_writer() -> UsageWriter:
+    """Retorna o writer de uso do processo."""
+    settings = get_settings()
+    return UsageWriter(
+        settings.usage_batch_size,
+        settings.usage_flush_seconds,
+        prices=parse_prices(settings.usage_prices),
+    )
+
+
+def install_usage_writer() -> Optional[UsageWriter]:
+    """Conecta o writer as medicoes de provedores quando USAGE_TRACKING_ENABLED."""
+    if not get_settings().usage_tracking_enabled:
+        return None
+    writer = get_usage_writer()
+    set_usage_sink(writer.record)
+    return writer
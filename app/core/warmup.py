@@ -0,0 +1,71 @@
+import logging
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Callable, Dict, List
+
+from sqlalchemy import text
+from sqlalchemy.engine import Engine
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class WarmupStep:
+    """Etapa de aquecimento; etapas obrigatorias com falha mantem o worker nao pronto."""
+
+    name: str
+    action: Callable[[], None]
+    required: bool = False
+
+
+@dataclass
+class WarmupState:
+    """Estado do aquecimento consultado pelo endpoint de readiness."""
+
+    ready: bool = False
+    finished: bool = False
+    steps: Dict[str, Dict[str, object]] = field(default_factory=dict)
+    _lock: threading.Lock = field(default_factory=threading.Lock, repr=False)
+
+    def record(self, name: str, status: str, duration: float, detail: str = "") -> None:
+        """Registra o resultado de uma etapa."""
+        with self._lock:
+            self.steps[name] = {"status": status, "duration_ms": round(duration * 1000, 1), "detail": detail}
+
+    def snapshot(self) -> Dict[str, object]:
+        """Retorna o estado atual para exposicao."""
+        with self._lock:
+            return {"ready": self.ready, "finished": self.finished, "steps": dict(self.steps)}
+
+
+def prefill_pool(engine: Engine, connections: int) -> None:
+    """Abre conexoes simultaneas para popular o pool e as devolve em seguida."""
+    opened = []
+    try:
+        for _ in range(max(connections, 1)):
+            connection = engine.connect()
+            connection.execute(text("SELECT 1"))
+            opened.append(connection)
+    finally:
+        for connection in opened:
+            connection.close()
+
+
+def run_warmup(state: WarmupState, steps: List[WarmupStep]) -> None:
+    """Executa as etapas em sequencia e marca o worker como pronto ao final."""
+    all_required_ok = True
+    for step in steps:
+        started = time.perf_counter()
+        try:
+            step.action()
+        except Exception as exc:
+            state.record(step.name, "error", time.perf_counter() - started, str(exc))
+            logger.warning("Falha no aquecimento (%s): %s", step.name, exc, exc_info=True)
+            if step.required:
+                all_required_ok = False
+            continue
+        state.record(step.name, "ok", time.perf_counter() - started)
+    state.ready = all_required_ok
+    state.finished = True
+    logger.info("Aquecimento concluido: pronto=%s etapas=%s", state.ready, state.snapshot()["steps"])
@@ -1,16 +1,40 @@
+import asyncio
+import logging
+import time
 from contextlib import asynccontextmanager
+from typing import List
 
 from fastapi import FastAPI
+from fastapi.middleware.gzip import GZipMiddleware
 from fastapi.staticfiles import StaticFiles
 
+from app.api.v1.admin_router import router as admin_router
 from app.api.v1.auth_router import router as auth_router
 from app.api.v1.email_router import router as email_router
 from app.api.v1.health_router import router as health_router
+from app.api.v1.metrics_router import router as metrics_router
+from app.core.cache import build_result_cache
+from app.core.concurrency import AdaptiveConcurrencyMiddleware
 from app.core.config import get_settings
-from app.core.database import create_db_and_tables
+from app.core.database import create_db_and_tables, dispose_engine, get_engine
+from app.core.metrics import MetricsMiddleware, set_usage_sink
+from app.core.partitioning import partition_maintenance_loop
+from app.core.retention import retention_loop
 from app.core.seed_user import seed_user
+from app.core.timing import ServerTimingMiddleware
+from app.core.usage import install_usage_writer
+from app.core.warmup import WarmupState, WarmupStep, prefill_pool, run_warmup
+from app.nlp.classifier_cascade import build_classifier_cascade
+from app.nlp.classifier_client import ClassifierClient
+from app.nlp.knn_classifier import build_knn_index_store
+from app.nlp.llm_client import LlmClient
+from app.nlp.local_classifier import LocalClassifierClient
+from app.services.pregeneration_service import PregenerationWorker
+from app.web.web_router import prime_templates
 from app.web.web_router import router as web_router
 
+logger = logging.getLogger(__name__)
+
 
 def create_app() -> FastAPI:
     """Cria e configura a instancia principal do FastAPI."""
@@ -18,21 +42,87 @@ def create_app() -> FastAPI:
 
     @asynccontextmanager
     async def lifespan(app: FastAPI):
-        """Inicializa recursos essenciais da aplicacao."""
+        """Inicializa recursos compartilhados (engine e clientes de IA) durante a vida da aplicacao."""
+        started = time.perf_counter()
+        app.state.engine = get_engine()
+        app.state.classifier_client = ClassifierClient()
+        app.state.llm_client = LlmClient()
+        app.state.local_classifier = LocalClassifierClient() if settings.local_classifier_model else None
+        app.state.classifier = build_classifier_cascade(app.state.classifier_client, app.state.local_classifier)
+        app.state.usage_writer = install_usage_writer()
+        app.state.result_cache = build_result_cache()
+        app.state.knn_index = build_knn_index_store()
+        app.state.warmup = WarmupState()
+        app.state.pregenerator = None
+        if settings.pregeneration_enabled:
+            app.state.pregenerator = PregenerationWorker(
+                app.state.llm_client,
+                app.state.result_cache,
+                settings.pregeneration_queue_size,
+                settings.pregeneration_workers,
+                settings.pregeneration_budget_per_hour,
+            )
+            app.state.pregenerator.start()
         if settings.environment == "development":
             create_db_and_tables()
             if settings.seed_enabled:
                 seed_user()
+        logger.info("Inicializacao concluida em %.1f ms", (time.perf_counter() - started) * 1000)
+        warmup_task = None
+        if settings.warmup_enabled:
+            warmup_task = asyncio.create_task(
+                asyncio.to_thread(run_warmup, app.state.warmup, build_warmup_steps(app))
+            )
+        else:
+            app.state.warmup.ready = True
+            app.state.warmup.finished = True
+        partition_task = asyncio.create_task(partition_maintenance_loop(settings.partitioning_interval_seconds))
+        retention_task = None
+        if settings.retention_enabled:
+            retention_task = asyncio.create_task(retention_loop(settings.retention_interval_seconds))
         yield
+        for task in (warmup_task, partition_task, retention_task):
+            if task is not None and not task.done():
+                task.cancel()
+        if app.state.pregenerator is not None:
+            app.state.pregenerator.stop()
+        if app.state.knn_index is not None:
+            app.state.knn_index.close()
+        if app.state.usage_writer is not None:
+            set_usage_sink(None)
+            app.state.usage_writer.stop()
+        dispose_engine()
 
     app = FastAPI(title="Email AI Classifier", lifespan=lifespan)
+    app.add_middleware(GZipMiddleware, minimum_size=1024)
+    app.add_middleware(AdaptiveConcurrencyMiddleware)
+    # Por fora do limite adaptativo: ele desconta as esperas em fila registradas nos spans da requisicao.
+    app.add_middleware(ServerTimingMiddleware)
+    app.add_middleware(MetricsMiddleware)
     app.mount("/static", StaticFiles(directory="app/web/static"), name="static")
     app.include_router(web_router)
     app.include_router(auth_router)
     app.include_router(email_router)
     app.include_router(health_router)
+    app.include_router(admin_router)
+    app.include_router(metrics_router)
 
     return app
 
 
+def build_warmup_steps(app: FastAPI) -> List[WarmupStep]:
+    """Define as etapas de aquecimento executadas apos o startup."""
+    settings = get_settings()
+    steps = [
+        WarmupStep("db_pool", lambda: prefill_pool(app.state.engine, settings.warmup_db_connections), required=True),
+        WarmupStep("templates", prime_templates),
+        WarmupStep("result_cache", lambda: app.state.result_cache.warm_up(settings.warmup_cache_entries)),
+        WarmupStep("classifier_connection", app.state.classifier_client.warm_up),
+        WarmupStep("llm_connections", app.state.llm_client.warm_up),
+    ]
+    if app.state.local_classifier is not None:
+        steps.append(WarmupStep("local_model", app.state.local_classifier.warm_up, required=True))
+    return steps
+
+
 app = create_app()
@@ -0,0 +1,13 @@
+from datetime import datetime
+
+from sqlmodel import Field, SQLModel
+
+
+class CacheEntry(SQLModel, table=True):
+    """Entrada do cache compartilhado entre nos, persistida no banco."""
+
+    __tablename__ = "cache_entries"
+
+    key: str = Field(primary_key=True, max_length=255)
+    value: str = Field(nullable=False)
+    expires_at: datetime = Field(nullable=False, index=True)
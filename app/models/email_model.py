@@ -1,8 +1,11 @@
 from datetime import datetime, timezone
 from typing import Optional
 
+from sqlalchemy import Column
 from sqlmodel import Field, SQLModel
 
+from app.core.compression import CompressedText
+
 
 class Email(SQLModel, table=True):
     """Representa um email processado e armazenado na base de dados."""
@@ -13,9 +16,13 @@ class Email(SQLModel, table=True):
     user_id: int = Field(foreign_key="users.id", nullable=False)
     email_destinatario: str = Field(nullable=False, max_length=255)
     assunto: Optional[str] = Field(default=None, max_length=255)
-    raw_body: str = Field(nullable=False)
+    raw_body: str = Field(sa_column=Column(CompressedText, nullable=False))
+    body_size: Optional[int] = Field(default=None)
+    normalized_hash: Optional[str] = Field(default=None, max_length=64, index=True)
     classification: str = Field(nullable=False, max_length=50)
-    generated_response: Optional[str] = Field(default=None, nullable=True)
+    classification_score: Optional[float] = Field(default=None)
+    classifier_tier: Optional[str] = Field(default=None, max_length=20)
+    generated_response: Optional[str] = Field(default=None, sa_column=Column(CompressedText, nullable=True))
     respondido: bool = Field(default=False)
     respondido_em: Optional[datetime] = Field(default=None)
     created_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc), nullable=False)
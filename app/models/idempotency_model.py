@@ -0,0 +1,23 @@
+from datetime import datetime
+from typing import Optional
+
+from sqlalchemy import UniqueConstraint
+from sqlmodel import Field, SQLModel
+
+
+class IdempotencyKey(SQLModel, table=True):
+    """Registra a execucao de uma requisicao identificada por Idempotency-Key."""
+
+    __tablename__ = "idempotency_keys"
+    __table_args__ = (UniqueConstraint("user_id", "key", name="uq_idempotency_user_key"),)
+
+    id: Optional[int] = Field(default=None, primary_key=True)
+    user_id: int = Field(nullable=False)
+    key: str = Field(nullable=False, max_length=255)
+    endpoint: str = Field(nullable=False, max_length=100)
+    fingerprint: str = Field(nullable=False, max_length=64)
+    status: str = Field(default="in_progress", max_length=20)
+    status_code: Optional[int] = Field(default=None)
+    response_body: Optional[str] = Field(default=None)
+    created_at: datetime = Field(default_factory=datetime.utcnow, nullable=False)
+    expires_at: datetime = Field(nullable=False, index=True)
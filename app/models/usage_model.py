@@ -0,0 +1,22 @@
+from datetime import datetime
+from typing import Optional
+
+from sqlmodel import Field, SQLModel
+
+
+class ProviderUsage(SQLModel, table=True):
+    """Registra uma chamada a um provedor de IA com latencia, tokens e custo."""
+
+    __tablename__ = "provider_usage"
+
+    id: Optional[int] = Field(default=None, primary_key=True)
+    created_at: datetime = Field(default_factory=datetime.utcnow, nullable=False, index=True)
+    provider: str = Field(nullable=False, max_length=30)
+    model: Optional[str] = Field(default=None, max_length=150)
+    user_id: Optional[int] = Field(default=None, index=True)
+    email_id: Optional[int] = Field(default=None)
+    status: str = Field(nullable=False, max_length=30)
+    latency_ms: float = Field(nullable=False)
+    input_tokens: Optional[int] = Field(default=None)
+    output_tokens: Optional[int] = Field(default=None)
+    cost: Optional[float] = Field(default=None)
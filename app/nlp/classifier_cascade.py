@@ -0,0 +1,167 @@
+import logging
+import re
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Tuple
+
+from app.core.config import get_settings
+from app.core.metrics import counter
+from app.core.timing import span
+from app.nlp.exceptions import ConfigurationError, ExternalServiceError
+from app.nlp.text_normalizer import get_text_normalizer
+
+logger = logging.getLogger(__name__)
+
+CLASSIFIER_TIER_DECISIONS = counter(
+    "classifier_tier_decisions_total",
+    "Classificacoes decididas por nivel da cascata.",
+    ("tier",),
+)
+CLASSIFIER_TIER_CALLS = counter(
+    "classifier_tier_calls_total",
+    "Chamadas a cada nivel da cascata de classificacao.",
+    ("tier", "outcome"),
+)
+
+RULE_KEYWORDS: Dict[str, Tuple[str, ...]] = {
+    "Propaganda": (
+        "propaganda",
+        "promocao",
+        "promoção",
+        "oferta",
+        "desconto",
+        "cupom",
+        "newsletter",
+        "descadastrar",
+        "descadastre",
+        "descadastramento",
+        "cancelar inscricao",
+        "cancelar inscrição",
+        "unsubscribe",
+        "frete gratis",
+        "frete grátis",
+    ),
+    "Produtivo": (
+        "urgente",
+        "prioridade",
+        "prazo",
+        "solicito",
+        "preciso",
+        "aguardo retorno",
+        "chamado",
+        "protocolo",
+        "fatura",
+        "boleto",
+        "nota fiscal",
+        "contrato",
+        "suporte",
+        "erro no sistema",
+    ),
+    "Improdutivo": (
+        "feliz natal",
+        "feliz ano novo",
+        "boas festas",
+        "feliz aniversario",
+        "feliz aniversário",
+        "parabens",
+        "parabéns",
+        "bom fim de semana",
+        "otimo fim de semana",
+        "ótimo fim de semana",
+    ),
+}
+
+
+class RuleClassifier:
+    """Classificador por palavras-chave, sem custo de inferencia."""
+
+    def __init__(self, keywords: Optional[Dict[str, Tuple[str, ...]]] = None) -> None:
+        """Compila um padrao por rotulo que so casa as palavras-chave como palavras inteiras."""
+        keywords = keywords or RULE_KEYWORDS
+        self._patterns = {
+            label: re.compile(r"\b(?:" + "|".join(re.escape(term) for term in terms) + r")\b")
+            for label, terms in keywords.items()
+        }
+        self._normalizer = get_text_normalizer()
+
+    def classify_email(self, text: str) -> Dict[str, float | str]:
+        """Retorna o rotulo com mais ocorrencias e um score proporcional a vantagem sobre os demais."""
+        normalized = self._normalizer.normalize(text).text.lower()
+        hits = {label: len(pattern.findall(normalized)) for label, pattern in self._patterns.items()}
+        ranked = sorted(hits.items(), key=lambda item: item[1], reverse=True)
+        label, best = ranked[0]
+        if best == 0:
+            return {"label": label, "score": 0.0}
+        runner_up = ranked[1][1] if len(ranked) > 1 else 0
+        margin = (best - runner_up) / best
+        score = min(0.6 + 0.15 * best, 0.99) * margin
+        return {"label": label, "score": round(score, 4)}
+
+
+@dataclass
+class CascadeTier:
+    """Nivel da cascata: classificador e score minimo para aceitar sua decisao."""
+
+    name: str
+    classifier: Any
+    threshold: float = 0.0
+
+
+class ClassifierCascade:
+    """Executa classificadores do mais barato ao mais caro ate um deles atingir o limiar."""
+
+    def __init__(self, tiers: List[CascadeTier]) -> None:
+        """Inicializa a cascata com os niveis em ordem de custo."""
+        if not tiers:
+            raise ConfigurationError("Cascata de classificacao sem niveis")
+        self._tiers = tiers
+
+    @property
+    def tiers(self) -> List[CascadeTier]:
+        """Niveis configurados em ordem de execucao."""
+        return list(self._tiers)
+
+    def classify_email(self, text: str) -> Dict[str, float | str]:
+        """Classifica o texto, retornando label, score e o nivel que decidiu."""
+        best: Optional[Dict[str, Any]] = None
+        last_index = len(self._tiers) - 1
+        for index, tier in enumerate(self._tiers):
+            try:
+                with span(f"classify_{tier.name}"):
+                    result = tier.classifier.classify_email(text)
+            except (ConfigurationError, ExternalServiceError) as exc:
+                CLASSIFIER_TIER_CALLS.labels(tier.name, "error").inc()
+                if index == last_index and best is None:
+                    raise
+                logger.warning("Nivel %s da cascata indisponivel: %s", tier.name, exc)
+                continue
+            score = float(result.get("score", 0.0)) if isinstance(result, dict) else 0.0
+            label = str(result.get("label")) if isinstance(result, dict) else str(result)
+            candidate = {"label": label, "score": score, "tier": tier.name}
+            if score >= tier.threshold or index == last_index:
+                CLASSIFIER_TIER_CALLS.labels(tier.name, "accepted").inc()
+                CLASSIFIER_TIER_DECISIONS.labels(tier.name).inc()
+                return candidate
+            CLASSIFIER_TIER_CALLS.labels(tier.name, "escalated").inc()
+            if best is None or score > best["score"]:
+                best = candidate
+        # Todos os niveis seguintes falharam: usa a melhor decisao abaixo do limiar.
+        CLASSIFIER_TIER_DECISIONS.labels(best["tier"]).inc()
+        return best
+
+
+def build_classifier_cascade(remote: Any, local: Any = None) -> ClassifierCascade:
+    """Monta a cascata conforme CLASSIFIER_CASCADE (ex.: rules,local,remote), ignorando niveis indisponiveis."""
+    settings = get_settings()
+    available = {
+        "rules": (RuleClassifier(), settings.classifier_rules_threshold),
+        "local": (local, settings.classifier_local_threshold),
+        "remote": (remote, 0.0),
+    }
+    tiers = []
+    for name in [item.strip() for item in settings.classifier_cascade.split(",") if item.strip()]:
+        if name not in available:
+            raise ValueError(f"Nivel de cascata desconhecido: {name}")
+        classifier, threshold = available[name]
+        if classifier is not None:
+            tiers.append(CascadeTier(name, classifier, threshold))
+    return ClassifierCascade(tiers)
@@ -1,10 +1,29 @@
 import logging
-from typing import Dict, List
+from typing import Any, Dict, List
 
 import requests
 
 from app.core.config import get_settings
+from app.core.metrics import histogram, provider_call
+from app.core.timing import span
 from app.nlp.exceptions import ConfigurationError, ExternalServiceError
+from app.nlp.fair_scheduler import fair_slot
+from app.nlp.rate_limiter import get_rate_limiter
+from app.nlp.text_normalizer import get_text_normalizer
+from app.nlp.windowing import aggregate_scores, split_windows
+
+CLASSIFIER_WINDOWS = histogram(
+    "classifier_windows",
+    "Janelas por inferencia de classificacao.",
+    buckets=(1, 2, 4, 8, 16),
+)
+
+CANDIDATE_LABELS = (
+    "Produtivo (trabalho, suporte, financeiro, operacoes)",
+    "Improdutivo (pessoal, irrelevante, sem acao)",
+    "Propaganda (marketing, oferta, promocao, spam)",
+)
+HYPOTHESIS_TEMPLATE = "Este email trata principalmente de {}."
 
 
 class ClassifierClient:
@@ -17,45 +36,89 @@ class ClassifierClient:
         self._model = settings.huggingface_model
         base = settings.huggingface_endpoint_base.rstrip("/")
         self._endpoint = f"{base}/{self._model}"
-        self._labels: List[str] = [
-            "Produtivo (trabalho, suporte, financeiro, operacoes)",
-            "Improdutivo (pessoal, irrelevante, sem acao)",
-            "Propaganda (marketing, oferta, promocao, spam)",
-        ]
+        self._labels: List[str] = list(CANDIDATE_LABELS)
         self._label_aliases = {
             "Produtivo": "Produtivo",
             "Improdutivo": "Improdutivo",
             "Propaganda": "Propaganda",
         }
-        self._hypothesis_template = "Este email trata principalmente de {}."
+        self._hypothesis_template = HYPOTHESIS_TEMPLATE
         self._logger = logging.getLogger(__name__)
+        self._rate_limiter = get_rate_limiter("Hugging Face Inference API", self._api_key)
+        self._http = requests.Session()
+        self._normalizer = get_text_normalizer()
+        self._window_tokens = settings.classifier_window_tokens
+        self._window_overlap = settings.classifier_window_overlap
+        self._max_windows = settings.classifier_max_windows
+        self._aggregation = settings.classifier_window_aggregation
+        self._first_n = settings.classifier_window_first_n
 
     def classify_email(self, text: str) -> Dict[str, float | str]:
         """Classifica um texto retornando label e score."""
-        if not self._api_key:
-            raise ConfigurationError("HUGGINGFACE_API_KEY nao configurada")
-        normalized_text = self._strip_signature(text)
+        self._ensure_configured()
+        with span("normalize"):
+            normalized_text = self._normalizer.normalize(text).text
         if "propaganda" in normalized_text.lower():
             return {"label": "Propaganda", "score": 1.0}
         guideline = (
             "Regra: se o email contiver palavras como urgente,prioridade, urgentissimo ou solicito,preciso, envie uma equipe, tiver algum prazo para resposta, aguardo retorno"
             "considere como Produtivo.\n\n"
         )
-        normalized_text = f"{guideline}{normalized_text}"
+        windows = split_windows(
+            normalized_text,
+            self._window_tokens,
+            self._window_overlap,
+            min(self._max_windows, self._first_n) if self._aggregation == "first_n" else self._max_windows,
+            first_only=self._aggregation == "first_n",
+        )
+        CLASSIFIER_WINDOWS.labels().observe(len(windows))
+        if len(windows) == 1:
+            data = self._infer(f"{guideline}{windows[0]}")
+        else:
+            results = self._infer_batch([f"{guideline}{window}" for window in windows])
+            data = aggregate_scores(results, self._aggregation, self._first_n)
+        label = data["labels"][0]
+        normalized = self._normalize_label(label)
+        score = float(data["scores"][0])
+        self._log_scores(data)
+        return {"label": normalized, "score": score}
+
+    def _ensure_configured(self) -> None:
+        """Valida a configuracao necessaria para a inferencia."""
+        if not self._api_key:
+            raise ConfigurationError("HUGGINGFACE_API_KEY nao configurada")
+
+    def _infer(self, text: str) -> Dict[str, object]:
+        """Executa a classificacao zero-shot remota e retorna labels/scores ordenados."""
+        with fair_slot("classifier"):
+            return self._request(text)
+
+    def _infer_batch(self, texts: List[str]) -> List[Dict[str, object]]:
+        """Classifica varias janelas numa unica requisicao, retornando um resultado por janela."""
+        with fair_slot("classifier", len(texts)):
+            data = self._request(texts)
+        return data if isinstance(data, list) else [data]
+
+    def _request(self, inputs: Any) -> Any:
+        """Envia um texto ou lista de textos ao endpoint zero-shot e retorna o JSON da resposta."""
         headers = {"Authorization": f"Bearer {self._api_key}"}
         payload = {
-            "inputs": normalized_text,
+            "inputs": inputs,
             "parameters": {
                 "candidate_labels": self._labels,
                 "hypothesis_template": self._hypothesis_template,
             },
         }
+        self._rate_limiter.acquire(self._endpoint)
         try:
-            response = requests.post(self._endpoint, headers=headers, json=payload, timeout=30)
+            with provider_call("huggingface", self._model) as call:
+                response = self._http.post(self._endpoint, headers=headers, json=payload, timeout=30)
+                call.status = str(response.status_code)
+            self._rate_limiter.observe(response.headers, response.status_code)
             response.raise_for_status()
         except requests.HTTPError as exc:
-            status_code = exc.response.status_code if exc.response else None
-            detail = exc.response.text if exc.response else str(exc)
+            status_code = exc.response.status_code if exc.response is not None else None
+            detail = exc.response.text if exc.response is not None else str(exc)
             raise ExternalServiceError(
                 service="Hugging Face Inference API",
                 detail=f"Resposta {status_code}: {detail}",
@@ -76,11 +139,16 @@ class ClassifierClient:
                 status_code=response.status_code,
                 endpoint=self._endpoint,
             )
-        label = data["labels"][0]
-        normalized = self._normalize_label(label)
-        score = float(data["scores"][0])
-        self._log_scores(data)
-        return {"label": normalized, "score": score}
+        return data
+
+    def warm_up(self) -> None:
+        """Abre a conexao TLS com o provedor para reaproveita-la nas chamadas seguintes."""
+        if not self._api_key:
+            return
+        try:
+            self._http.head(self._endpoint, timeout=5)
+        except requests.RequestException as exc:
+            self._logger.warning("Falha ao aquecer conexao com %s: %s", self._endpoint, exc)
 
     def _normalize_label(self, label: str) -> str:
         """Normaliza o rotulo retornado pela API para um nome canonico."""
@@ -89,25 +157,6 @@ class ClassifierClient:
         prefix = label.split("(", 1)[0].strip()
         return self._label_aliases.get(prefix, prefix)
 
-    def _strip_signature(self, text: str) -> str:
-        """Remove assinaturas/rodapes comuns para reduzir ruido."""
-        if not isinstance(text, str):
-            return str(text)
-        markers = [
-            "\nAtenciosamente",
-            "\nAtt",
-            "\nAbraços",
-            "\nObrigado",
-            "\nObrigada",
-            "\nCordialmente",
-        ]
-        lowered = text.lower()
-        for marker in markers:
-            idx = lowered.find(marker.lower())
-            if idx != -1:
-                return text[:idx].strip()
-        return text.strip()
-
     def _log_scores(self, data: Dict[str, object]) -> None:
         """Loga scores e labels retornados pelo modelo para diagnostico."""
         if not isinstance(data, dict):
@@ -18,3 +18,16 @@ class ExternalServiceError(RuntimeError):
         self.endpoint = endpoint
         super().__init__(detail)
 
+
+class RateLimitExceededError(ExternalServiceError):
+    """Erro quando a fila local de rate limit do provedor esta cheia ou expirou."""
+
+    def __init__(
+        self,
+        service: str,
+        detail: str,
+        retry_after: float | None = None,
+        endpoint: str | None = None,
+    ) -> None:
+        self.retry_after = retry_after
+        super().__init__(service=service, detail=detail, status_code=429, endpoint=endpoint)
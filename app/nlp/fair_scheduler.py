@@ -0,0 +1,287 @@
+import json
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Deque, Dict, Iterator, List, Optional, Tuple, Union
+
+from app.core.config import get_settings
+from app.core.metrics import REGISTRY, counter, histogram
+from app.core.timing import record_span
+from app.core.usage import current_usage
+from app.nlp.exceptions import RateLimitExceededError
+
+QUOTA_WINDOW_SECONDS = 3600.0
+QUANTUM = 1.0
+# Fila propria do trabalho em segundo plano (pre-geracao): peso menor, sem cota e sem ocupar as vagas do usuario.
+BACKGROUND = "background"
+
+UserKey = Union[int, str, None]
+
+_background: ContextVar[bool] = ContextVar("fair_scheduler_background", default=False)
+
+FAIR_SCHEDULER_WAIT = histogram(
+    "fair_scheduler_wait_seconds",
+    "Tempo de espera por uma vaga no escalonador justo.",
+    ("pool",),
+    buckets=(0.01, 0.05, 0.1, 0.5, 1, 2, 5, 10, 30),
+)
+FAIR_SCHEDULER_REJECTED = counter(
+    "fair_scheduler_rejected_total",
+    "Chamadas recusadas pelo escalonador justo por motivo.",
+    ("pool", "reason"),
+)
+
+
+class _Ticket:
+    """Pedido de vaga de um usuario na fila."""
+
+    __slots__ = ("cost", "granted")
+
+    def __init__(self, cost: float) -> None:
+        """Inicializa o pedido com o custo informado."""
+        self.cost = cost
+        self.granted = False
+
+
+class _UserState:
+    """Fila, vagas em uso, deficit e consumo recente de um usuario."""
+
+    def __init__(self, weight: float) -> None:
+        """Inicializa o estado vazio com o peso do usuario."""
+        self.weight = weight
+        self.waiting: Deque[_Ticket] = deque()
+        self.in_flight = 0
+        self.deficit = 0.0
+        self.topped_up = False
+        self.spent: Deque[Tuple[float, float]] = deque()
+
+
+class FairScheduler:
+    """Reparte as vagas de um provedor entre usuarios por deficit round-robin, com limite por usuario e cota."""
+
+    def __init__(
+        self,
+        name: str,
+        slots: int,
+        user_concurrency: int,
+        max_queue_per_user: int,
+        max_wait_seconds: float,
+        quota_per_hour: float = 0,
+        weights: Optional[Dict[str, float]] = None,
+        enabled: bool = True,
+        background_weight: float = 0.25,
+    ) -> None:
+        """Inicializa o escalonador com as vagas totais e os limites por usuario."""
+        self.name = name
+        self._free = slots
+        self._user_concurrency = user_concurrency
+        self._max_queue_per_user = max_queue_per_user
+        self._max_wait_seconds = max_wait_seconds
+        self._quota_per_hour = quota_per_hour
+        self._weights = weights or {}
+        self._enabled = enabled
+        self._background_weight = background_weight
+        self._users: Dict[UserKey, _UserState] = {}
+        self._active: Deque[UserKey] = deque()
+        self._condition = threading.Condition()
+
+    @property
+    def queue_depth(self) -> int:
+        """Quantidade de chamadas aguardando vaga."""
+        with self._condition:
+            return sum(len(state.waiting) for state in self._users.values())
+
+    @contextmanager
+    def slot(self, user_id: UserKey, cost: float = 1.0) -> Iterator[None]:
+        """Ocupa uma vaga do usuario durante o bloco."""
+        self.acquire(user_id, cost)
+        try:
+            yield
+        finally:
+            self.release(user_id)
+
+    def acquire(self, user_id: UserKey, cost: float = 1.0) -> None:
+        """Bloqueia ate a vez do usuario ou falha com fila cheia, cota esgotada ou espera excedida."""
+        if not self._enabled:
+            return
+        started = time.monotonic()
+        with self._condition:
+            state = self._state(user_id)
+            self._check_quota(state, user_id, cost, started)
+            if len(state.waiting) >= self._max_queue_per_user:
+                FAIR_SCHEDULER_REJECTED.labels(self.name, "queue_full").inc()
+                raise RateLimitExceededError(
+                    service=self.name,
+                    detail=f"Fila do usuario cheia ({len(state.waiting)} chamadas aguardando)",
+                )
+            ticket = _Ticket(cost)
+            state.waiting.append(ticket)
+            if user_id not in self._active:
+                self._active.append(user_id)
+            self._dispatch()
+            deadline = started + self._max_wait_seconds
+            try:
+                while not ticket.granted:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        state.waiting.remove(ticket)
+                        self._deactivate_if_idle(user_id, state)
+                        FAIR_SCHEDULER_REJECTED.labels(self.name, "timeout").inc()
+                        raise RateLimitExceededError(
+                            service=self.name,
+                            detail=f"Tempo maximo de espera na fila justa excedido ({self._max_wait_seconds}s)",
+                            retry_after=1.0,
+                        )
+                    self._condition.wait(remaining)
+            finally:
+                record_span("fair_scheduler_wait", time.monotonic() - started)
+            state.spent.append((time.monotonic(), cost))
+        FAIR_SCHEDULER_WAIT.labels(self.name).observe(time.monotonic() - started)
+
+    def release(self, user_id: UserKey) -> None:
+        """Devolve a vaga do usuario e passa a vez para o proximo da fila."""
+        if not self._enabled:
+            return
+        with self._condition:
+            state = self._users[user_id]
+            state.in_flight -= 1
+            self._free += 1
+            self._dispatch()
+            if not state.waiting and state.in_flight == 0 and (not self._quota_per_hour or user_id == BACKGROUND):
+                self._users.pop(user_id, None)
+            self._condition.notify_all()
+
+    def _state(self, user_id: UserKey) -> _UserState:
+        """Retorna (ou cria) o estado do usuario."""
+        state = self._users.get(user_id)
+        if state is None:
+            if user_id == BACKGROUND:
+                weight = self._background_weight
+            else:
+                weight = float(self._weights.get(str(user_id), 1.0))
+            state = self._users[user_id] = _UserState(max(weight, 0.01))
+        return state
+
+    def _check_quota(self, state: _UserState, user_id: UserKey, cost: float, now: float) -> None:
+        """Falha se o custo consumido na ultima hora mais o pedido ultrapassar a cota do usuario."""
+        if not self._quota_per_hour or user_id == BACKGROUND:
+            return
+        while state.spent and now - state.spent[0][0] > QUOTA_WINDOW_SECONDS:
+            state.spent.popleft()
+        used = sum(item[1] for item in state.spent) + sum(ticket.cost for ticket in state.waiting)
+        if used + cost > self._quota_per_hour:
+            FAIR_SCHEDULER_REJECTED.labels(self.name, "quota").inc()
+            retry_after = QUOTA_WINDOW_SECONDS - (now - state.spent[0][0]) if state.spent else 1.0
+            raise RateLimitExceededError(
+                service=self.name,
+                detail=f"Cota horaria do usuario {user_id} esgotada ({self._quota_per_hour:g})",
+                retry_after=retry_after,
+            )
+
+    def _dispatch(self) -> None:
+        """Concede vagas livres por deficit round-robin entre os usuarios com fila (chamar com o lock)."""
+        granted = False
+        while self._free > 0 and self._active:
+            if all(self._users[key].in_flight >= self._user_concurrency for key in self._active):
+                break
+            key = self._active[0]
+            state = self._users[key]
+            ticket = state.waiting[0]
+            if state.in_flight >= self._user_concurrency:
+                state.topped_up = False
+                self._active.rotate(-1)
+                continue
+            if state.deficit < ticket.cost:
+                if state.topped_up:
+                    state.topped_up = False
+                    self._active.rotate(-1)
+                else:
+                    state.deficit += QUANTUM * state.weight
+                    state.topped_up = True
+                continue
+            state.deficit -= ticket.cost
+            state.waiting.popleft()
+            state.in_flight += 1
+            self._free -= 1
+            ticket.granted = granted = True
+            if not state.waiting:
+                state.deficit = 0.0
+                state.topped_up = False
+                self._active.popleft()
+        if granted:
+            self._condition.notify_all()
+
+    def _deactivate_if_idle(self, user_id: UserKey, state: _UserState) -> None:
+        """Retira da rodada o usuario sem chamadas aguardando."""
+        if not state.waiting and user_id in self._active:
+            self._active.remove(user_id)
+            state.deficit = 0.0
+            state.topped_up = False
+
+
+_schedulers: Dict[str, FairScheduler] = {}
+_schedulers_lock = threading.Lock()
+
+
+def get_fair_scheduler(pool: str) -> FairScheduler:
+    """Retorna o escalonador compartilhado do processo para o grupo de chamadas (classifier ou llm)."""
+    scheduler = _schedulers.get(pool)
+    if scheduler is not None:
+        return scheduler
+    with _schedulers_lock:
+        scheduler = _schedulers.get(pool)
+        if scheduler is None:
+            settings = get_settings()
+            slots = settings.fair_scheduler_llm_slots if pool == "llm" else settings.fair_scheduler_classifier_slots
+            scheduler = FairScheduler(
+                name=f"Fila justa:{pool}",
+                slots=slots,
+                user_concurrency=settings.fair_scheduler_user_concurrency,
+                max_queue_per_user=settings.fair_scheduler_max_queue_per_user,
+                max_wait_seconds=settings.fair_scheduler_max_wait_seconds,
+                quota_per_hour=settings.fair_scheduler_quota_per_hour,
+                weights=json.loads(settings.fair_scheduler_weights) if settings.fair_scheduler_weights else None,
+                enabled=settings.fair_scheduler_enabled,
+                background_weight=settings.fair_scheduler_background_weight,
+            )
+            _schedulers[pool] = scheduler
+        return scheduler
+
+
+@contextmanager
+def background_priority() -> Iterator[None]:
+    """Coloca as chamadas do bloco na fila de segundo plano em vez da fila do usuario."""
+    token = _background.set(True)
+    try:
+        yield
+    finally:
+        _background.reset(token)
+
+
+@contextmanager
+def fair_slot(pool: str, cost: float = 1.0) -> Iterator[None]:
+    """Ocupa uma vaga do grupo em nome do usuario do escopo de uso atual (ou da fila de segundo plano)."""
+    user_id = BACKGROUND if _background.get() else current_usage()[0]
+    with get_fair_scheduler(pool).slot(user_id, cost):
+        yield
+
+
+def list_fair_schedulers() -> List[FairScheduler]:
+    """Lista os escalonadores ativos no processo."""
+    with _schedulers_lock:
+        return list(_schedulers.values())
+
+
+def _queue_depth_samples():
+    """Amostra as chamadas aguardando em cada escalonador."""
+    for scheduler in list_fair_schedulers():
+        yield {"pool": scheduler.name}, float(scheduler.queue_depth)
+
+
+REGISTRY.register_callback(
+    "fair_scheduler_queue_depth",
+    "Chamadas aguardando vaga no escalonador justo.",
+    _queue_depth_samples,
+)
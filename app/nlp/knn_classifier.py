@@ -0,0 +1,229 @@
+import fcntl
+import logging
+import os
+import re
+import threading
+import time
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import TYPE_CHECKING, Dict, List, Optional, Set, Tuple
+
+from app.core.config import get_settings
+from app.nlp.text_normalizer import normalize_text
+
+# numpy e importado dentro das funcoes: so e carregado quando o kNN e usado de fato.
+if TYPE_CHECKING:
+    import numpy as np
+
+logger = logging.getLogger(__name__)
+
+TOKEN_PATTERN = re.compile(r"\w+", re.UNICODE)
+_PROJECT_ROOT = Path(__file__).resolve().parents[2]
+
+
+def embed_text(text: str, dimensions: int) -> "np.ndarray":
+    """Gera o vetor L2-normalizado de unigramas e bigramas com hashing assinado (estavel entre processos)."""
+    import numpy as np
+
+    tokens = TOKEN_PATTERN.findall(normalize_text(text).lower())
+    features = tokens + [f"{first} {second}" for first, second in zip(tokens, tokens[1:])]
+    vector = np.zeros(dimensions, dtype=np.float32)
+    if not features:
+        return vector
+    hashes = np.fromiter((zlib.crc32(feature.encode("utf-8")) for feature in features), dtype=np.uint32)
+    signs = np.where(hashes & 0x80000000, -1.0, 1.0).astype(np.float32)
+    np.add.at(vector, (hashes % dimensions).astype(np.intp), signs)
+    norm = float(np.linalg.norm(vector))
+    return vector / norm if norm else vector
+
+
+class UserKnnIndex:
+    """Indice de vizinhos mais proximos dos emails rotulados de um usuario."""
+
+    def __init__(self, dimensions: int, max_examples: int) -> None:
+        """Inicializa um indice vazio."""
+        import numpy as np
+
+        self.dimensions = dimensions
+        self.max_examples = max_examples
+        self.vectors = np.zeros((0, dimensions), dtype=np.float32)
+        self.email_ids = np.zeros(0, dtype=np.int64)
+        self.labels: List[str] = []
+        self.mtime_ns = 0
+        self.checked_at = 0.0
+
+    def add(self, email_id: int, vector: "np.ndarray", label: str) -> None:
+        """Inclui ou substitui o exemplo do email, descartando os mais antigos acima do limite."""
+        import numpy as np
+
+        keep = self.email_ids != email_id
+        self.vectors = np.vstack([self.vectors[keep], vector[np.newaxis, :]])[-self.max_examples :]
+        self.email_ids = np.append(self.email_ids[keep], email_id)[-self.max_examples :]
+        labels = [item for item, kept in zip(self.labels, keep) if kept] + [label]
+        self.labels = labels[-self.max_examples :]
+
+    def query(self, vector: "np.ndarray", neighbors: int, min_similarity: float) -> Optional[Dict[str, object]]:
+        """Vota entre os vizinhos similares; score = fracao ponderada do rotulo vencedor x maior similaridade."""
+        import numpy as np
+
+        if not self.labels:
+            return None
+        similarities = self.vectors @ vector
+        count = min(neighbors, len(similarities))
+        nearest = np.argpartition(-similarities, count - 1)[:count]
+        weights: Dict[str, float] = {}
+        for index in nearest:
+            similarity = float(similarities[index])
+            if similarity >= min_similarity:
+                weights[self.labels[index]] = weights.get(self.labels[index], 0.0) + similarity
+        if not weights:
+            return None
+        label, weight = max(weights.items(), key=lambda item: item[1])
+        top_similarity = float(similarities[nearest].max())
+        return {"label": label, "score": round(weight / sum(weights.values()) * top_similarity, 4)}
+
+    def save(self, path: Path) -> None:
+        """Grava o indice de forma atomica."""
+        import numpy as np
+
+        path.parent.mkdir(parents=True, exist_ok=True)
+        temporary = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+        with open(temporary, "wb") as handle:
+            np.savez(handle, vectors=self.vectors, email_ids=self.email_ids, labels=np.array(self.labels, dtype=str))
+        os.replace(temporary, path)
+        self.mtime_ns = path.stat().st_mtime_ns
+
+    @classmethod
+    def load(cls, path: Path, dimensions: int, max_examples: int) -> "UserKnnIndex":
+        """Carrega o indice do disco ou retorna um indice vazio."""
+        import numpy as np
+
+        index = cls(dimensions, max_examples)
+        if not path.exists():
+            return index
+        with np.load(path) as data:
+            if data["vectors"].shape[1] == dimensions:
+                index.vectors = data["vectors"].astype(np.float32)
+                index.email_ids = data["email_ids"].astype(np.int64)
+                index.labels = [str(label) for label in data["labels"]]
+        index.mtime_ns = path.stat().st_mtime_ns
+        return index
+
+
+class KnnIndexStore:
+    """Mantem os indices por usuario em memoria, sincronizados com os arquivos em disco."""
+
+    def __init__(
+        self,
+        base_dir: str,
+        dimensions: int = 1024,
+        max_examples: int = 2000,
+        neighbors: int = 5,
+        min_similarity: float = 0.5,
+        reload_interval_seconds: float = 0.0,
+    ) -> None:
+        """Inicializa o repositorio de indices no diretorio informado."""
+        self._base_dir = Path(base_dir)
+        self._dimensions = dimensions
+        self._max_examples = max_examples
+        self._neighbors = neighbors
+        self._min_similarity = min_similarity
+        self._reload_interval_seconds = reload_interval_seconds
+        self._indexes: Dict[int, UserKnnIndex] = {}
+        # Exemplos aprendidos e ainda nao gravados: sao reaplicados quando o arquivo e recarregado.
+        self._pending: Dict[int, List[Tuple[int, "np.ndarray", str]]] = {}
+        self._user_locks: Dict[int, threading.Lock] = {}
+        self._dirty: Set[int] = set()
+        self._lock = threading.Lock()
+        self._saver = ThreadPoolExecutor(max_workers=1, thread_name_prefix="knn-save")
+
+    def learn(self, user_id: int, email_id: int, text: str, label: str) -> None:
+        """Acrescenta (ou corrige) o exemplo do email no indice do usuario e agenda a gravacao em disco."""
+        vector = embed_text(text, self._dimensions)
+        with self._user_lock(user_id):
+            self._index(user_id).add(email_id, vector, label)
+            self._pending.setdefault(user_id, []).append((email_id, vector, label))
+        with self._lock:
+            if user_id in self._dirty:
+                return
+            self._dirty.add(user_id)
+        self._saver.submit(self._save, user_id)
+
+    def predict(self, user_id: int, text: str) -> Optional[Dict[str, object]]:
+        """Retorna label e score do vizinho mais proximo, ou None sem exemplos similares."""
+        vector = embed_text(text, self._dimensions)
+        with self._user_lock(user_id):
+            return self._index(user_id).query(vector, self._neighbors, self._min_similarity)
+
+    def flush(self) -> None:
+        """Aguarda as gravacoes agendadas ate o momento."""
+        self._saver.submit(lambda: None).result()
+
+    def close(self) -> None:
+        """Grava os indices pendentes e encerra a thread de gravacao."""
+        self._saver.shutdown(wait=True)
+
+    def _save(self, user_id: int) -> None:
+        """Grava o indice do usuario fora do caminho da requisicao; gravacoes seguidas sao agrupadas."""
+        with self._lock:
+            self._dirty.discard(user_id)
+        path = self._path(user_id)
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            # O lock de arquivo serializa os workers: cada um rele a versao gravada pelos outros antes de sobrescrever.
+            with open(path.with_name(f".{path.name}.lock"), "w") as lock_file:
+                fcntl.flock(lock_file, fcntl.LOCK_EX)
+                with self._user_lock(user_id):
+                    self._index(user_id, force_check=True).save(path)
+                    self._pending.pop(user_id, None)
+        except OSError as exc:
+            logger.warning("Falha ao gravar indice kNN do usuario %s: %s", user_id, exc)
+
+    def _user_lock(self, user_id: int) -> threading.Lock:
+        """Lock do indice do usuario; usuarios diferentes nao disputam o mesmo lock."""
+        with self._lock:
+            return self._user_locks.setdefault(user_id, threading.Lock())
+
+    def _index(self, user_id: int, force_check: bool = False) -> UserKnnIndex:
+        """Retorna o indice do usuario, recarregando se outro worker gravou uma versao mais nova.
+
+        O arquivo e consultado no maximo a cada reload_interval_seconds; ao recarregar, os exemplos locais
+        ainda nao gravados sao reaplicados sobre a versao do disco.
+        """
+        now = time.monotonic()
+        index = self._indexes.get(user_id)
+        if index is not None and not force_check and now - index.checked_at < self._reload_interval_seconds:
+            return index
+        path = self._path(user_id)
+        mtime_ns = path.stat().st_mtime_ns if path.exists() else 0
+        if index is None or index.mtime_ns != mtime_ns:
+            index = self._indexes[user_id] = UserKnnIndex.load(path, self._dimensions, self._max_examples)
+            for email_id, vector, label in self._pending.get(user_id, ()):
+                index.add(email_id, vector, label)
+        index.checked_at = now
+        return index
+
+    def _path(self, user_id: int) -> Path:
+        """Caminho do arquivo de indice do usuario."""
+        return self._base_dir / f"user_{user_id}.npz"
+
+
+def build_knn_index_store() -> Optional[KnnIndexStore]:
+    """Cria o repositorio de indices pessoais conforme as configuracoes, ou None se desativado."""
+    settings = get_settings()
+    if not settings.knn_enabled:
+        return None
+    index_dir = Path(settings.knn_index_dir).expanduser()
+    if not index_dir.is_absolute():
+        # Relativo a raiz do projeto, e nao ao diretorio de trabalho de cada worker.
+        index_dir = _PROJECT_ROOT / index_dir
+    logger.info("Indices kNN em %s", index_dir)
+    return KnnIndexStore(
+        str(index_dir),
+        settings.knn_dimensions,
+        settings.knn_max_examples,
+        settings.knn_neighbors,
+        settings.knn_min_similarity,
+        settings.knn_reload_interval_seconds,
+    )
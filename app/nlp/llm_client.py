@@ -1,33 +1,77 @@
 import logging
+import time
 from typing import Dict
 
 import requests
 
 from app.core.config import get_settings
-from app.nlp.exceptions import ConfigurationError, ExternalServiceError
+from app.core.metrics import provider_call
+from app.nlp.exceptions import ConfigurationError, ExternalServiceError, RateLimitExceededError
+from app.nlp.fair_scheduler import fair_slot
+from app.nlp.llm_router import LlmBackend, LlmRouter, get_llm_router
+from app.nlp.rate_limiter import get_rate_limiter
+from app.nlp.text_normalizer import normalize_text
 
 logger = logging.getLogger(__name__)
 
+# Incrementar ao alterar _build_prompt: invalida as respostas em cache geradas com o prompt anterior.
+PROMPT_VERSION = 1
+
 
 class LlmClient:
-    """Integra geracao de resposta via provedor LLM configurado."""
+    """Integra geracao de resposta via provedores LLM configurados."""
 
-    def __init__(self) -> None:
+    def __init__(self, router: LlmRouter | None = None) -> None:
         """Inicializa o cliente com configuracoes do ambiente."""
         settings = get_settings()
-        self._api_key = settings.llm_api_key
-        self._endpoint = settings.llm_endpoint
-        self._model = settings.llm_model
+        self._router = router or get_llm_router()
         self._openrouter_referer = settings.openrouter_referer
         self._openrouter_title = settings.openrouter_title
+        self._http = requests.Session()
 
     def generate_response(self, classification: str, email_body: str) -> str:
         """Gera uma resposta automatica baseada na classificacao e no email."""
-        if not self._api_key:
+        backends = [backend for backend in self._router.ordered_backends() if backend.api_key]
+        if not backends:
             raise ConfigurationError("LLM_API_KEY nao configurada")
         prompt = self._build_prompt(classification, email_body)
+        last_error: ExternalServiceError | None = None
+        # Uma unica vaga cobre o failover: a troca de backend nao volta ao fim da fila justa, e a recusa do
+        # escalonador sobe direto ao chamador, sem passar pela contabilidade do roteador.
+        with fair_slot("llm"):
+            for backend in backends:
+                started = time.perf_counter()
+                self._router.start(backend)
+                try:
+                    content = self._call_backend(backend, prompt)
+                except RateLimitExceededError as exc:
+                    # Fila local do rate limiter: o backend nao falhou, apenas tenta o proximo.
+                    logger.warning(
+                        "Rate limit local do backend LLM %s, tentando proximo: %s", backend.name, exc.detail
+                    )
+                    last_error = exc
+                    continue
+                except ExternalServiceError as exc:
+                    self._router.record_failure(backend, time.perf_counter() - started, exc.detail)
+                    if not self._is_retriable(exc):
+                        raise
+                    logger.warning(
+                        "Backend LLM indisponivel, tentando proximo: backend=%s status=%s",
+                        backend.name,
+                        exc.status_code,
+                    )
+                    last_error = exc
+                    continue
+                finally:
+                    self._router.finish(backend)
+                self._router.record_success(backend, time.perf_counter() - started)
+                return content
+            raise last_error or ExternalServiceError(service="LLM", detail="Nenhum backend LLM disponivel")
+
+    def _call_backend(self, backend: LlmBackend, prompt: str) -> str:
+        """Executa a chamada de chat completions em um backend especifico."""
         payload = {
-            "model": self._model,
+            "model": backend.model,
             "messages": [
                 {"role": "system", "content": "Voce e um assistente que escreve respostas profissionais de email."},
                 {"role": "user", "content": prompt},
@@ -35,19 +79,60 @@ class LlmClient:
             "temperature": 0.4,
             "max_tokens": 128,
         }
-        headers = self._build_headers()
+        headers = self._build_headers(backend.api_key)
+        rate_limiter = get_rate_limiter(f"LLM:{backend.name}", backend.api_key)
+        rate_limiter.acquire(backend.endpoint)
+        with provider_call("llm", backend.model) as call:
+            response = self._send(backend, headers, payload)
+            call.status = str(response.status_code)
+            rate_limiter.observe(response.headers, response.status_code)
+            self._raise_for_status(backend, response)
+            try:
+                data = response.json()
+            except ValueError as exc:
+                raise ExternalServiceError(
+                    service="LLM",
+                    detail=f"Resposta invalida (JSON): {response.text[:200]}",
+                    status_code=response.status_code,
+                    endpoint=backend.endpoint,
+                ) from exc
+            usage = data.get("usage") if isinstance(data, dict) else None
+            if isinstance(usage, dict):
+                call.input_tokens = usage.get("prompt_tokens")
+                call.output_tokens = usage.get("completion_tokens")
+        if isinstance(data, dict) and data.get("error"):
+            raise ExternalServiceError(
+                service="LLM",
+                detail=str(data["error"]),
+                status_code=response.status_code,
+                endpoint=backend.endpoint,
+            )
+        return data["choices"][0]["message"]["content"].strip()
+
+    def _send(self, backend: LlmBackend, headers: Dict[str, str], payload: Dict[str, object]) -> requests.Response:
+        """Envia a requisicao ao backend, convertendo falhas de rede em ExternalServiceError."""
+        try:
+            return self._http.post(backend.endpoint, headers=headers, json=payload, timeout=300)
+        except requests.RequestException as exc:
+            raise ExternalServiceError(
+                service="LLM",
+                detail=f"Falha de rede: {exc}",
+                endpoint=backend.endpoint,
+            ) from exc
+
+    def _raise_for_status(self, backend: LlmBackend, response: requests.Response) -> None:
+        """Converte respostas HTTP de erro em ExternalServiceError com contexto de rate limit."""
         try:
-            response = requests.post(self._endpoint, headers=headers, json=payload, timeout=300)
             response.raise_for_status()
         except requests.HTTPError as exc:
-            status_code = exc.response.status_code if exc.response else None
-            detail = exc.response.text if exc.response else str(exc)
+            status_code = exc.response.status_code if exc.response is not None else None
+            detail = exc.response.text if exc.response is not None else str(exc)
             if exc.response is not None and status_code == 429:
                 rate_limit_context = self._extract_rate_limit_context(exc.response.headers)
                 logger.warning(
                     "Falha no provedor de IA: service=LLM status=%s endpoint=%s %s",
                     status_code,
-                    self._endpoint,
+                    backend.endpoint,
                     rate_limit_context,
                 )
                 detail = f"Limite de uso atingido. {rate_limit_context}".strip()
@@ -55,23 +140,22 @@ class LlmClient:
                 service="LLM",
                 detail=f"Resposta {status_code}: {detail}",
                 status_code=status_code,
-                endpoint=self._endpoint,
-            ) from exc
-        except requests.RequestException as exc:
-            raise ExternalServiceError(
-                service="LLM",
-                detail=f"Falha de rede: {exc}",
-                endpoint=self._endpoint,
+                endpoint=backend.endpoint,
             ) from exc
-        data = response.json()
-        if isinstance(data, dict) and data.get("error"):
-            raise ExternalServiceError(
-                service="LLM",
-                detail=str(data["error"]),
-                status_code=response.status_code,
-                endpoint=self._endpoint,
-            )
-        return data["choices"][0]["message"]["content"].strip()
+
+    def warm_up(self) -> None:
+        """Abre conexoes com todos os backends configurados."""
+        for backend in self._router.backends:
+            if not backend.api_key:
+                continue
+            try:
+                self._http.head(backend.endpoint, timeout=5)
+            except requests.RequestException as exc:
+                logger.warning("Falha ao aquecer conexao com %s: %s", backend.endpoint, exc)
+
+    def _is_retriable(self, exc: ExternalServiceError) -> bool:
+        """Indica se a falha justifica tentar o proximo backend."""
+        return exc.status_code is None or exc.status_code == 429 or exc.status_code >= 500
 
     def _build_prompt(self, classification: str, email_body: str) -> str:
         """Construi o prompt para gerar resposta adequada ao contexto do email."""
@@ -84,13 +168,13 @@ class LlmClient:
             "Classificacao: "
             f"{classification}.\n"
             "Email:\n"
-            f"{email_body}\n\n"
+            f"{normalize_text(email_body)}\n\n"
             "Regras: responda em 3 a 6 frases, sem markdown, sem listas, sem assinaturas longas."
         )
 
-    def _build_headers(self) -> Dict[str, str]:
+    def _build_headers(self, api_key: str) -> Dict[str, str]:
         headers = {
-            "Authorization": f"Bearer {self._api_key}",
+            "Authorization": f"Bearer {api_key}",
             "Content-Type": "application/json",
         }
         if self._openrouter_referer:
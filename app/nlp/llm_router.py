@@ -0,0 +1,182 @@
+import threading
+import time
+from dataclasses import dataclass, field
+from functools import lru_cache
+from typing import Dict, List, Optional
+
+from app.core.config import get_settings
+
+
+@dataclass(frozen=True)
+class LlmBackend:
+    """Representa um endpoint/modelo LLM elegivel para roteamento."""
+
+    name: str
+    endpoint: str
+    model: str
+    api_key: str
+    weight: float = 1.0
+
+
+@dataclass
+class BackendStats:
+    """Acumula latencia e taxa de erro (EWMA) de um backend."""
+
+    ewma_latency: Optional[float] = None
+    error_rate: float = 0.0
+    requests: int = 0
+    failures: int = 0
+    consecutive_failures: int = 0
+    cooldown_until: float = 0.0
+    last_error: Optional[str] = None
+    in_flight: int = field(default=0)
+
+
+class LlmRouter:
+    """Escolhe o backend LLM mais rapido e saudavel, com failover ordenado."""
+
+    def __init__(
+        self,
+        backends: List[LlmBackend],
+        alpha: float = 0.3,
+        error_threshold: float = 0.5,
+        cooldown_seconds: float = 30.0,
+        max_consecutive_failures: int = 3,
+    ) -> None:
+        """Inicializa o roteador com a lista de backends e parametros de saude."""
+        self._backends = list(backends)
+        self._alpha = alpha
+        self._error_threshold = error_threshold
+        self._cooldown_seconds = cooldown_seconds
+        self._max_consecutive_failures = max_consecutive_failures
+        self._stats: Dict[str, BackendStats] = {backend.name: BackendStats() for backend in self._backends}
+        self._lock = threading.Lock()
+
+    @property
+    def backends(self) -> List[LlmBackend]:
+        """Backends configurados na ordem original."""
+        return list(self._backends)
+
+    def ordered_backends(self) -> List[LlmBackend]:
+        """Retorna backends saudaveis do mais rapido ao mais lento, seguidos dos em cooldown."""
+        now = time.monotonic()
+        with self._lock:
+            healthy = [b for b in self._backends if self._stats[b.name].cooldown_until <= now]
+            cooling = [b for b in self._backends if self._stats[b.name].cooldown_until > now]
+            healthy.sort(key=self._score)
+            cooling.sort(key=lambda b: self._stats[b.name].cooldown_until)
+        return healthy + cooling
+
+    def _score(self, backend: LlmBackend) -> float:
+        """Calcula o custo esperado do backend; sem amostras ele e explorado primeiro."""
+        stats = self._stats[backend.name]
+        if stats.ewma_latency is None:
+            return 0.0
+        penalty = 1.0 + stats.error_rate * 4.0 + stats.in_flight * 0.25
+        return stats.ewma_latency * penalty / max(backend.weight, 0.01)
+
+    def start(self, backend: LlmBackend) -> None:
+        """Registra o inicio de uma chamada ao backend."""
+        with self._lock:
+            self._stats[backend.name].in_flight += 1
+
+    def finish(self, backend: LlmBackend) -> None:
+        """Registra o fim de uma chamada ao backend, qualquer que seja o desfecho."""
+        with self._lock:
+            stats = self._stats[backend.name]
+            stats.in_flight = max(stats.in_flight - 1, 0)
+
+    def record_success(self, backend: LlmBackend, latency: float) -> None:
+        """Atualiza estatisticas apos chamada bem sucedida."""
+        with self._lock:
+            stats = self._stats[backend.name]
+            stats.requests += 1
+            stats.consecutive_failures = 0
+            stats.ewma_latency = self._ewma(stats.ewma_latency, latency)
+            stats.error_rate = (1 - self._alpha) * stats.error_rate
+
+    def record_failure(self, backend: LlmBackend, latency: float, error: str) -> None:
+        """Atualiza estatisticas apos falha e aplica cooldown se o backend ficar instavel."""
+        with self._lock:
+            stats = self._stats[backend.name]
+            stats.requests += 1
+            stats.failures += 1
+            stats.consecutive_failures += 1
+            stats.last_error = error
+            stats.ewma_latency = self._ewma(stats.ewma_latency, latency)
+            stats.error_rate = (1 - self._alpha) * stats.error_rate + self._alpha
+            if (
+                stats.error_rate >= self._error_threshold
+                or stats.consecutive_failures >= self._max_consecutive_failures
+            ):
+                stats.cooldown_until = time.monotonic() + self._cooldown_seconds
+
+    def _ewma(self, current: Optional[float], sample: float) -> float:
+        """Aplica media movel exponencial sobre a latencia."""
+        if current is None:
+            return sample
+        return (1 - self._alpha) * current + self._alpha * sample
+
+    def snapshot(self) -> List[Dict[str, object]]:
+        """Retorna estatisticas por backend para exposicao administrativa."""
+        now = time.monotonic()
+        with self._lock:
+            items = []
+            for backend in self._backends:
+                stats = self._stats[backend.name]
+                items.append(
+                    {
+                        "name": backend.name,
+                        "endpoint": backend.endpoint,
+                        "model": backend.model,
+                        "weight": backend.weight,
+                        "healthy": stats.cooldown_until <= now,
+                        "ewma_latency_ms": round(stats.ewma_latency * 1000, 1) if stats.ewma_latency is not None else None,
+                        "error_rate": round(stats.error_rate, 4),
+                        "requests": stats.requests,
+                        "failures": stats.failures,
+                        "in_flight": stats.in_flight,
+                        "cooldown_remaining": round(max(stats.cooldown_until - now, 0.0), 1),
+                        "last_error": stats.last_error,
+                    }
+                )
+            return items
+
+
+def build_backends() -> List[LlmBackend]:
+    """Monta os backends a partir de LLM_BACKENDS ou do endpoint/modelo unico."""
+    settings = get_settings()
+    configs = settings.llm_backends
+    if not configs:
+        return [
+            LlmBackend(
+                name=settings.llm_model,
+                endpoint=settings.llm_endpoint,
+                model=settings.llm_model,
+                api_key=settings.llm_api_key,
+            )
+        ]
+    backends = []
+    for index, config in enumerate(configs):
+        backends.append(
+            LlmBackend(
+                name=config.name or f"{config.model}#{index}",
+                endpoint=config.endpoint,
+                model=config.model,
+                api_key=config.api_key or settings.llm_api_key,
+                weight=config.weight,
+            )
+        )
+    return backends
+
+
+@lru_cache
+def get_llm_router() -> LlmRouter:
+    """Retorna o roteador compartilhado do processo."""
+    settings = get_settings()
+    return LlmRouter(
+        build_backends(),
+        alpha=settings.llm_router_ewma_alpha,
+        error_threshold=settings.llm_router_error_threshold,
+        cooldown_seconds=settings.llm_router_cooldown_seconds,
+    )
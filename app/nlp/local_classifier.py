@@ -0,0 +1,83 @@
+import threading
+from typing import Any, Dict, List
+
+from app.core.config import get_settings
+from app.core.metrics import provider_call
+from app.nlp.classifier_client import ClassifierClient
+from app.nlp.exceptions import ConfigurationError
+from app.nlp.fair_scheduler import fair_slot
+
+
+class LocalClassifierClient(ClassifierClient):
+    """Executa a classificacao zero-shot localmente com transformers/torch."""
+
+    def __init__(self, model: str | None = None, quantize: bool | None = None) -> None:
+        """Inicializa o cliente; o modelo so e carregado na primeira inferencia."""
+        super().__init__()
+        settings = get_settings()
+        self._local_model = model or settings.local_classifier_model
+        self._device = settings.local_classifier_device
+        self._quantize = settings.local_classifier_quantize if quantize is None else quantize
+        self._pipeline: Any = None
+        self._load_lock = threading.Lock()
+
+    @property
+    def is_loaded(self) -> bool:
+        """Indica se o pipeline ja foi carregado em memoria."""
+        return self._pipeline is not None
+
+    def _ensure_configured(self) -> None:
+        """Valida que um modelo local foi configurado."""
+        if not self._local_model:
+            raise ConfigurationError("LOCAL_CLASSIFIER_MODEL nao configurado")
+
+    def load(self) -> None:
+        """Carrega o pipeline zero-shot (import tardio de transformers/torch)."""
+        if self._pipeline is not None:
+            return
+        with self._load_lock:
+            if self._pipeline is not None:
+                return
+            self._ensure_configured()
+            try:
+                from transformers import pipeline
+            except ImportError as exc:
+                raise ConfigurationError("transformers/torch nao instalados para o classificador local") from exc
+            classifier = pipeline("zero-shot-classification", model=self._local_model, device=self._device)
+            if self._quantize:
+                import torch
+
+                classifier.model = torch.quantization.quantize_dynamic(
+                    classifier.model, {torch.nn.Linear}, dtype=torch.qint8
+                )
+            self._pipeline = classifier
+
+    def warm_up(self) -> None:
+        """Carrega o modelo e executa uma inferencia descartavel para compilar kernels."""
+        self.load()
+        self._infer("Mensagem de aquecimento do classificador.")
+
+    def _infer(self, text: str) -> Dict[str, object]:
+        """Executa o pipeline local e retorna labels/scores ordenados."""
+        self.load()
+        with fair_slot("classifier"), provider_call("local", self._local_model) as call:
+            result = self._pipeline(
+                text,
+                candidate_labels=self._labels,
+                hypothesis_template=self._hypothesis_template,
+            )
+            call.status = "ok"
+        return result
+
+    def _infer_batch(self, texts: List[str]) -> List[Dict[str, object]]:
+        """Executa as janelas no pipeline local como um unico lote."""
+        self.load()
+        with fair_slot("classifier", len(texts)), provider_call("local", self._local_model) as call:
+            results = self._pipeline(
+                texts,
+                candidate_labels=self._labels,
+                hypothesis_template=self._hypothesis_template,
+                batch_size=len(texts),
+            )
+            call.status = "ok"
+        return results
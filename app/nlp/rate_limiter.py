@@ -0,0 +1,252 @@
+import hashlib
+import logging
+import re
+import threading
+import time
+from typing import Dict, List, Mapping, Optional, Tuple
+
+from app.core.config import get_settings
+from app.core.metrics import REGISTRY
+from app.core.timing import record_span
+from app.nlp.exceptions import RateLimitExceededError
+
+logger = logging.getLogger(__name__)
+
+_DURATION_PATTERN = re.compile(r"(\d+(?:\.\d+)?)(ms|s|m|h)")
+_LIMIT_KEYS = ("x-ratelimit-limit-requests", "x-ratelimit-limit")
+_REMAINING_KEYS = ("x-ratelimit-remaining-requests", "x-ratelimit-remaining")
+_RESET_KEYS = ("x-ratelimit-reset-requests", "x-ratelimit-reset")
+
+
+def parse_reset_seconds(value: Optional[str], now: Optional[float] = None) -> Optional[float]:
+    """Converte valores de reset/retry-after (segundos, duracao ou epoch) em segundos."""
+    if not value:
+        return None
+    value = value.strip()
+    try:
+        number = float(value)
+    except ValueError:
+        matches = _DURATION_PATTERN.findall(value)
+        if not matches:
+            return None
+        units = {"ms": 0.001, "s": 1.0, "m": 60.0, "h": 3600.0}
+        return sum(float(amount) * units[unit] for amount, unit in matches)
+    current = time.time() if now is None else now
+    if number > 1e12:
+        return max(number / 1000.0 - current, 0.0)
+    if number > 1e9:
+        return max(number - current, 0.0)
+    return max(number, 0.0)
+
+
+def _first_header(headers: Mapping[str, str], keys: Tuple[str, ...]) -> Optional[str]:
+    """Retorna o primeiro header presente dentre as chaves informadas."""
+    for key in keys:
+        value = headers.get(key)
+        if value:
+            return value
+    return None
+
+
+class TokenBucket:
+    """Token bucket cuja capacidade e ajustada pelos headers do provedor."""
+
+    def __init__(self, capacity: float, window_seconds: float) -> None:
+        """Inicializa o bucket cheio com a capacidade padrao."""
+        self.capacity = float(capacity)
+        self.window_seconds = float(window_seconds)
+        self.tokens = float(capacity)
+        self._updated = time.monotonic()
+
+    @property
+    def refill_rate(self) -> float:
+        """Tokens repostos por segundo."""
+        return self.capacity / self.window_seconds
+
+    def refill(self, now: float) -> None:
+        """Repoe tokens proporcionalmente ao tempo decorrido."""
+        elapsed = max(now - self._updated, 0.0)
+        self.tokens = min(self.capacity, self.tokens + elapsed * self.refill_rate)
+        self._updated = now
+
+    def try_take(self, now: float) -> float:
+        """Consome um token e retorna 0, ou o tempo em segundos ate haver token."""
+        self.refill(now)
+        if self.tokens >= 1.0:
+            self.tokens -= 1.0
+            return 0.0
+        return (1.0 - self.tokens) / self.refill_rate
+
+    def learn(
+        self,
+        limit: Optional[int],
+        remaining: Optional[int],
+        now: float,
+        reset_seconds: Optional[float] = None,
+    ) -> None:
+        """Ajusta capacidade, janela e saldo com base no limite, restante e reset informados pelo provedor."""
+        self.refill(now)
+        if limit and limit > 0:
+            self.capacity = float(limit)
+            # O reset informa quando o saldo volta a ficar cheio; com o consumo atual isso da a janela real.
+            if reset_seconds and remaining is not None and 0 <= remaining < limit:
+                self.window_seconds = reset_seconds * limit / (limit - remaining)
+        if remaining is not None:
+            self.tokens = min(self.tokens, float(max(remaining, 0)), self.capacity)
+
+
+class ProviderRateLimiter:
+    """Controla o ritmo de chamadas de um provedor/chave com fila limitada."""
+
+    def __init__(
+        self,
+        name: str,
+        capacity: int,
+        window_seconds: float,
+        max_queue: int,
+        max_wait_seconds: float,
+        enabled: bool = True,
+    ) -> None:
+        """Inicializa o limitador com valores padrao ate aprender com os headers."""
+        self.name = name
+        self._bucket = TokenBucket(capacity, window_seconds)
+        self._max_queue = max_queue
+        self._max_wait_seconds = max_wait_seconds
+        self._enabled = enabled
+        self._condition = threading.Condition()
+        self._waiting = 0
+        self._paused_until = 0.0
+
+    @property
+    def queue_depth(self) -> int:
+        """Quantidade de chamadas aguardando liberacao."""
+        return self._waiting
+
+    @property
+    def paused_for(self) -> float:
+        """Segundos restantes da pausa global imposta por retry-after."""
+        return max(self._paused_until - time.monotonic(), 0.0)
+
+    def acquire(self, endpoint: str | None = None) -> None:
+        """Bloqueia ate haver capacidade ou falha se a fila estiver cheia/expirar."""
+        if not self._enabled:
+            return
+        with self._condition:
+            if self._waiting >= self._max_queue:
+                raise RateLimitExceededError(
+                    service=self.name,
+                    detail=f"Fila de rate limit cheia ({self._waiting} chamadas aguardando)",
+                    retry_after=self.paused_for or None,
+                    endpoint=endpoint,
+                )
+            self._waiting += 1
+            started = time.monotonic()
+            deadline = started + self._max_wait_seconds
+            try:
+                while True:
+                    now = time.monotonic()
+                    wait = self._paused_until - now
+                    if wait <= 0:
+                        wait = self._bucket.try_take(now)
+                        if wait <= 0:
+                            return
+                    if now + wait > deadline:
+                        raise RateLimitExceededError(
+                            service=self.name,
+                            detail=f"Tempo maximo de espera no rate limit excedido ({self._max_wait_seconds}s)",
+                            retry_after=wait,
+                            endpoint=endpoint,
+                        )
+                    self._condition.wait(wait)
+            finally:
+                self._waiting -= 1
+                record_span("rate_limit_wait", time.monotonic() - started)
+
+    def observe(self, headers: Mapping[str, str], status_code: int | None = None) -> None:
+        """Aprende limites a partir dos headers e aplica pausa global em retry-after."""
+        if not self._enabled or headers is None:
+            return
+        limit = _to_int(_first_header(headers, _LIMIT_KEYS))
+        remaining = _to_int(_first_header(headers, _REMAINING_KEYS))
+        reset = parse_reset_seconds(_first_header(headers, _RESET_KEYS))
+        retry_after = parse_reset_seconds(headers.get("retry-after"))
+        if retry_after is None and status_code == 429:
+            retry_after = reset
+        if limit is None and remaining is None and retry_after is None:
+            return
+        with self._condition:
+            now = time.monotonic()
+            self._bucket.learn(limit, remaining, now, reset if status_code != 429 else None)
+            if retry_after:
+                self._paused_until = max(self._paused_until, now + retry_after)
+                logger.warning("Rate limit do provedor %s pausado por %.1fs", self.name, retry_after)
+            self._condition.notify_all()
+
+    def snapshot(self) -> Dict[str, float | int | str]:
+        """Retorna o estado atual do limitador para diagnostico."""
+        with self._condition:
+            self._bucket.refill(time.monotonic())
+            return {
+                "provider": self.name,
+                "capacity": self._bucket.capacity,
+                "window_seconds": round(self._bucket.window_seconds, 3),
+                "tokens": round(self._bucket.tokens, 3),
+                "queue_depth": self._waiting,
+                "paused_for": round(self.paused_for, 3),
+            }
+
+
+def _to_int(value: Optional[str]) -> Optional[int]:
+    """Converte header numerico em inteiro ignorando valores invalidos."""
+    if value is None:
+        return None
+    try:
+        return int(float(value))
+    except ValueError:
+        return None
+
+
+_limiters: Dict[Tuple[str, str], ProviderRateLimiter] = {}
+_limiters_lock = threading.Lock()
+
+
+def get_rate_limiter(provider: str, api_key: str) -> ProviderRateLimiter:
+    """Retorna o limitador compartilhado do processo para o provedor e chave."""
+    key_hash = hashlib.sha256(api_key.encode("utf-8")).hexdigest()[:12]
+    key = (provider, key_hash)
+    limiter = _limiters.get(key)
+    if limiter is not None:
+        return limiter
+    with _limiters_lock:
+        limiter = _limiters.get(key)
+        if limiter is None:
+            settings = get_settings()
+            limiter = ProviderRateLimiter(
+                name=provider,
+                capacity=settings.rate_limit_default_requests,
+                window_seconds=settings.rate_limit_window_seconds,
+                max_queue=settings.rate_limit_max_queue,
+                max_wait_seconds=settings.rate_limit_max_wait_seconds,
+                enabled=settings.rate_limit_enabled,
+            )
+            _limiters[key] = limiter
+        return limiter
+
+
+def list_rate_limiters() -> List[ProviderRateLimiter]:
+    """Lista os limitadores ativos no processo."""
+    with _limiters_lock:
+        return list(_limiters.values())
+
+
+def _queue_depth_samples():
+    """Amostra a profundidade de fila e pausa de cada limitador."""
+    for limiter in list_rate_limiters():
+        yield {"provider": limiter.name}, float(limiter.queue_depth)
+
+
+REGISTRY.register_callback(
+    "provider_rate_limit_queue_depth",
+    "Chamadas aguardando no rate limiter local por provedor.",
+    _queue_depth_samples,
+)
@@ -0,0 +1,90 @@
+import json
+import re
+from functools import lru_cache
+from string import Template
+from typing import Dict, List, Optional
+
+from app.core.config import get_settings
+from app.core.metrics import counter
+
+REPLY_TEMPLATE_RENDERS = counter(
+    "reply_template_renders_total",
+    "Respostas geradas por template local, sem chamada ao LLM.",
+    ("classification",),
+)
+
+DEFAULT_TEMPLATES: Dict[str, str] = {
+    "Propaganda": (
+        "$saudacao\n\n"
+        "Agradecemos o contato$referencia. No momento nao temos interesse na oferta e pedimos, por gentileza, "
+        "que nosso endereco seja removido da lista de envios.\n\n"
+        "Atenciosamente."
+    ),
+    "Improdutivo": (
+        "$saudacao\n\n"
+        "Obrigado pela mensagem$referencia. Ficamos a disposicao caso precise de algo relacionado aos nossos "
+        "servicos.\n\n"
+        "Atenciosamente."
+    ),
+}
+
+CLOSING_PATTERN = re.compile(
+    r"^(?:att\.?|atenciosamente|abra[cç]os?|obrigad[oa]|cordialmente|grat[oa]|sauda[cç][oõ]es|--)[\s,.!]*$",
+    re.IGNORECASE,
+)
+FROM_HEADER_PATTERN = re.compile(r"^(?:de|from):\s*\"?([^\"<\n]+?)\"?\s*<", re.IGNORECASE | re.MULTILINE)
+NAME_PATTERN = re.compile(r"^[A-ZÀ-Ý][a-zà-ÿ'.]+(?: (?:d[aeo]s? )?[A-ZÀ-Ý][a-zà-ÿ'.]+){0,3}$")
+
+
+def extract_sender_name(email_body: str) -> Optional[str]:
+    """Extrai o nome do remetente da assinatura (linha apos o fecho) ou do cabecalho De:."""
+    lines = [line.strip() for line in email_body.splitlines()]
+    for index, line in enumerate(lines):
+        if not CLOSING_PATTERN.match(line):
+            continue
+        for candidate in lines[index + 1 : index + 3]:
+            if candidate:
+                candidate = candidate.rstrip(",.")
+                if NAME_PATTERN.match(candidate):
+                    return candidate
+                break
+    header = FROM_HEADER_PATTERN.search(email_body)
+    if header and NAME_PATTERN.match(header.group(1).strip()):
+        return header.group(1).strip()
+    return None
+
+
+class ReplyTemplateEngine:
+    """Preenche respostas padrao por classificacao com variaveis extraidas do email."""
+
+    def __init__(self, templates: Dict[str, str], classifications: List[str]) -> None:
+        """Inicializa o motor com os templates e as classificacoes atendidas por ele."""
+        self._templates = {label: Template(text) for label, text in templates.items() if label in classifications}
+
+    def supports(self, classification: str) -> bool:
+        """Indica se a classificacao e respondida por template."""
+        return classification in self._templates
+
+    def render(self, classification: str, email_body: str, assunto: Optional[str] = None) -> str:
+        """Gera a resposta da classificacao preenchendo saudacao e referencia ao assunto."""
+        name = extract_sender_name(email_body)
+        variables = {
+            "nome": name or "",
+            "assunto": assunto or "",
+            "saudacao": f"Ola, {name}," if name else "Ola,",
+            "referencia": f' sobre "{assunto}"' if assunto else "",
+        }
+        REPLY_TEMPLATE_RENDERS.labels(classification).inc()
+        return self._templates[classification].safe_substitute(variables).strip()
+
+
+@lru_cache
+def get_reply_template_engine() -> ReplyTemplateEngine:
+    """Retorna o motor de templates configurado (REPLY_TEMPLATES_PATH sobrescreve os padroes)."""
+    settings = get_settings()
+    templates = dict(DEFAULT_TEMPLATES)
+    if settings.reply_templates_path:
+        with open(settings.reply_templates_path, encoding="utf-8") as handle:
+            templates.update(json.load(handle))
+    classifications = [item.strip() for item in settings.reply_template_classifications.split(",") if item.strip()]
+    return ReplyTemplateEngine(templates, classifications)
@@ -0,0 +1,195 @@
+import hashlib
+import html
+import re
+from dataclasses import dataclass, field
+from typing import Callable, Dict, List, Match, Tuple, Union
+
+from app.core.metrics import counter
+
+NORMALIZER_MATCHES = counter(
+    "text_normalizer_matches_total",
+    "Trechos removidos ou reescritos pela normalizacao de texto, por regra.",
+    ("rule",),
+)
+NORMALIZER_REMOVED_CHARS = counter(
+    "text_normalizer_removed_chars_total",
+    "Caracteres removidos pela normalizacao de texto, por regra.",
+    ("rule",),
+)
+
+Replacement = Union[str, Callable[[Match[str]], str]]
+
+_SIGNATURE_MARKERS = (
+    r"atenciosamente|att\b|abra[cç]os?|obrigad[oa](?: desde j[aá])?|cordialmente|grat[oa]\b|sauda[cç][oõ]es"
+)
+_HEADER_NAMES = r"de|from|enviad[oa](?: em)?|sent|data|date|para|to|cc|assunto|subject"
+_BLOCK_TAGS = r"br|p|div|li|tr|table|h[1-6]"
+# A assinatura so termina no fim da mensagem ou logo antes de um bloco citado (resposta/encaminhamento).
+_SIGNATURE_END = (
+    r"(?=\s*\Z|\n[ \t]*>|\n[ \t]*(?:em|on)\b[^\n]*\b(?:escreveu|wrote)[ \t]*:[ \t]*$"
+    r"|\n[ \t]*(?:de|from)[ \t]*:|\n[ \t]*-{2,}[^\n]*(?:encaminhada|forwarded|original))"
+)
+
+_SPACE = r"[ \t\u00a0]"
+
+# Cada regra comeca por um caractere-guia ("<", "&", quebra de linha ou espaco). As regras sao agrupadas
+# pelo guia para que o motor de regex pule direto para as posicoes candidatas; dentro de um mesmo guia
+# vale a primeira alternativa que casar. O texto recebe uma quebra de linha inicial para que as regras
+# de inicio de linha tambem valham na primeira linha.
+RULES: List[Tuple[str, str, str, str, Replacement]] = [
+    ("html", "html_hidden", "<", r"(?is:(?P<hidden_tag>script|style|head)\b.*?</(?P=hidden_tag)\s*>)", ""),
+    ("html", "html_block", "<", rf"(?i:/?(?:{_BLOCK_TAGS})\b[^>]*>)", "\n"),
+    ("html", "html_tag", "<", r"(?is:/?[a-z][^>]*>|!--.*?-->)", ""),
+    ("html", "html_entity", "&", r"(?i:#\d{1,6};|#x[0-9a-f]{1,6};|[a-z]{2,8};)", lambda m: _unescape(m.group(0))),
+    (
+        "forward",
+        "forward_header",
+        "\n",
+        rf"(?i:[ \t]*-{{2,}}[^\n]*(?:encaminhada|forwarded|original)[^\n]*-{{2,}}[ \t]*"
+        rf"(?:\n[ \t]*(?:{_HEADER_NAMES})[ \t]*:[^\n]*)*(?:\n{_SPACE}*(?=\n))*)",
+        "",
+    ),
+    (
+        "reply",
+        "reply_header",
+        "\n",
+        r"(?i:[ \t]*(?:em|on)\b[^\n]{0,300}?(?:\n[^\n]{0,200}?)?\b(?:escreveu|wrote)[ \t]*:[ \t]*"
+        r"(?=\n[ \t]*>|\s*\Z))",
+        "",
+    ),
+    (
+        "reply",
+        "reply_outlook",
+        "\n",
+        r"(?is:[ \t]*(?:de|from)[ \t]*:[^\n]*(?:\n[ \t]*(?:enviad[oa](?: em)?|sent|data|date|para|to|cc)[ \t]*:[^\n]*){1,4}"
+        r"\n[ \t]*(?:assunto|subject)[ \t]*:.*)",
+        "",
+    ),
+    ("quote", "quote_line", "\n", r"[ \t]*>[^\n]*", ""),
+    (
+        "signature",
+        "signature",
+        "\n",
+        rf"(?im:(?:[ \t]*(?:{_SIGNATURE_MARKERS})(?:[ \t]*[,.!]+[ \t]*[^\n]{{0,40}})?[ \t]*|-- ?)$"
+        rf"(?:\n[^\n]{{0,60}}){{0,6}}?{_SIGNATURE_END})",
+        "",
+    ),
+    (
+        "disclaimer",
+        "disclaimer",
+        "\n",
+        r"(?i:[ \t]*(?:(?:aviso(?: legal| de confidencialidade)?|confidencial(?:idade)?|disclaimer|notice)[ \t]*:[ \t]*)?"
+        r"(?:esta mensagem|este e-?mail|this e-?mail|this message)\b[^\n]{0,200}?"
+        r"(?:confidencia|destinat|intended)[^\n]*(?:\n[^\n]+)*)",
+        "",
+    ),
+    ("whitespace", "blank_lines", "\n", rf"(?:{_SPACE}*\n)+{_SPACE}*(?=\n)", "\n"),
+    ("whitespace", "trailing_space", _SPACE, rf"{_SPACE}*(?=\n|\Z)", ""),
+    ("whitespace", "space_run", _SPACE, rf"{_SPACE}+", " "),
+    ("whitespace", "nbsp", _SPACE, r"(?<=\u00a0)", " "),
+]
+
+
+def _compile_rules(rules: List[Tuple[str, str, str, str, Replacement]]) -> "re.Pattern[str]":
+    """Agrupa as regras pelo caractere-guia e compila uma unica expressao."""
+    by_lead: Dict[str, List[str]] = {}
+    for _, group, lead, pattern, _ in rules:
+        by_lead.setdefault(lead, []).append(f"(?P<{group}>{pattern})")
+    return re.compile("|".join(f"{lead}(?:{'|'.join(groups)})" for lead, groups in by_lead.items()))
+
+
+def _unescape(entity: str) -> str:
+    """Converte entidades HTML, tratando &nbsp; como espaco comum."""
+    value = html.unescape(entity)
+    return " " if value == "\u00a0" else value
+
+
+@dataclass
+class NormalizationResult:
+    """Texto normalizado e estatisticas por regra aplicada."""
+
+    text: str
+    original_length: int
+    matches: Dict[str, int] = field(default_factory=dict)
+    removed_chars: Dict[str, int] = field(default_factory=dict)
+
+    @property
+    def reduction(self) -> float:
+        """Fracao do texto original removida."""
+        if not self.original_length:
+            return 0.0
+        return 1 - len(self.text) / self.original_length
+
+
+class NormalizedText(str):
+    """Texto original com a normalizacao ja calculada, reaproveitada por quem normalizar o mesmo texto."""
+
+    normalization: NormalizationResult
+    normalizer: "TextNormalizer"
+
+
+class TextNormalizer:
+    """Remove ruido de emails (HTML, citacoes, encaminhamentos, assinaturas, avisos) em uma unica passada."""
+
+    def __init__(self, rules: List[Tuple[str, str, str, str, Replacement]] = RULES) -> None:
+        """Compila todas as regras em uma unica expressao com grupos nomeados."""
+        self._pattern = _compile_rules(rules)
+        self._rules = {group: (rule, replacement) for rule, group, _, _, replacement in rules}
+
+    def normalize(self, text: str) -> NormalizationResult:
+        """Normaliza o texto e retorna o resultado com estatisticas por regra."""
+        if isinstance(text, NormalizedText) and text.normalizer is self:
+            return text.normalization
+        if not isinstance(text, str):
+            text = str(text)
+        matches: Dict[str, int] = {}
+        removed: Dict[str, int] = {}
+
+        def substitute(match: Match[str]) -> str:
+            rule, replacement = self._rules[match.lastgroup or ""]
+            output = replacement(match) if callable(replacement) else replacement
+            matches[rule] = matches.get(rule, 0) + 1
+            removed[rule] = removed.get(rule, 0) + len(match.group(0)) - len(output)
+            return output
+
+        normalized = self._pattern.sub(substitute, "\n" + text.replace("\r\n", "\n"))
+        if "html" in matches:
+            # Tags de bloco viram quebras de linha; uma segunda passada enxerga as linhas resultantes.
+            normalized = self._pattern.sub(substitute, "\n" + normalized)
+        normalized = normalized.strip()
+        for rule, count in matches.items():
+            NORMALIZER_MATCHES.labels(rule).inc(count)
+            NORMALIZER_REMOVED_CHARS.labels(rule).inc(max(removed[rule], 0))
+        return NormalizationResult(normalized or text.strip(), len(text), matches, removed)
+
+    def prepare(self, text: str) -> NormalizedText:
+        """Normaliza uma unica vez e devolve o texto original carregando o resultado."""
+        if isinstance(text, NormalizedText) and text.normalizer is self:
+            return text
+        prepared = NormalizedText(text)
+        prepared.normalization = self.normalize(text)
+        prepared.normalizer = self
+        return prepared
+
+
+_default_normalizer = TextNormalizer()
+
+
+def normalize_text(text: str) -> str:
+    """Normaliza o texto com as regras padrao e retorna apenas o conteudo limpo."""
+    return _default_normalizer.normalize(text).text
+
+
+def prepare_text(text: str) -> NormalizedText:
+    """Normaliza o texto uma vez com as regras padrao para repassa-lo a classificadores e ao LLM."""
+    return _default_normalizer.prepare(text)
+
+
+def get_text_normalizer() -> TextNormalizer:
+    """Retorna o normalizador compartilhado do processo."""
+    return _default_normalizer
+
+
+def normalized_hash(text: str) -> str:
+    """Retorna o sha256 do texto normalizado, estavel entre emails com o mesmo conteudo util."""
+    return hashlib.sha256(normalize_text(text).encode("utf-8")).hexdigest()
@@ -0,0 +1,41 @@
+from typing import Dict, List, Sequence
+
+AGGREGATION_STRATEGIES = ("max", "mean", "first_n")
+
+
+def split_windows(
+    text: str, window_tokens: int, overlap: int, max_windows: int, first_only: bool = False
+) -> List[str]:
+    """Divide o texto em janelas sobrepostas; acima do limite amostra janelas uniformes (ou as primeiras)."""
+    tokens = text.split()
+    if len(tokens) <= window_tokens:
+        return [text]
+    step = max(window_tokens - overlap, 1)
+    starts = list(range(0, len(tokens) - overlap, step))
+    if len(starts) > max_windows:
+        if first_only:
+            starts = starts[:max_windows]
+        elif max_windows == 1:
+            starts = starts[:1]
+        else:
+            last = len(starts) - 1
+            starts = [starts[round(index * last / (max_windows - 1))] for index in range(max_windows)]
+    return [" ".join(tokens[start : start + window_tokens]) for start in starts]
+
+
+def aggregate_scores(results: Sequence[Dict[str, object]], strategy: str, first_n: int = 3) -> Dict[str, object]:
+    """Combina os scores por rotulo das janelas (max, media ou media das primeiras N) no formato do pipeline."""
+    if strategy not in AGGREGATION_STRATEGIES:
+        raise ValueError(f"Estrategia de agregacao desconhecida: {strategy}")
+    if strategy == "first_n":
+        results = results[: max(first_n, 1)]
+    combined: Dict[str, float] = {}
+    for result in results:
+        for label, score in zip(result["labels"], result["scores"]):
+            score = float(score)
+            if strategy == "max":
+                combined[label] = max(combined.get(label, 0.0), score)
+            else:
+                combined[label] = combined.get(label, 0.0) + score / len(results)
+    ranked = sorted(combined.items(), key=lambda item: item[1], reverse=True)
+    return {"labels": [label for label, _ in ranked], "scores": [score for _, score in ranked]}
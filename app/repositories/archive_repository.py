@@ -0,0 +1,113 @@
+import gzip
+import json
+import os
+import threading
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+ARCHIVE_SUFFIX = ".ndjson.gz"
+
+
+def _parse_datetime(value: Any) -> Optional[datetime]:
+    """Converte datas ISO gravadas no arquivo de volta para datetime."""
+    if value is None or isinstance(value, datetime):
+        return value
+    return datetime.fromisoformat(value)
+
+
+def _naive_utc(value: Optional[datetime]) -> Optional[datetime]:
+    """Remove o fuso de datas com timezone para comparar com as datas gravadas (UTC sem fuso)."""
+    if value is None or value.tzinfo is None:
+        return value
+    return value.astimezone(timezone.utc).replace(tzinfo=None)
+
+
+class EmailArchiveRepository:
+    """Armazena emails arquivados em arquivos NDJSON gzip por usuario e mes."""
+
+    _write_lock = threading.Lock()
+
+    def __init__(self, base_dir: str) -> None:
+        """Inicializa o repositorio no diretorio de arquivo informado."""
+        self._base_dir = Path(base_dir)
+
+    def append(self, rows: Iterable[Dict[str, Any]]) -> int:
+        """Acrescenta registros aos arquivos do usuario/mes correspondentes e sincroniza em disco."""
+        grouped: Dict[Path, List[str]] = {}
+        for row in rows:
+            created_at = _parse_datetime(row["created_at"])
+            path = self._path_for(int(row["user_id"]), created_at)
+            record = {key: value.isoformat() if isinstance(value, datetime) else value for key, value in row.items()}
+            grouped.setdefault(path, []).append(json.dumps(record, ensure_ascii=False))
+        written = 0
+        with self._write_lock:
+            for path, lines in grouped.items():
+                path.parent.mkdir(parents=True, exist_ok=True)
+                # Cada append gera um novo membro gzip; leitores tratam a concatenacao como um fluxo unico.
+                with open(path, "ab") as raw, gzip.GzipFile(fileobj=raw, mode="ab") as handle:
+                    handle.write(("\n".join(lines) + "\n").encode("utf-8"))
+                    handle.flush()
+                    raw.flush()
+                    os.fsync(raw.fileno())
+                written += len(lines)
+        return written
+
+    def iter_rows(
+        self,
+        user_id: int,
+        respondido: Optional[bool] = None,
+        classification: Optional[str] = None,
+        created_from: Optional[datetime] = None,
+        created_to: Optional[datetime] = None,
+    ) -> Iterator[Dict[str, Any]]:
+        """Percorre os registros arquivados do usuario em ordem cronologica, sem duplicatas."""
+        created_from, created_to = _naive_utc(created_from), _naive_utc(created_to)
+        seen = set()
+        for month, path in self._user_files(user_id):
+            if created_to is not None and month > (created_to.year, created_to.month):
+                continue
+            if created_from is not None and month < (created_from.year, created_from.month):
+                continue
+            with gzip.open(path, "rt", encoding="utf-8") as handle:
+                for line in handle:
+                    if not line.strip():
+                        continue
+                    row = json.loads(line)
+                    if row["id"] in seen:
+                        continue
+                    seen.add(row["id"])
+                    for key in ("created_at", "updated_at", "respondido_em"):
+                        row[key] = _naive_utc(_parse_datetime(row.get(key)))
+                    if respondido is not None and bool(row["respondido"]) != respondido:
+                        continue
+                    if classification and row["classification"] != classification:
+                        continue
+                    if created_from is not None and row["created_at"] < created_from:
+                        continue
+                    if created_to is not None and row["created_at"] >= created_to:
+                        continue
+                    yield row
+
+    def version(self, user_id: int) -> Tuple[Tuple[str, int, int], ...]:
+        """Identifica o estado dos arquivos do usuario (nome, tamanho, mtime) para ETag."""
+        result = []
+        for _, path in self._user_files(user_id):
+            stat = path.stat()
+            result.append((path.name, stat.st_size, stat.st_mtime_ns))
+        return tuple(result)
+
+    def _user_files(self, user_id: int) -> List[Tuple[Tuple[int, int], Path]]:
+        """Lista os arquivos do usuario ordenados por mes."""
+        directory = self._base_dir / f"user_{user_id}"
+        if not directory.is_dir():
+            return []
+        files = []
+        for path in directory.glob(f"*{ARCHIVE_SUFFIX}"):
+            year, month = path.name[: -len(ARCHIVE_SUFFIX)].split("-")
+            files.append(((int(year), int(month)), path))
+        return sorted(files)
+
+    def _path_for(self, user_id: int, created_at: datetime) -> Path:
+        """Caminho do arquivo de um usuario para o mes informado."""
+        return self._base_dir / f"user_{user_id}" / f"{created_at:%Y-%m}{ARCHIVE_SUFFIX}"
@@ -1,11 +1,39 @@
-from typing import List, Optional
+from datetime import datetime
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple
 
-from sqlalchemy import func
+from sqlalchemy import delete, func, update
+from sqlalchemy.orm import defer
 from sqlmodel import Session, select
 
+from app.core.metrics import timed_query
+from app.core.timing import span
 from app.models.email_model import Email
 
 
+EXPORT_COLUMNS = (
+    Email.id,
+    Email.email_destinatario,
+    Email.assunto,
+    Email.classification,
+    Email.respondido,
+    Email.respondido_em,
+    Email.created_at,
+    Email.updated_at,
+    Email.raw_body,
+    Email.generated_response,
+)
+
+HISTORY_COLUMNS = (
+    Email.id,
+    Email.email_destinatario,
+    Email.assunto,
+    Email.classification,
+    Email.respondido,
+    Email.respondido_em,
+    Email.created_at,
+)
+
+
 class EmailRepository:
     """Gerencia operacoes de persistencia relacionadas a emails."""
 
@@ -13,23 +41,46 @@ class EmailRepository:
         """Inicializa o repositorio com uma sessao ativa do banco."""
         self._session = session
 
+    @timed_query
     def get_by_id(self, email_id: int) -> Optional[Email]:
         """Busca um email pelo identificador unico."""
         return self._session.get(Email, email_id)
 
+    @timed_query
     def get_by_id_for_user(self, email_id: int, user_id: int) -> Optional[Email]:
         """Busca um email do usuario pelo identificador."""
         statement = select(Email).where(Email.id == email_id, Email.user_id == user_id)
         return self._session.exec(statement).first()
 
+    @timed_query
     def list_by_user(self, user_id: int, respondido: Optional[bool] = None) -> List[Email]:
-        """Lista emails de um usuario com filtro opcional por status de resposta."""
-        statement = select(Email).where(Email.user_id == user_id)
+        """Lista emails de um usuario com filtro opcional por status de resposta, sem carregar os corpos."""
+        statement = select(Email).options(defer(Email.raw_body), defer(Email.generated_response))
+        statement = statement.where(Email.user_id == user_id)
         if respondido is not None:
             statement = statement.where(Email.respondido == respondido)
         statement = statement.order_by(Email.created_at.desc())
         return list(self._session.exec(statement).all())
 
+    @timed_query
+    def list_history_rows(self, user_id: int, respondido: Optional[bool] = None) -> List[Dict[str, Any]]:
+        """Lista apenas as colunas do historico como dicionarios, sem entidades ORM."""
+        statement = select(*HISTORY_COLUMNS).where(Email.user_id == user_id)
+        if respondido is not None:
+            statement = statement.where(Email.respondido == respondido)
+        statement = statement.order_by(Email.created_at.desc())
+        return [dict(row._mapping) for row in self._session.exec(statement)]
+
+    @timed_query
+    def history_version(self, user_id: int, respondido: Optional[bool] = None) -> Tuple[int, Optional[datetime]]:
+        """Retorna quantidade e maior updated_at dos emails do usuario para validar caches."""
+        statement = select(func.count(Email.id), func.max(Email.updated_at)).where(Email.user_id == user_id)
+        if respondido is not None:
+            statement = statement.where(Email.respondido == respondido)
+        total, last_updated = self._session.exec(statement).one()
+        return int(total), last_updated
+
+    @timed_query
     def count_by_user(self, user_id: int, respondido: Optional[bool] = None) -> int:
         """Conta emails de um usuario com filtro opcional por status de resposta."""
         statement = select(func.count(Email.id)).where(Email.user_id == user_id)
@@ -37,16 +88,101 @@ class EmailRepository:
             statement = statement.where(Email.respondido == respondido)
         return int(self._session.exec(statement).one())
 
+    def iter_export_rows(
+        self,
+        user_id: int,
+        respondido: Optional[bool] = None,
+        classification: Optional[str] = None,
+        created_from: Optional[datetime] = None,
+        created_to: Optional[datetime] = None,
+        batch_size: int = 1000,
+    ) -> Iterator[Sequence[object]]:
+        """Percorre os emails do usuario com cursor no servidor, sem montar entidades ORM."""
+        statement = select(*EXPORT_COLUMNS).where(Email.user_id == user_id)
+        if respondido is not None:
+            statement = statement.where(Email.respondido == respondido)
+        if classification:
+            statement = statement.where(Email.classification == classification)
+        if created_from is not None:
+            statement = statement.where(Email.created_at >= created_from)
+        if created_to is not None:
+            statement = statement.where(Email.created_at < created_to)
+        statement = statement.order_by(Email.id).execution_options(yield_per=batch_size)
+        result = self._session.exec(statement)
+        try:
+            yield from result
+        finally:
+            result.close()
+
+    @timed_query
+    def list_archivable(self, cutoff: datetime, after_id: int, limit: int) -> List[Dict[str, Any]]:
+        """Lista, em ordem de id, emails criados antes do corte com todos os campos para arquivamento."""
+        statement = (
+            select(*EXPORT_COLUMNS, Email.user_id, Email.body_size, Email.normalized_hash)
+            .where(Email.created_at < cutoff, Email.id > after_id)
+            .order_by(Email.id)
+            .limit(limit)
+        )
+        return [dict(row._mapping) for row in self._session.exec(statement)]
+
+    @timed_query
+    def list_for_reclassification(
+        self, after_id: int, limit: int, include_corrected: bool = False
+    ) -> List[Dict[str, Any]]:
+        """Lista, em ordem de id, os campos necessarios para reclassificar o proximo lote."""
+        statement = self._reclassification_query(include_corrected).where(Email.id > after_id)
+        statement = statement.order_by(Email.id).limit(limit)
+        return [dict(row._mapping) for row in self._session.exec(statement)]
+
+    @timed_query
+    def list_for_reclassification_by_ids(
+        self, email_ids: List[int], include_corrected: bool = False
+    ) -> List[Dict[str, Any]]:
+        """Lista, em ordem de id, os campos para reclassificar os emails informados (ex.: falhas anteriores)."""
+        statement = self._reclassification_query(include_corrected).where(Email.id.in_(email_ids))
+        return [dict(row._mapping) for row in self._session.exec(statement.order_by(Email.id))]
+
+    def _reclassification_query(self, include_corrected: bool) -> Any:
+        """Consulta base da reclassificacao, sem os emails corrigidos pelo usuario salvo pedido explicito."""
+        statement = select(Email.id, Email.assunto, Email.raw_body, Email.classification, Email.classifier_tier)
+        if not include_corrected:
+            statement = statement.where((Email.classifier_tier.is_(None)) | (Email.classifier_tier != "user"))
+        return statement
+
+    @timed_query
+    def bulk_update_classification(self, rows: List[Dict[str, Any]]) -> None:
+        """Atualiza classificacao, score e nivel de varios emails numa unica instrucao e confirma."""
+        if rows:
+            self._session.execute(update(Email), rows)
+        self._session.commit()
+
+    @timed_query
+    def delete_by_ids(self, email_ids: List[int]) -> int:
+        """Remove emails pelos identificadores informados e confirma a transacao."""
+        result = self._session.exec(delete(Email).where(Email.id.in_(email_ids)))
+        self._session.commit()
+        return int(result.rowcount or 0)
+
+    @timed_query
     def create(self, email: Email) -> Email:
         """Persiste um novo email e retorna a entidade atualizada."""
-        self._session.add(email)
-        self._session.commit()
+        with span("db_write"):
+            self._session.add(email)
+            self._session.commit()
+            self._session.refresh(email)
+        return email
+
+    @timed_query
+    def refresh(self, email: Email) -> Email:
+        """Recarrega o email do banco, descartando o estado em memoria."""
         self._session.refresh(email)
         return email
 
+    @timed_query
     def update(self, email: Email) -> Email:
         """Atualiza um email existente e retorna a entidade persistida."""
-        self._session.add(email)
-        self._session.commit()
-        self._session.refresh(email)
+        with span("db_write"):
+            self._session.add(email)
+            self._session.commit()
+            self._session.refresh(email)
         return email
@@ -0,0 +1,84 @@
+from datetime import datetime
+from typing import Optional, Tuple
+
+from sqlalchemy import delete, update
+from sqlalchemy.exc import IntegrityError
+from sqlmodel import Session, select
+
+from app.core.metrics import timed_query
+from app.models.idempotency_model import IdempotencyKey
+
+
+class IdempotencyRepository:
+    """Gerencia os registros de chaves de idempotencia."""
+
+    def __init__(self, session: Session) -> None:
+        """Inicializa o repositorio com uma sessao ativa do banco."""
+        self._session = session
+
+    @timed_query
+    def get(self, user_id: int, key: str) -> Optional[IdempotencyKey]:
+        """Busca o registro da chave do usuario."""
+        statement = select(IdempotencyKey).where(IdempotencyKey.user_id == user_id, IdempotencyKey.key == key)
+        return self._session.exec(statement).first()
+
+    @timed_query
+    def claim(self, record: IdempotencyKey) -> Tuple[IdempotencyKey, bool]:
+        """Tenta reservar a chave; retorna o registro vigente e se a reserva foi obtida."""
+        self._session.add(record)
+        try:
+            self._session.commit()
+        except IntegrityError:
+            self._session.rollback()
+            existing = self.get(record.user_id, record.key)
+            if existing is None:
+                raise
+            return existing, False
+        self._session.refresh(record)
+        return record, True
+
+    @timed_query
+    def take_over(self, record_id: int, created_before: datetime, expires_at: datetime) -> bool:
+        """Assume uma execucao abandonada ou expirada, desde que ninguem a tenha assumido antes."""
+        result = self._session.exec(
+            update(IdempotencyKey)
+            .where(
+                IdempotencyKey.id == record_id,
+                ((IdempotencyKey.status == "in_progress") & (IdempotencyKey.created_at < created_before))
+                | (IdempotencyKey.expires_at <= datetime.utcnow()),
+            )
+            .values(
+                status="in_progress",
+                status_code=None,
+                response_body=None,
+                created_at=datetime.utcnow(),
+                expires_at=expires_at,
+            )
+        )
+        self._session.commit()
+        return bool(result.rowcount)
+
+    @timed_query
+    def complete(self, record_id: int, status_code: int, response_body: str) -> None:
+        """Grava a resposta final da execucao."""
+        self._session.exec(
+            update(IdempotencyKey)
+            .where(IdempotencyKey.id == record_id)
+            .values(status="completed", status_code=status_code, response_body=response_body)
+        )
+        self._session.commit()
+
+    @timed_query
+    def release(self, record_id: int) -> None:
+        """Libera a chave de uma execucao que falhou para permitir nova tentativa."""
+        self._session.exec(delete(IdempotencyKey).where(IdempotencyKey.id == record_id))
+        self._session.commit()
+
+    @timed_query
+    def purge_expired(self, now: datetime) -> int:
+        """Remove chaves expiradas."""
+        result = self._session.exec(
+            delete(IdempotencyKey).where(IdempotencyKey.expires_at <= now, IdempotencyKey.status == "completed")
+        )
+        self._session.commit()
+        return int(result.rowcount or 0)
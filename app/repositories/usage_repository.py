@@ -0,0 +1,64 @@
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+from sqlalchemy import case, func, insert
+from sqlmodel import Session, select
+
+from app.core.metrics import timed_query
+from app.models.usage_model import ProviderUsage
+
+SUCCESS_STATUSES = ("ok", "200")
+USAGE_GROUPS = {
+    "dia": func.date(ProviderUsage.created_at),
+    "usuario": ProviderUsage.user_id,
+    "email": ProviderUsage.email_id,
+}
+
+
+class UsageRepository:
+    """Gerencia a persistencia e a agregacao do uso de provedores de IA."""
+
+    def __init__(self, session: Session) -> None:
+        """Inicializa o repositorio com uma sessao ativa do banco."""
+        self._session = session
+
+    @timed_query
+    def insert_many(self, rows: List[Dict[str, Any]]) -> None:
+        """Insere varios registros de uso numa unica instrucao e confirma."""
+        if rows:
+            self._session.execute(insert(ProviderUsage), rows)
+            self._session.commit()
+
+    @timed_query
+    def rollup(
+        self,
+        group: str,
+        created_from: Optional[datetime] = None,
+        created_to: Optional[datetime] = None,
+        user_id: Optional[int] = None,
+        limit: int = 100,
+    ) -> List[Dict[str, Any]]:
+        """Agrega chamadas, erros, tokens, custo e latencia por dia, usuario ou email e provedor."""
+        key = USAGE_GROUPS[group].label("chave")
+        latency_total = func.sum(ProviderUsage.latency_ms)
+        statement = select(
+            key,
+            ProviderUsage.provider,
+            func.count(ProviderUsage.id).label("chamadas"),
+            func.sum(case((ProviderUsage.status.in_(SUCCESS_STATUSES), 0), else_=1)).label("erros"),
+            func.coalesce(func.sum(ProviderUsage.input_tokens), 0).label("tokens_entrada"),
+            func.coalesce(func.sum(ProviderUsage.output_tokens), 0).label("tokens_saida"),
+            func.coalesce(func.sum(ProviderUsage.cost), 0.0).label("custo"),
+            latency_total.label("latencia_total_ms"),
+            func.avg(ProviderUsage.latency_ms).label("latencia_media_ms"),
+            func.max(ProviderUsage.latency_ms).label("latencia_max_ms"),
+        )
+        if created_from is not None:
+            statement = statement.where(ProviderUsage.created_at >= created_from)
+        if created_to is not None:
+            statement = statement.where(ProviderUsage.created_at < created_to)
+        if user_id is not None:
+            statement = statement.where(ProviderUsage.user_id == user_id)
+        statement = statement.group_by(key, ProviderUsage.provider)
+        statement = statement.order_by(key) if group == "dia" else statement.order_by(latency_total.desc())
+        return [dict(row._mapping) for row in self._session.exec(statement.limit(limit))]
@@ -2,6 +2,7 @@ from typing import Optional
 
 from sqlmodel import Session, select
 
+from app.core.metrics import timed_query
 from app.models.user_model import User
 
 
@@ -12,15 +13,18 @@ class UserRepository:
         """Inicializa o repositorio com uma sessao ativa do banco."""
         self._session = session
 
+    @timed_query
     def get_by_id(self, user_id: int) -> Optional[User]:
         """Busca um usuario pelo identificador unico."""
         return self._session.get(User, user_id)
 
+    @timed_query
     def get_by_email(self, email_institucional: str) -> Optional[User]:
         """Busca um usuario pelo email institucional."""
         statement = select(User).where(User.email_institucional == email_institucional)
         return self._session.exec(statement).first()
 
+    @timed_query
     def create(self, user: User) -> User:
         """Persiste um novo usuario e retorna a entidade atualizada."""
         self._session.add(user)
@@ -28,6 +32,7 @@ class UserRepository:
         self._session.refresh(user)
         return user
 
+    @timed_query
     def update(self, user: User) -> User:
         """Atualiza um usuario existente e retorna a entidade persistida."""
         self._session.add(user)
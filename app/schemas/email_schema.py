@@ -1,5 +1,5 @@
 from datetime import datetime
-from typing import Optional
+from typing import Literal, Optional
 
 from pydantic import BaseModel, EmailStr
 
@@ -12,6 +12,12 @@ class EmailClassifyRequest(BaseModel):
     assunto: Optional[str] = None
 
 
+class EmailRelabelRequest(BaseModel):
+    """Define o payload para corrigir a classificacao de um email."""
+
+    classification: Literal["Produtivo", "Improdutivo", "Propaganda"]
+
+
 class EmailResponse(BaseModel):
     """Define o retorno da classificacao de email."""
 
@@ -1,8 +1,26 @@
+import csv
+import hashlib
+import io
+import itertools
+import json
 from datetime import datetime, timezone
-from typing import Any, List
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
 
+from app.core.cache import Cache
+from app.core.config import get_settings
+from app.core.metrics import record_cache_lookup
+from app.core.timing import span
+from app.core.usage import usage_scope
 from app.models.email_model import Email
-from app.repositories.email_repository import EmailRepository
+from app.nlp.classifier_cascade import CLASSIFIER_TIER_DECISIONS
+from app.nlp.classifier_client import CANDIDATE_LABELS, HYPOTHESIS_TEMPLATE
+from app.nlp.knn_classifier import KnnIndexStore
+from app.nlp.llm_client import PROMPT_VERSION
+from app.nlp.llm_router import build_backends
+from app.nlp.reply_templates import ReplyTemplateEngine, get_reply_template_engine
+from app.nlp.text_normalizer import normalized_hash, prepare_text
+from app.repositories.archive_repository import EmailArchiveRepository
+from app.repositories.email_repository import EXPORT_COLUMNS, HISTORY_COLUMNS, EmailRepository
 from app.schemas.email_schema import (
     EmailDetailResponse,
     EmailHistoryItem,
@@ -11,14 +29,66 @@ from app.schemas.email_schema import (
 )
 
 
+EXPORT_FIELDS = [column.key for column in EXPORT_COLUMNS]
+HISTORY_FIELDS = [column.key for column in HISTORY_COLUMNS]
+EXPORT_CHUNK_ROWS = 500
+CLASSIFICATION_CACHE_PREFIX = "classify:v2:"
+RESPONSE_CACHE_PREFIX = "reply:v1:"
+
+
+def _fingerprint(*parts: object) -> str:
+    """Resumo curto e estavel de uma configuracao."""
+    return hashlib.sha256(json.dumps(parts, default=str).encode("utf-8")).hexdigest()[:12]
+
+
+def classifier_fingerprint() -> str:
+    """Resumo da configuracao que altera a classificacao (modelos, rotulos, cascata e janelas)."""
+    settings = get_settings()
+    return _fingerprint(
+        settings.huggingface_model,
+        settings.local_classifier_model,
+        settings.local_classifier_quantize,
+        CANDIDATE_LABELS,
+        HYPOTHESIS_TEMPLATE,
+        settings.classifier_cascade,
+        settings.classifier_rules_threshold,
+        settings.classifier_local_threshold,
+        settings.classifier_window_tokens,
+        settings.classifier_window_overlap,
+        settings.classifier_max_windows,
+        settings.classifier_window_aggregation,
+        settings.classifier_window_first_n,
+    )
+
+
+def llm_fingerprint() -> str:
+    """Resumo da configuracao que altera as respostas geradas (backends, modelos e versao do prompt)."""
+    return _fingerprint(sorted((backend.endpoint, backend.model) for backend in build_backends()), PROMPT_VERSION)
+
+
 class EmailService:
     """Orquestra o fluxo de processamento, classificacao e persistencia de emails."""
 
-    def __init__(self, email_repository: EmailRepository, classifier_client: Any, llm_client: Any) -> None:
-        """Inicializa o servico com repositorio e clientes de NLP/LLM."""
+    def __init__(
+        self,
+        email_repository: EmailRepository,
+        classifier_client: Any,
+        llm_client: Any,
+        archive_repository: Optional[EmailArchiveRepository] = None,
+        cache: Optional[Cache] = None,
+        pregenerator: Any = None,
+        reply_templates: Optional[ReplyTemplateEngine] = None,
+        knn_index: Optional[KnnIndexStore] = None,
+    ) -> None:
+        """Inicializa o servico com repositorios e clientes de NLP/LLM."""
         self._email_repository = email_repository
         self._classifier_client = classifier_client
         self._llm_client = llm_client
+        self._archive_repository = archive_repository
+        self._cache = cache
+        self._pregenerator = pregenerator
+        self._reply_templates = reply_templates or get_reply_template_engine()
+        self._knn_index = knn_index
 
     def process_email(
         self,
@@ -28,21 +98,40 @@ class EmailService:
         assunto: str | None = None,
     ) -> EmailResponse:
         """Processa um email e retorna apenas a classificacao."""
-        classification_input = email_body
-        if assunto:
-            classification_input = f"Assunto: {assunto}\n\n{email_body}"
-        classification_result = self._classifier_client.classify_email(classification_input)
-        classification = self._extract_label(classification_result)
-
-        email = Email(
-            user_id=user_id,
-            email_destinatario=email_destinatario,
-            assunto=assunto,
-            raw_body=email_body,
-            classification=classification,
-            generated_response=None,
-        )
-        saved_email = self._email_repository.create(email)
+        body = prepare_text(email_body)
+        classification_input = prepare_text(f"Assunto: {assunto}\n\n{email_body}") if assunto else body
+        with usage_scope(user_id) as usage:
+            decision = self._classify_with_knn(user_id, classification_input)
+            input_hash = normalized_hash(classification_input)
+            cache_key = f"{CLASSIFICATION_CACHE_PREFIX}{classifier_fingerprint()}:{input_hash}"
+            if decision is None:
+                decision = self._cache_get("classification", cache_key)
+            if decision is None:
+                classification_result = self._classifier_client.classify_email(classification_input)
+                decision = {
+                    "label": self._extract_label(classification_result),
+                    "score": self._extract_score(classification_result),
+                    "tier": classification_result.get("tier") if isinstance(classification_result, dict) else None,
+                }
+                self._cache_set(cache_key, decision)
+            classification = decision["label"]
+
+            email = Email(
+                user_id=user_id,
+                email_destinatario=email_destinatario,
+                assunto=assunto,
+                raw_body=email_body,
+                body_size=len(email_body.encode("utf-8")),
+                normalized_hash=normalized_hash(body),
+                classification=classification,
+                classification_score=decision["score"],
+                classifier_tier=decision["tier"],
+                generated_response=None,
+            )
+            saved_email = self._email_repository.create(email)
+            usage.email_id = saved_email.id
+        if self._pregenerator is not None and saved_email.id and classification in self._pregeneration_labels():
+            self._pregenerator.submit(saved_email.id, user_id)
 
         return EmailResponse(
             id=saved_email.id or 0,
@@ -51,32 +140,122 @@ class EmailService:
             email_destinatario=saved_email.email_destinatario,
         )
 
-    def generate_response(self, email_id: int, user_id: int) -> EmailDetailResponse:
-        """Gera resposta sugerida para um email ja classificado."""
+    def relabel(self, email_id: int, user_id: int, classification: str) -> EmailDetailResponse:
+        """Corrige a classificacao do email e ensina o indice pessoal do usuario."""
+        email = self._email_repository.get_by_id_for_user(email_id, user_id)
+        if email is None:
+            raise ValueError("Email nao encontrado")
+        if email.classification != classification:
+            email.classification = classification
+            if not email.respondido:
+                email.generated_response = None
+        email.classification_score = 1.0
+        email.classifier_tier = "user"
+        email.updated_at = datetime.now(timezone.utc)
+        updated = self._email_repository.update(email)
+        self._learn(updated)
+        return self._to_detail_response(updated)
+
+    def generate_response(
+        self, email_id: int, user_id: int, regenerate: bool = False, force_llm: bool = False
+    ) -> EmailDetailResponse:
+        """Retorna a resposta ja gerada do email ou gera uma nova (sempre nova quando regenerate)."""
         email = self._email_repository.get_by_id_for_user(email_id, user_id)
         if email is None:
             raise ValueError("Email nao encontrado")
         if not email.classification:
             raise ValueError("Email sem classificacao")
+        if self._pregenerator is not None and not regenerate and not email.generated_response:
+            with span("pregeneration_wait"):
+                finished = self._pregenerator.wait(email_id, get_settings().pregeneration_wait_seconds)
+            if finished:
+                email = self._email_repository.refresh(email)
+            else:
+                self._pregenerator.cancel(email_id)
+        if email.generated_response and not regenerate:
+            return self._to_detail_response(email)
 
-        generated = self._llm_client.generate_response(email.classification, email.raw_body).strip()
-        if not generated:
-            raise ValueError("Resposta vazia gerada pelo modelo")
-        email.generated_response = generated
-        email.updated_at = datetime.utcnow()
+        email.generated_response = self._generate_text(email, use_cache=not regenerate, force_llm=force_llm)
+        email.updated_at = datetime.now(timezone.utc)
         updated = self._email_repository.update(email)
         return self._to_detail_response(updated)
 
+    def pregenerate_response(self, email_id: int, user_id: int, is_cancelled: Callable[[], bool]) -> bool:
+        """Gera e grava a resposta em segundo plano; descarta o resultado se o email foi respondido ou cancelado."""
+        email = self._email_repository.get_by_id_for_user(email_id, user_id)
+        if email is None or email.respondido or email.generated_response or is_cancelled():
+            return False
+        generated = self._generate_text(email, use_cache=True)
+        email = self._email_repository.refresh(email)
+        if email.respondido or email.generated_response or is_cancelled():
+            return False
+        email.generated_response = generated
+        email.updated_at = datetime.now(timezone.utc)
+        self._email_repository.update(email)
+        return True
+
+    def _generate_text(self, email: Email, use_cache: bool = True, force_llm: bool = False) -> str:
+        """Gera o texto da resposta por template ou pelo LLM, consultando o cache de resultados quando permitido."""
+        if not force_llm and self._reply_templates.supports(email.classification):
+            return self._reply_templates.render(email.classification, email.raw_body, email.assunto)
+        body = prepare_text(email.raw_body)
+        body_hash = email.normalized_hash or normalized_hash(body)
+        cache_key = f"{RESPONSE_CACHE_PREFIX}{llm_fingerprint()}:{email.classification}:{body_hash}"
+        generated = self._cache_get("response", cache_key) if use_cache else None
+        if generated is None:
+            with usage_scope(email.user_id, email.id):
+                generated = self._llm_client.generate_response(email.classification, body).strip()
+            if not generated:
+                raise ValueError("Resposta vazia gerada pelo modelo")
+            self._cache_set(cache_key, generated)
+        return generated
+
+    def _pregeneration_labels(self) -> List[str]:
+        """Classificacoes cujas respostas sao pre-geradas."""
+        return [label.strip() for label in get_settings().pregeneration_classifications.split(",") if label.strip()]
+
+    def _classify_with_knn(self, user_id: int, text: str) -> Optional[Dict[str, Any]]:
+        """Consulta o indice pessoal do usuario; retorna a decisao apenas quando confiante."""
+        if self._knn_index is None:
+            return None
+        prediction = self._knn_index.predict(user_id, text)
+        if prediction is None or float(prediction["score"]) < get_settings().knn_threshold:
+            return None
+        CLASSIFIER_TIER_DECISIONS.labels("knn").inc()
+        return {"label": prediction["label"], "score": prediction["score"], "tier": "knn"}
+
+    def _learn(self, email: Email) -> None:
+        """Inclui o email corrigido ou confirmado no indice pessoal do usuario."""
+        if self._knn_index is not None and email.id:
+            text = f"Assunto: {email.assunto}\n\n{email.raw_body}" if email.assunto else email.raw_body
+            self._knn_index.learn(email.user_id, email.id, text, email.classification)
+
+    def _cache_get(self, kind: str, key: str) -> Optional[Any]:
+        """Consulta o cache de resultados, registrando acerto ou falha por tipo."""
+        if self._cache is None:
+            return None
+        value = self._cache.get(key)
+        record_cache_lookup(kind, value is not None)
+        return value
+
+    def _cache_set(self, key: str, value: Any) -> None:
+        """Grava no cache de resultados quando configurado."""
+        if self._cache is not None:
+            self._cache.set(key, value)
+
     def mark_responded(self, email_id: int, user_id: int) -> EmailDetailResponse:
         """Marca um email do usuario como respondido e retorna os dados atualizados."""
         email = self._email_repository.get_by_id_for_user(email_id, user_id)
         if email is None:
             raise ValueError("Email nao encontrado")
 
+        if self._pregenerator is not None:
+            self._pregenerator.cancel(email_id)
         email.respondido = True
         email.respondido_em = datetime.now(timezone.utc)
         email.updated_at = datetime.now(timezone.utc)
         updated = self._email_repository.update(email)
+        self._learn(updated)
         return self._to_detail_response(updated)
 
     def list_history(self, user_id: int, respondido: bool | None = None) -> EmailHistoryResponse:
@@ -88,6 +267,73 @@ class EmailService:
             total=total,
         )
 
+    def list_history_payload(
+        self, user_id: int, respondido: bool | None = None, include_archived: bool = False
+    ) -> Dict[str, Any]:
+        """Monta o historico como dicionarios prontos para serializacao, sem validacao por linha."""
+        emails = self._email_repository.list_history_rows(user_id, respondido)
+        if include_archived and self._archive_repository is not None:
+            archived = [
+                {field: row[field] for field in HISTORY_FIELDS}
+                for row in self._archive_repository.iter_rows(user_id, respondido=respondido)
+            ]
+            archived.sort(key=lambda row: row["created_at"], reverse=True)
+            emails.extend(archived)
+        return {"emails": emails, "total": len(emails)}
+
+    def history_version(
+        self, user_id: int, respondido: bool | None = None, include_archived: bool = False
+    ) -> Tuple[object, ...]:
+        """Identifica a versao atual do historico do usuario para ETag."""
+        total, last_updated = self._email_repository.history_version(user_id, respondido)
+        archive_version: Tuple[object, ...] = ()
+        if include_archived and self._archive_repository is not None:
+            archive_version = self._archive_repository.version(user_id)
+        return ("history", user_id, respondido, total, last_updated, archive_version)
+
+    def export_history(
+        self,
+        user_id: int,
+        formato: str = "ndjson",
+        respondido: Optional[bool] = None,
+        classification: Optional[str] = None,
+        created_from: Optional[datetime] = None,
+        created_to: Optional[datetime] = None,
+        include_archived: bool = False,
+    ) -> Iterator[str]:
+        """Gera o historico completo do usuario em NDJSON ou CSV, em blocos de linhas."""
+        filters = {
+            "respondido": respondido,
+            "classification": classification,
+            "created_from": created_from,
+            "created_to": created_to,
+        }
+        rows: Iterable[Sequence[object]] = self._email_repository.iter_export_rows(user_id, **filters)
+        if include_archived and self._archive_repository is not None:
+            archived = (
+                [row.get(field) for field in EXPORT_FIELDS]
+                for row in self._archive_repository.iter_rows(user_id, **filters)
+            )
+            rows = itertools.chain(archived, rows)
+        encode = self._encode_csv_rows if formato == "csv" else self._encode_ndjson_rows
+        if formato == "csv":
+            yield self._encode_csv_rows([EXPORT_FIELDS])
+        chunk: List[Sequence[object]] = []
+        for row in rows:
+            chunk.append(row)
+            if len(chunk) >= EXPORT_CHUNK_ROWS:
+                yield encode(chunk)
+                chunk = []
+        if chunk:
+            yield encode(chunk)
+
+    def get_email_detail_payload(self, email_id: int, user_id: int) -> Tuple[Dict[str, Any], Tuple[object, ...]]:
+        """Retorna o detalhe como dicionario junto com a versao do email para ETag."""
+        email = self._email_repository.get_by_id_for_user(email_id, user_id)
+        if email is None:
+            raise ValueError("Email nao encontrado")
+        return self._to_detail_dict(email), ("email", user_id, email.id, email.updated_at)
+
     def get_email_detail(self, email_id: int, user_id: int) -> EmailDetailResponse:
         """Retorna o detalhe de um email especifico do usuario."""
         email = self._email_repository.get_by_id_for_user(email_id, user_id)
@@ -103,6 +349,31 @@ class EmailService:
                 return str(label)
         return str(classification_result)
 
+    def _extract_score(self, classification_result: Any) -> Optional[float]:
+        """Extrai o score de confianca retornado pelo cliente NLP, quando houver."""
+        if isinstance(classification_result, dict) and classification_result.get("score") is not None:
+            return float(classification_result["score"])
+        return None
+
+    def _encode_ndjson_rows(self, rows: List[Sequence[object]]) -> str:
+        """Serializa linhas do banco como objetos JSON, um por linha."""
+        lines = []
+        for row in rows:
+            record = {
+                field: value.isoformat() if isinstance(value, datetime) else value
+                for field, value in zip(EXPORT_FIELDS, row)
+            }
+            lines.append(json.dumps(record, ensure_ascii=False))
+        return "\n".join(lines) + "\n"
+
+    def _encode_csv_rows(self, rows: List[Sequence[object]]) -> str:
+        """Serializa linhas do banco no formato CSV."""
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        for row in rows:
+            writer.writerow([value.isoformat() if isinstance(value, datetime) else value for value in row])
+        return buffer.getvalue()
+
     def _to_history_item(self, email: Email) -> EmailHistoryItem:
         """Converte uma entidade Email em item de historico."""
         return EmailHistoryItem(
@@ -115,6 +386,20 @@ class EmailService:
             created_at=email.created_at,
         )
 
+    def _to_detail_dict(self, email: Email) -> Dict[str, Any]:
+        """Converte uma entidade Email no mesmo formato de EmailDetailResponse, sem validacao."""
+        return {
+            "id": email.id or 0,
+            "email_body": email.raw_body,
+            "email_destinatario": email.email_destinatario,
+            "assunto": email.assunto,
+            "classification": email.classification,
+            "generated_response": email.generated_response,
+            "respondido": email.respondido,
+            "respondido_em": email.respondido_em,
+            "created_at": email.created_at,
+        }
+
     def _to_detail_response(self, email: Email) -> EmailDetailResponse:
         """Converte uma entidade Email em resposta detalhada."""
         return EmailDetailResponse(
@@ -0,0 +1,132 @@
+import hashlib
+import json
+import threading
+import time
+from datetime import datetime, timedelta
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from sqlalchemy.engine import Engine
+from sqlmodel import Session
+
+from app.core.config import get_settings
+from app.core.database import get_engine
+from app.core.metrics import counter
+from app.models.idempotency_model import IdempotencyKey
+from app.repositories.idempotency_repository import IdempotencyRepository
+
+IDEMPOTENCY_REQUESTS = counter(
+    "idempotency_requests_total",
+    "Requisicoes com Idempotency-Key por desfecho.",
+    ("endpoint", "outcome"),
+)
+
+POLL_INTERVAL_SECONDS = 0.05
+PURGE_EVERY = 200
+
+
+class IdempotencyConflictError(ValueError):
+    """Chave de idempotencia reutilizada com requisicao diferente."""
+
+
+class IdempotencyInProgressError(RuntimeError):
+    """Execucao com a mesma chave ainda em andamento apos o tempo de espera."""
+
+
+def request_fingerprint(*parts: Any) -> str:
+    """Gera a impressao digital da requisicao a partir dos campos relevantes."""
+    digest = hashlib.sha256()
+    for part in parts:
+        digest.update(repr(part).encode("utf-8"))
+        digest.update(b"\x1f")
+    return digest.hexdigest()
+
+
+class IdempotencyService:
+    """Executa acoes no maximo uma vez por Idempotency-Key, repetindo a resposta gravada."""
+
+    _events: Dict[Tuple[int, str], threading.Event] = {}
+    _events_lock = threading.Lock()
+    _calls = 0
+
+    def __init__(self, engine: Optional[Engine] = None) -> None:
+        """Inicializa o servico com o engine usado para sessoes curtas e independentes."""
+        self._engine = engine
+
+    def execute(
+        self,
+        user_id: int,
+        key: str,
+        endpoint: str,
+        fingerprint: str,
+        action: Callable[[], Dict[str, Any]],
+    ) -> Tuple[Dict[str, Any], bool]:
+        """Executa a acao ou repete o resultado ja gravado; retorna (corpo, repetido)."""
+        settings = get_settings()
+        deadline = time.monotonic() + settings.idempotency_wait_seconds
+        self._maybe_purge()
+        waited = False
+        while True:
+            now = datetime.utcnow()
+            expires_at = now + timedelta(seconds=settings.idempotency_ttl_seconds)
+            with Session(self._engine or get_engine()) as session:
+                repository = IdempotencyRepository(session)
+                record, owned = repository.claim(
+                    IdempotencyKey(
+                        user_id=user_id,
+                        key=key,
+                        endpoint=endpoint,
+                        fingerprint=fingerprint,
+                        expires_at=expires_at,
+                    )
+                )
+                if not owned:
+                    if record.endpoint != endpoint or record.fingerprint != fingerprint:
+                        IDEMPOTENCY_REQUESTS.labels(endpoint, "conflict").inc()
+                        raise IdempotencyConflictError("Idempotency-Key reutilizada com outra requisicao")
+                    if record.status == "completed" and record.expires_at > now:
+                        IDEMPOTENCY_REQUESTS.labels(endpoint, "waited" if waited else "replayed").inc()
+                        return json.loads(record.response_body or "{}"), True
+                    stale_before = now - timedelta(seconds=settings.idempotency_lock_seconds)
+                    owned = repository.take_over(record.id or 0, stale_before, expires_at)
+                record_id = record.id or 0
+            if owned:
+                IDEMPOTENCY_REQUESTS.labels(endpoint, "executed").inc()
+                return self._run(user_id, key, record_id, action), False
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                IDEMPOTENCY_REQUESTS.labels(endpoint, "timeout").inc()
+                raise IdempotencyInProgressError("Requisicao com a mesma Idempotency-Key ainda em andamento")
+            waited = True
+            event = self._events.get((user_id, key))
+            if event is not None:
+                event.wait(min(remaining, 1.0))
+            else:
+                time.sleep(min(remaining, POLL_INTERVAL_SECONDS))
+
+    def _run(self, user_id: int, key: str, record_id: int, action: Callable[[], Dict[str, Any]]) -> Dict[str, Any]:
+        """Executa a acao como dona da chave, gravando o resultado ou liberando a chave em caso de erro."""
+        event = threading.Event()
+        with self._events_lock:
+            self._events[(user_id, key)] = event
+        try:
+            try:
+                body = action()
+            except BaseException:
+                with Session(self._engine or get_engine()) as session:
+                    IdempotencyRepository(session).release(record_id)
+                raise
+            with Session(self._engine or get_engine()) as session:
+                IdempotencyRepository(session).complete(record_id, 200, json.dumps(body, default=str))
+            return body
+        finally:
+            with self._events_lock:
+                self._events.pop((user_id, key), None)
+            event.set()
+
+    def _maybe_purge(self) -> None:
+        """Remove chaves expiradas periodicamente."""
+        IdempotencyService._calls += 1
+        if IdempotencyService._calls % PURGE_EVERY:
+            return
+        with Session(self._engine or get_engine()) as session:
+            IdempotencyRepository(session).purge_expired(datetime.utcnow())
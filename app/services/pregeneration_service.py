@@ -0,0 +1,172 @@
+import logging
+import queue
+import threading
+import time
+from collections import deque
+from typing import Any, Deque, Dict, List, Optional, Set, Tuple
+
+from sqlmodel import Session
+
+from app.core.cache import Cache
+from app.core.database import get_engine
+from app.core.metrics import counter, gauge
+from app.nlp.fair_scheduler import background_priority
+from app.repositories.email_repository import EmailRepository
+from app.services.email_service import EmailService
+
+logger = logging.getLogger(__name__)
+
+PREGENERATION_JOBS = counter(
+    "pregeneration_jobs_total",
+    "Pre-geracoes de resposta por desfecho.",
+    ("outcome",),
+)
+PREGENERATION_QUEUE = gauge("pregeneration_queue_size", "Pre-geracoes aguardando na fila.")
+
+BUDGET_WINDOW_SECONDS = 3600.0
+
+
+class PregenerationWorker:
+    """Gera respostas em segundo plano logo apos a classificacao, com fila e orcamento limitados."""
+
+    def __init__(
+        self,
+        llm_client: Any,
+        cache: Optional[Cache] = None,
+        queue_size: int = 100,
+        workers: int = 1,
+        budget_per_hour: int = 500,
+    ) -> None:
+        """Inicializa o worker; as threads so iniciam em start()."""
+        self._llm_client = llm_client
+        self._cache = cache
+        self._queue: "queue.Queue[Optional[Tuple[int, int]]]" = queue.Queue(maxsize=queue_size)
+        self._workers = workers
+        self._budget_per_hour = budget_per_hour
+        self._spent: Deque[float] = deque()
+        self._pending: Set[int] = set()
+        self._cancelled: Set[int] = set()
+        self._running: Dict[int, threading.Event] = {}
+        self._lock = threading.Lock()
+        self._threads: List[threading.Thread] = []
+        self._stopping = False
+
+    def start(self) -> None:
+        """Inicia as threads de pre-geracao."""
+        with self._lock:
+            self._stopping = False
+        for index in range(self._workers):
+            thread = threading.Thread(target=self._loop, name=f"pregeneration-{index}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+
+    def stop(self, timeout: float = 5.0) -> None:
+        """Recusa novos itens, descarta a fila, cancela o item em andamento e aguarda as threads."""
+        with self._lock:
+            self._stopping = True
+            self._cancelled.update(self._pending)
+        while True:
+            try:
+                item = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if item is not None:
+                PREGENERATION_JOBS.labels("cancelled").inc()
+                self._forget(item[0])
+        PREGENERATION_QUEUE.labels().set(0)
+        deadline = time.monotonic() + timeout
+        for _ in self._threads:
+            # A fila foi esvaziada e submit recusa novos itens, entao ha espaco para os sinais de encerramento.
+            self._queue.put(None, timeout=max(deadline - time.monotonic(), 0.01))
+        for thread in self._threads:
+            thread.join(max(deadline - time.monotonic(), 0.0))
+            if thread.is_alive():
+                logger.warning("Thread %s nao terminou a pre-geracao em %.1f s", thread.name, timeout)
+        self._threads = []
+
+    def submit(self, email_id: int, user_id: int) -> bool:
+        """Enfileira a pre-geracao se houver espaco e orcamento; nunca bloqueia o chamador."""
+        with self._lock:
+            if self._stopping:
+                return False
+            now = time.monotonic()
+            while self._spent and now - self._spent[0] > BUDGET_WINDOW_SECONDS:
+                self._spent.popleft()
+            if len(self._spent) >= self._budget_per_hour:
+                PREGENERATION_JOBS.labels("budget_exhausted").inc()
+                return False
+            try:
+                self._queue.put_nowait((email_id, user_id))
+            except queue.Full:
+                PREGENERATION_JOBS.labels("queue_full").inc()
+                return False
+            self._spent.append(now)
+            self._pending.add(email_id)
+            self._cancelled.discard(email_id)
+        PREGENERATION_JOBS.labels("queued").inc()
+        PREGENERATION_QUEUE.labels().set(self._queue.qsize())
+        return True
+
+    def cancel(self, email_id: int) -> None:
+        """Cancela a pre-geracao pendente do email (a chamada em andamento nao e gravada)."""
+        with self._lock:
+            if email_id in self._pending:
+                self._cancelled.add(email_id)
+
+    def is_cancelled(self, email_id: int) -> bool:
+        """Indica se a pre-geracao do email foi cancelada."""
+        with self._lock:
+            return email_id in self._cancelled
+
+    def pending_count(self) -> int:
+        """Quantidade de pre-geracoes enfileiradas ou em andamento."""
+        with self._lock:
+            return len(self._pending)
+
+    def wait(self, email_id: int, timeout: float) -> bool:
+        """Aguarda a pre-geracao em andamento do email; retorna False se nao havia nenhuma."""
+        with self._lock:
+            event = self._running.get(email_id)
+        if event is None:
+            return False
+        return event.wait(timeout)
+
+    def _loop(self) -> None:
+        """Consome a fila ate receber o sinal de encerramento."""
+        while True:
+            item = self._queue.get()
+            PREGENERATION_QUEUE.labels().set(self._queue.qsize())
+            if item is None:
+                return
+            email_id, user_id = item
+            if self.is_cancelled(email_id):
+                PREGENERATION_JOBS.labels("cancelled").inc()
+                self._forget(email_id)
+                continue
+            event = threading.Event()
+            with self._lock:
+                self._running[email_id] = event
+            try:
+                outcome = self._run(email_id, user_id)
+            except Exception as exc:
+                outcome = "failed"
+                logger.warning("Falha na pre-geracao do email %s: %s", email_id, exc)
+            finally:
+                with self._lock:
+                    self._running.pop(email_id, None)
+                event.set()
+                self._forget(email_id)
+            PREGENERATION_JOBS.labels(outcome).inc()
+
+    def _run(self, email_id: int, user_id: int) -> str:
+        """Executa a pre-geracao de um email em sessao propria, na fila de segundo plano do escalonador."""
+        with Session(get_engine()) as session, background_priority():
+            service = EmailService(EmailRepository(session), None, self._llm_client, cache=self._cache)
+            stored = service.pregenerate_response(email_id, user_id, lambda: self.is_cancelled(email_id))
+        return "generated" if stored else "skipped"
+
+    def _forget(self, email_id: int) -> None:
+        """Descarta o estado de um email ja tratado."""
+        with self._lock:
+            self._pending.discard(email_id)
+            self._cancelled.discard(email_id)
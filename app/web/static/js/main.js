@@ -269,7 +269,8 @@ async function generateResponse(isRegenerate) {
     toggleGenerateButtons(true);
     showToast(isRegenerate ? 'Gerando nova resposta' : 'Gerando resposta', '#0066cc');
     try {
-        const response = await fetch(`/api/v1/emails/${state.lastAnalysis.id}/generate-response`, {
+        const query = isRegenerate ? '?regenerar=true&usar_llm=true' : '';
+        const response = await fetch(`/api/v1/emails/${state.lastAnalysis.id}/generate-response${query}`, {
             method: 'POST',
             headers: state.token ? { Authorization: `Bearer ${state.token}` } : undefined,
         });
@@ -341,6 +342,7 @@ async function markResponded() {
 
 async function fetchHistory() {
     const response = await fetch('/api/v1/emails/history', {
+        cache: 'no-cache',
         headers: state.token ? { Authorization: `Bearer ${state.token}` } : undefined,
     });
 
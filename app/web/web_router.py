@@ -6,6 +6,14 @@ from fastapi.templating import Jinja2Templates
 templates = Jinja2Templates(directory="app/web/templates")
 router = APIRouter()
 
+PAGE_TEMPLATES = ("base.html", "index.html", "login.html", "history.html")
+
+
+def prime_templates() -> None:
+    """Compila os templates das paginas para evitar o custo na primeira requisicao."""
+    for name in PAGE_TEMPLATES:
+        templates.get_template(name)
+
 
 @router.get("/", response_class=HTMLResponse)
 def dashboard(request: Request) -> HTMLResponse:
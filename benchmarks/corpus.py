@@ -0,0 +1,106 @@
+import random
+from dataclasses import dataclass
+from typing import List
+
+NAMES = ["Ana Souza", "Carlos Lima", "Fernanda Rocha", "Joao Pereira", "Mariana Alves", "Rafael Costa"]
+SIGNATURES = [
+    "\n\nAtenciosamente,\n{name}\nAnalista Financeiro\nTel: (11) 4002-8922",
+    "\n\nAtt,\n{name}",
+    "\n\nObrigado,\n{name}\nSuporte Tecnico",
+    "\n\nCordialmente,\n{name}\nCoordenacao de Operacoes\nEsta mensagem pode conter informacao confidencial.",
+]
+DISCLAIMER = (
+    "\n\nAVISO: Esta mensagem e seus anexos sao confidenciais e destinados exclusivamente ao destinatario. "
+    "Se voce recebeu esta mensagem por engano, notifique o remetente e apague-a imediatamente. "
+    "A divulgacao, copia ou distribuicao nao autorizada e proibida."
+)
+PRODUCTIVE = [
+    "Preciso que voces verifiquem o chamado {ticket} aberto ontem, o sistema de faturamento continua fora do ar.",
+    "Solicito o envio da nota fiscal referente ao pedido {ticket} ate sexta-feira, e urgente para o fechamento.",
+    "Aguardo retorno sobre a aprovacao do orcamento {ticket}, temos prazo ate o fim do mes.",
+    "Favor enviar uma equipe para a manutencao do servidor da filial, o chamado {ticket} esta com prioridade alta.",
+    "Poderiam atualizar o status da solicitacao {ticket}? O cliente esta cobrando uma posicao.",
+]
+UNPRODUCTIVE = [
+    "Feliz aniversario! Desejo muitas felicidades e sucesso neste novo ciclo.",
+    "Passando para agradecer pelo cafe de ontem, foi otimo conversar com todos.",
+    "Bom fim de semana a todos, nos vemos na segunda.",
+    "Alguem sabe se o restaurante da esquina abre no feriado?",
+]
+ADVERTISING = [
+    "Promocao imperdivel: 50% de desconto em todos os planos ate domingo! Clique e aproveite.",
+    "Oferta exclusiva para voce: frete gratis e cashback na primeira compra. Propaganda.",
+    "Nao perca! Webinar gratuito sobre marketing digital com brindes para os participantes.",
+]
+FILLER = [
+    "Conforme conversamos na reuniao de alinhamento, os indicadores do trimestre ficaram abaixo da meta.",
+    "Segue em anexo a planilha com os valores consolidados e as observacoes da equipe de controladoria.",
+    "Ressalto que o contrato preve multa em caso de atraso superior a cinco dias uteis.",
+    "A equipe de infraestrutura informou que a janela de manutencao sera no sabado pela manha.",
+    "Precisamos revisar os acessos dos usuarios desligados antes da auditoria externa.",
+]
+
+
+@dataclass(frozen=True)
+class CorpusEmail:
+    """Email sintetico com rotulo de referencia e categoria de tamanho."""
+
+    kind: str
+    label: str
+    subject: str
+    body: str
+
+
+def _base_message(rng: random.Random) -> tuple[str, str]:
+    """Escolhe rotulo e frase principal do email."""
+    label = rng.choices(["Produtivo", "Improdutivo", "Propaganda"], weights=[6, 2, 2])[0]
+    source = {"Produtivo": PRODUCTIVE, "Improdutivo": UNPRODUCTIVE, "Propaganda": ADVERTISING}[label]
+    return label, rng.choice(source).format(ticket=f"#{rng.randint(1000, 99999)}")
+
+
+def _signature(rng: random.Random) -> str:
+    """Gera uma assinatura comum em emails corporativos."""
+    return rng.choice(SIGNATURES).format(name=rng.choice(NAMES))
+
+
+def short_email(rng: random.Random) -> CorpusEmail:
+    """Email curto de uma ou duas frases com assinatura."""
+    label, message = _base_message(rng)
+    body = f"Ola,\n\n{message}{_signature(rng)}"
+    return CorpusEmail("short", label, message[:40], body)
+
+
+def long_email(rng: random.Random) -> CorpusEmail:
+    """Email longo com varios paragrafos, assinatura e aviso legal."""
+    label, message = _base_message(rng)
+    paragraphs = [message] + [" ".join(rng.choices(FILLER, k=4)) for _ in range(rng.randint(4, 8))]
+    body = "Prezados,\n\n" + "\n\n".join(paragraphs) + _signature(rng) + DISCLAIMER
+    return CorpusEmail("long", label, message[:40], body)
+
+
+def forwarded_thread(rng: random.Random) -> CorpusEmail:
+    """Thread encaminhada com respostas citadas e cabecalhos de encaminhamento."""
+    label, message = _base_message(rng)
+    parts = [f"{message}{_signature(rng)}"]
+    for depth in range(rng.randint(3, 6)):
+        sender = rng.choice(NAMES)
+        quoted = "\n".join(f"> {line}" for line in " ".join(rng.choices(FILLER, k=3)).split(". "))
+        if depth % 2 == 0:
+            parts.append(
+                "\n\n---------- Mensagem encaminhada ----------\n"
+                f"De: {sender} <{sender.split()[0].lower()}@empresa.com>\n"
+                "Data: seg., 10 de jun. de 2024 as 09:15\n"
+                "Assunto: RE: Acompanhamento\n"
+                f"Para: equipe@empresa.com\n\n{' '.join(rng.choices(FILLER, k=3))}"
+            )
+        else:
+            parts.append(f"\n\nEm ter., 11 de jun. de 2024 as 14:02, {sender} escreveu:\n{quoted}")
+    body = "".join(parts) + DISCLAIMER
+    return CorpusEmail("forwarded", label, f"ENC: {message[:30]}", body)
+
+
+def build_corpus(size: int = 300, seed: int = 42) -> List[CorpusEmail]:
+    """Gera corpus deterministico misturando emails curtos, longos e encaminhados."""
+    rng = random.Random(seed)
+    builders = [short_email, long_email, forwarded_thread]
+    return [builders[index % len(builders)](rng) for index in range(size)]
@@ -0,0 +1,67 @@
+"""Relatorio do custo de importacao por modulo na inicializacao da aplicacao.
+
+Executa `python -X importtime` em um processo limpo e lista os modulos mais caros
+(tempo proprio e acumulado), opcionalmente gravando o resultado em JSON.
+
+Uso:
+    python -m benchmarks.import_time --top 25 --output bench_results/import_time.json
+"""
+import argparse
+import os
+import subprocess
+import sys
+import time
+from typing import Dict, List
+
+from benchmarks.common import format_table, run_metadata, write_report
+
+
+def measure_imports(target: str) -> Dict[str, object]:
+    """Importa o modulo alvo em processo novo e coleta os tempos por modulo (us)."""
+    env = {**os.environ}
+    env.setdefault("SECRET_KEY", "import-time")
+    env.setdefault("DATABASE_URL", "sqlite://")
+    started = time.perf_counter()
+    completed = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {target}"],
+        capture_output=True,
+        text=True,
+        env=env,
+        check=True,
+    )
+    wall = time.perf_counter() - started
+    modules: List[Dict[str, object]] = []
+    for line in completed.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        modules.append({
+            "module": name.strip(),
+            "depth": (len(name) - len(name.lstrip())) // 2,
+            "self_us": int(self_us),
+            "cumulative_us": int(cumulative_us),
+        })
+    return {"target": target, "wall_seconds": round(wall, 3), "modules": modules}
+
+
+def main() -> None:
+    """Imprime os modulos mais caros e grava o relatorio."""
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--target", default="app.main")
+    parser.add_argument("--top", type=int, default=20)
+    parser.add_argument("--output", default="bench_results/import_time.json")
+    args = parser.parse_args()
+
+    report = measure_imports(args.target)
+    modules = report["modules"]
+    top_level = [item for item in modules if item["module"].split(".")[0] == "app" or item["depth"] <= 1]
+    rows = [["modulo", "acumulado (ms)", "proprio (ms)"]]
+    for item in sorted(top_level, key=lambda item: item["cumulative_us"], reverse=True)[: args.top]:
+        rows.append([item["module"], f"{item['cumulative_us'] / 1000:.1f}", f"{item['self_us'] / 1000:.1f}"])
+    print(format_table(rows))
+    print(f"\nTempo total do processo (import de {args.target}): {report['wall_seconds']}s")
+    write_report(args.output, {"metadata": run_metadata(), **report})
+
+
+if __name__ == "__main__":
+    main()
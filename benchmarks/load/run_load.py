@@ -0,0 +1,262 @@
+"""Teste de carga ponta a ponta com provedores de IA simulados localmente.
+
+Sobe os stubs HF/LLM, inicia a aplicacao com uvicorn apontando para eles (ou usa --base-url),
+dispara o cenario em taxa aberta (open-loop) e grava p50/p95/p99, vazao e erros em JSON.
+
+Uso:
+    python -m benchmarks.load.run_load --scenario mixed --output bench_results/load.json
+    python -m benchmarks.load.run_load --scenario smoke --compare bench_results/load.json
+"""
+import argparse
+import asyncio
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import time
+from collections import defaultdict
+from dataclasses import replace
+from typing import Dict, List, Optional, Tuple
+
+import httpx
+
+from benchmarks.common import format_table, latency_summary, load_report, run_metadata, write_report
+from benchmarks.corpus import build_corpus
+from benchmarks.load.scenarios import SCENARIOS, Scenario
+from benchmarks.load.stub_servers import add_stub_arguments, start_stubs
+
+LOAD_USER = "carga@empresa.com"
+LOAD_PASSWORD = "senha-carga"
+
+
+class LoadRecorder:
+    """Acumula latencias e status por endpoint durante a janela medida."""
+
+    def __init__(self) -> None:
+        """Inicializa estruturas vazias."""
+        self.latencies: Dict[str, List[float]] = defaultdict(list)
+        self.statuses: Dict[str, Dict[str, int]] = defaultdict(lambda: defaultdict(int))
+        self.dropped = 0
+
+    def record(self, endpoint: str, status: str, latency: float) -> None:
+        """Registra o resultado de uma requisicao."""
+        self.latencies[endpoint].append(latency)
+        self.statuses[endpoint][status] += 1
+
+    def summary(self, elapsed: float) -> Dict[str, object]:
+        """Gera o resumo por endpoint e agregado."""
+        endpoints = {}
+        all_latencies: List[float] = []
+        total_errors = 0
+        for endpoint, latencies in sorted(self.latencies.items()):
+            statuses = dict(self.statuses[endpoint])
+            errors = sum(count for status, count in statuses.items() if not status.startswith("2") and status != "304")
+            total_errors += errors
+            all_latencies.extend(latencies)
+            endpoints[endpoint] = {
+                "requests": len(latencies),
+                "throughput_rps": round(len(latencies) / elapsed, 3),
+                "error_rate": round(errors / len(latencies), 4) if latencies else 0.0,
+                "statuses": statuses,
+                **latency_summary(latencies),
+            }
+        total = len(all_latencies)
+        return {
+            "overall": {
+                "requests": total,
+                "throughput_rps": round(total / elapsed, 3),
+                "error_rate": round(total_errors / total, 4) if total else 0.0,
+                "dropped": self.dropped,
+                **latency_summary(all_latencies),
+            },
+            "endpoints": endpoints,
+        }
+
+
+class LoadDriver:
+    """Executa as requisicoes do cenario contra a aplicacao."""
+
+    def __init__(self, client: httpx.AsyncClient, token: str, seed: int = 11) -> None:
+        """Prepara o driver com token autenticado e corpus sintetico."""
+        self._client = client
+        self._headers = {"Authorization": f"Bearer {token}"}
+        self._corpus = build_corpus(200, seed=seed)
+        self._rng = random.Random(seed)
+        self._email_ids: List[int] = []
+
+    async def run_one(self, endpoint: str) -> Tuple[str, str, float]:
+        """Executa uma requisicao do tipo informado e retorna endpoint, status e latencia."""
+        if endpoint == "generate" and not self._email_ids:
+            endpoint = "classify"
+        started = time.perf_counter()
+        try:
+            if endpoint == "classify":
+                email = self._rng.choice(self._corpus)
+                response = await self._client.post(
+                    "/api/v1/emails/classify",
+                    headers=self._headers,
+                    data={"email_destinatario": "cliente@empresa.com", "assunto": email.subject, "email_body": email.body},
+                )
+                if response.status_code == 200:
+                    self._email_ids.append(response.json()["id"])
+                    del self._email_ids[:-500]
+            elif endpoint == "generate":
+                email_id = self._rng.choice(self._email_ids)
+                response = await self._client.post(f"/api/v1/emails/{email_id}/generate-response", headers=self._headers)
+            else:
+                response = await self._client.get("/api/v1/emails/history", headers=self._headers)
+            status = str(response.status_code)
+        except httpx.HTTPError as exc:
+            status = type(exc).__name__
+        return endpoint, status, time.perf_counter() - started
+
+
+async def run_scenario(base_url: str, scenario: Scenario, max_in_flight: int, timeout: float) -> Dict[str, object]:
+    """Dispara o cenario em taxa constante e retorna o resumo medido."""
+    limits = httpx.Limits(max_connections=max_in_flight, max_keepalive_connections=max_in_flight)
+    async with httpx.AsyncClient(base_url=base_url, timeout=timeout, limits=limits) as client:
+        login = await client.post("/api/v1/auth/login", json={"email": LOAD_USER, "senha": LOAD_PASSWORD})
+        login.raise_for_status()
+        driver = LoadDriver(client, login.json()["access_token"])
+        recorder = LoadRecorder()
+        endpoints = list(scenario.mix.keys())
+        weights = list(scenario.mix.values())
+        rng = random.Random(3)
+        semaphore = asyncio.Semaphore(max_in_flight)
+        tasks = []
+        interval = 1.0 / scenario.rps
+        start = time.perf_counter()
+        measure_from = start + scenario.warmup
+        end = measure_from + scenario.duration
+
+        async def fire(endpoint: str, scheduled: float) -> None:
+            async with semaphore:
+                name, status, latency = await driver.run_one(endpoint)
+            if scheduled >= measure_from:
+                recorder.record(name, status, latency)
+
+        next_at = start
+        while next_at < end:
+            now = time.perf_counter()
+            if next_at > now:
+                await asyncio.sleep(next_at - now)
+            if semaphore.locked() and next_at >= measure_from:
+                recorder.dropped += 1
+            else:
+                endpoint = rng.choices(endpoints, weights=weights)[0]
+                tasks.append(asyncio.create_task(fire(endpoint, next_at)))
+            next_at += interval
+        await asyncio.gather(*tasks)
+        return recorder.summary(scenario.duration)
+
+
+def start_app(hf_url: str, llm_url: str, port: int, workers: int, database_url: Optional[str]) -> subprocess.Popen:
+    """Inicia a aplicacao com uvicorn apontando para os stubs e espera o health check."""
+    tmpdir = tempfile.mkdtemp(prefix="load-")
+    env = {
+        **os.environ,
+        "DATABASE_URL": database_url or f"sqlite:///{tmpdir}/load.db",
+        "SECRET_KEY": "load-test-secret",
+        "ENVIRONMENT": "development",
+        "SEED_ENABLED": "true",
+        "SEED_EMAIL": LOAD_USER,
+        "SEED_PASSWORD": LOAD_PASSWORD,
+        "HUGGINGFACE_API_KEY": "stub",
+        "HUGGINGFACE_ENDPOINT_BASE": f"{hf_url}/models",
+        "LLM_API_KEY": "stub",
+        "LLM_ENDPOINT": f"{llm_url}/v1/chat/completions",
+        "RATE_LIMIT_ENABLED": os.environ.get("RATE_LIMIT_ENABLED", "false"),
+    }
+    command = [
+        sys.executable, "-m", "uvicorn", "app.main:app",
+        "--port", str(port), "--workers", str(workers), "--log-level", "warning",
+    ]
+    process = subprocess.Popen(command, env=env)
+    deadline = time.time() + 60
+    while time.time() < deadline:
+        try:
+            if httpx.get(f"http://127.0.0.1:{port}/api/v1/health/ready", timeout=1).status_code == 200:
+                return process
+        except httpx.HTTPError:
+            pass
+        if process.poll() is not None:
+            raise RuntimeError("A aplicacao encerrou durante a inicializacao")
+        time.sleep(0.3)
+    process.terminate()
+    raise RuntimeError("A aplicacao nao respondeu ao health check em 60s")
+
+
+def compare_reports(current: Dict[str, object], baseline: Dict[str, object]) -> str:
+    """Gera tabela comparando latencias e vazao com um relatorio anterior."""
+    rows = [["endpoint", "metrica", "baseline", "atual", "delta"]]
+    for endpoint, metrics in current["results"]["endpoints"].items():
+        previous = baseline.get("results", {}).get("endpoints", {}).get(endpoint)
+        if not previous:
+            continue
+        for key in ("p50_ms", "p95_ms", "p99_ms", "throughput_rps", "error_rate"):
+            old, new = previous.get(key, 0.0), metrics.get(key, 0.0)
+            delta = f"{(new - old) / old * 100:+.1f}%" if old else "n/a"
+            rows.append([endpoint, key, f"{old}", f"{new}", delta])
+    return format_table(rows)
+
+
+def main() -> None:
+    """Executa o teste de carga conforme argumentos de linha de comando."""
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--scenario", default="smoke", choices=sorted(SCENARIOS))
+    parser.add_argument("--rps", type=float, help="Sobrescreve a taxa alvo do cenario")
+    parser.add_argument("--duration", type=float, help="Sobrescreve a duracao medida (s)")
+    parser.add_argument("--base-url", help="Usa uma aplicacao ja em execucao em vez de iniciar uma local")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--workers", type=int, default=1)
+    parser.add_argument("--database-url", help="Banco da aplicacao local (padrao: SQLite temporario)")
+    parser.add_argument("--max-in-flight", type=int, default=64)
+    parser.add_argument("--timeout", type=float, default=60.0)
+    parser.add_argument("--output", default="bench_results/load.json")
+    parser.add_argument("--compare", help="Relatorio JSON anterior para comparacao")
+    add_stub_arguments(parser)
+    args = parser.parse_args()
+
+    scenario = SCENARIOS[args.scenario]
+    if args.rps:
+        scenario = replace(scenario, rps=args.rps)
+    if args.duration:
+        scenario = replace(scenario, duration=args.duration)
+
+    hf, llm = start_stubs(args)
+    process = None
+    try:
+        base_url = args.base_url
+        if not base_url:
+            process = start_app(hf.base_url, llm.base_url, args.port, args.workers, args.database_url)
+            base_url = f"http://127.0.0.1:{args.port}"
+        results = asyncio.run(run_scenario(base_url, scenario, args.max_in_flight, args.timeout))
+    finally:
+        if process is not None:
+            process.terminate()
+            process.wait(timeout=10)
+        hf.stop()
+        llm.stop()
+
+    report = {
+        "metadata": run_metadata(),
+        "scenario": {"name": scenario.name, "rps": scenario.rps, "duration": scenario.duration, "mix": scenario.mix},
+        "stubs": {"hf": hf.behavior.stats, "llm": llm.behavior.stats, "options": {
+            key: value for key, value in vars(args).items() if key.startswith(("hf_", "llm_"))
+        }},
+        "results": results,
+    }
+    write_report(args.output, report)
+    overall = results["overall"]
+    print(
+        f"{scenario.name}: {overall['requests']} req, {overall['throughput_rps']} rps, "
+        f"p50={overall['p50_ms']}ms p95={overall['p95_ms']}ms p99={overall['p99_ms']}ms "
+        f"erros={overall['error_rate']:.2%} -> {args.output}"
+    )
+    if args.compare:
+        print(compare_reports(report, load_report(args.compare)))
+
+
+if __name__ == "__main__":
+    main()
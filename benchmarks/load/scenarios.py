@@ -0,0 +1,21 @@
+from dataclasses import dataclass, field
+from typing import Dict
+
+
+@dataclass(frozen=True)
+class Scenario:
+    """Define a mistura de endpoints, taxa alvo e duracao de um teste de carga."""
+
+    name: str
+    rps: float
+    duration: float
+    mix: Dict[str, float] = field(default_factory=dict)
+    warmup: float = 5.0
+
+
+SCENARIOS: Dict[str, Scenario] = {
+    "smoke": Scenario("smoke", rps=2, duration=15, mix={"classify": 0.6, "generate": 0.2, "history": 0.2}, warmup=2),
+    "classify-heavy": Scenario("classify-heavy", rps=20, duration=60, mix={"classify": 0.8, "history": 0.2}),
+    "mixed": Scenario("mixed", rps=15, duration=120, mix={"classify": 0.5, "generate": 0.2, "history": 0.3}),
+    "history-polling": Scenario("history-polling", rps=50, duration=60, mix={"history": 0.9, "classify": 0.1}),
+}
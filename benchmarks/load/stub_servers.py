@@ -0,0 +1,252 @@
+"""Servidores locais que imitam a API zero-shot do Hugging Face e chat completions da OpenAI.
+
+Uso:
+    python -m benchmarks.load.stub_servers --hf-port 9001 --llm-port 9002 --latency lognormal:0.25:0.6
+"""
+import argparse
+import json
+import random
+import threading
+import time
+from dataclasses import dataclass
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List, Tuple
+
+
+@dataclass
+class LatencyModel:
+    """Distribuicao de latencia simulada (constant, uniform, lognormal)."""
+
+    kind: str = "constant"
+    a: float = 0.0
+    b: float = 0.0
+
+    @classmethod
+    def parse(cls, spec: str) -> "LatencyModel":
+        """Interpreta especificacoes como 'constant:0.2', 'uniform:0.1:0.5' ou 'lognormal:0.3:0.5'."""
+        kind, *params = spec.split(":")
+        values = [float(value) for value in params] + [0.0, 0.0]
+        return cls(kind=kind, a=values[0], b=values[1])
+
+    def sample(self, rng: random.Random) -> float:
+        """Sorteia uma latencia em segundos."""
+        if self.kind == "uniform":
+            return rng.uniform(self.a, self.b)
+        if self.kind == "lognormal":
+            # a = mediana em segundos, b = sigma
+            return self.a * rng.lognormvariate(0.0, self.b)
+        return self.a
+
+
+class StubBehavior:
+    """Comportamento configuravel: latencia, taxa de erro e limite de requisicoes com 429."""
+
+    def __init__(
+        self,
+        latency: LatencyModel,
+        error_rate: float = 0.0,
+        rate_limit_rpm: int = 0,
+        seed: int = 7,
+    ) -> None:
+        """Inicializa o comportamento; rate_limit_rpm=0 desativa o limite."""
+        self.latency = latency
+        self.error_rate = error_rate
+        self.rate_limit_rpm = rate_limit_rpm
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self._window_start = time.time()
+        self._window_count = 0
+        self.stats = {"requests": 0, "errors": 0, "rate_limited": 0}
+
+    def decide(self) -> Tuple[float, int, Dict[str, str]]:
+        """Retorna latencia, status HTTP e headers de rate limit da proxima resposta."""
+        with self._lock:
+            self.stats["requests"] += 1
+            delay = self.latency.sample(self._rng)
+            headers: Dict[str, str] = {}
+            if self.rate_limit_rpm:
+                now = time.time()
+                if now - self._window_start >= 60:
+                    self._window_start = now
+                    self._window_count = 0
+                self._window_count += 1
+                reset = max(60 - (now - self._window_start), 0.0)
+                remaining = max(self.rate_limit_rpm - self._window_count, 0)
+                headers = {
+                    "x-ratelimit-limit-requests": str(self.rate_limit_rpm),
+                    "x-ratelimit-remaining-requests": str(remaining),
+                    "x-ratelimit-reset-requests": f"{reset:.0f}s",
+                }
+                if self._window_count > self.rate_limit_rpm:
+                    self.stats["rate_limited"] += 1
+                    headers["retry-after"] = f"{max(int(reset), 1)}"
+                    return 0.0, 429, headers
+            if self._rng.random() < self.error_rate:
+                self.stats["errors"] += 1
+                return delay, 503, headers
+            return delay, 200, headers
+
+
+def _classify_labels(text: str, labels: List[str]) -> Tuple[List[str], List[float]]:
+    """Gera scores plausiveis priorizando rotulos por palavras-chave."""
+    lowered = text.lower()
+    if any(word in lowered for word in ("promocao", "oferta", "desconto", "propaganda")):
+        preferred = "Propaganda"
+    elif any(word in lowered for word in ("urgente", "solicito", "preciso", "aguardo", "chamado")):
+        preferred = "Produtivo"
+    else:
+        preferred = "Improdutivo"
+    ordered = sorted(labels, key=lambda label: 0 if label.startswith(preferred) else 1)
+    top = 0.72
+    rest = (1 - top) / max(len(ordered) - 1, 1)
+    return ordered, [top] + [rest] * (len(ordered) - 1)
+
+
+def _make_handler(behavior: StubBehavior, kind: str):
+    """Cria o handler HTTP para o tipo de stub ('hf' ou 'llm')."""
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def log_message(self, format: str, *args: Any) -> None:
+            return
+
+        def _reply(self, status: int, body: Dict[str, Any], headers: Dict[str, str]) -> None:
+            payload = json.dumps(body).encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(payload)))
+            for key, value in headers.items():
+                self.send_header(key, value)
+            self.end_headers()
+            self.wfile.write(payload)
+
+        def do_HEAD(self) -> None:
+            self.send_response(200)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+
+        def do_POST(self) -> None:
+            length = int(self.headers.get("Content-Length") or 0)
+            request = json.loads(self.rfile.read(length) or b"{}")
+            delay, status, headers = behavior.decide()
+            if delay:
+                time.sleep(delay)
+            if status == 429:
+                self._reply(429, {"error": "Rate limit exceeded"}, headers)
+                return
+            if status != 200:
+                self._reply(status, {"error": "Servico temporariamente indisponivel"}, headers)
+                return
+            if kind == "hf":
+                self._reply(200, _hf_response(request), headers)
+            else:
+                self._reply(200, _llm_response(request), headers)
+
+    return Handler
+
+
+def _hf_response(request: Dict[str, Any]) -> Any:
+    """Monta resposta no formato da API zero-shot (um item ou lista para batch)."""
+    inputs = request.get("inputs", "")
+    labels = request.get("parameters", {}).get("candidate_labels", [])
+    items = inputs if isinstance(inputs, list) else [inputs]
+    results = []
+    for text in items:
+        ordered, scores = _classify_labels(str(text), labels)
+        results.append({"sequence": str(text)[:64], "labels": ordered, "scores": scores})
+    return results if isinstance(inputs, list) else results[0]
+
+
+def _llm_response(request: Dict[str, Any]) -> Dict[str, Any]:
+    """Monta resposta no formato de chat completions com campo usage."""
+    prompt = " ".join(message.get("content", "") for message in request.get("messages", []))
+    content = (
+        "Prezado(a), agradecemos o contato. Recebemos sua mensagem e ja estamos analisando a solicitacao. "
+        "Retornaremos com uma posicao em ate um dia util."
+    )
+    return {
+        "id": "stub-completion",
+        "model": request.get("model", "stub"),
+        "choices": [{"index": 0, "message": {"role": "assistant", "content": content}, "finish_reason": "stop"}],
+        "usage": {
+            "prompt_tokens": len(prompt.split()),
+            "completion_tokens": len(content.split()),
+            "total_tokens": len(prompt.split()) + len(content.split()),
+        },
+    }
+
+
+class StubServer:
+    """Servidor HTTP em thread dedicada para um stub."""
+
+    def __init__(self, kind: str, port: int, behavior: StubBehavior, host: str = "127.0.0.1") -> None:
+        """Cria o servidor; porta 0 escolhe uma porta livre."""
+        self.kind = kind
+        self.behavior = behavior
+        self._server = ThreadingHTTPServer((host, port), _make_handler(behavior, kind))
+        self._server.daemon_threads = True
+        self._thread = threading.Thread(target=self._server.serve_forever, name=f"stub-{kind}", daemon=True)
+
+    @property
+    def base_url(self) -> str:
+        """URL base do servidor."""
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self) -> "StubServer":
+        """Inicia o servidor em background."""
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        """Encerra o servidor."""
+        self._server.shutdown()
+        self._server.server_close()
+
+
+def add_stub_arguments(parser: argparse.ArgumentParser) -> None:
+    """Adiciona as opcoes de comportamento dos stubs ao parser."""
+    parser.add_argument("--hf-latency", default="lognormal:0.25:0.5", help="Latencia do stub HF")
+    parser.add_argument("--llm-latency", default="lognormal:1.2:0.6", help="Latencia do stub LLM")
+    parser.add_argument("--hf-error-rate", type=float, default=0.0)
+    parser.add_argument("--llm-error-rate", type=float, default=0.0)
+    parser.add_argument("--hf-rate-limit-rpm", type=int, default=0)
+    parser.add_argument("--llm-rate-limit-rpm", type=int, default=0)
+
+
+def start_stubs(args: argparse.Namespace, hf_port: int = 0, llm_port: int = 0) -> Tuple[StubServer, StubServer]:
+    """Inicia os stubs HF e LLM conforme os argumentos."""
+    hf = StubServer(
+        "hf",
+        hf_port,
+        StubBehavior(LatencyModel.parse(args.hf_latency), args.hf_error_rate, args.hf_rate_limit_rpm, seed=1),
+    ).start()
+    llm = StubServer(
+        "llm",
+        llm_port,
+        StubBehavior(LatencyModel.parse(args.llm_latency), args.llm_error_rate, args.llm_rate_limit_rpm, seed=2),
+    ).start()
+    return hf, llm
+
+
+def main() -> None:
+    """Executa os stubs ate interrupcao."""
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--hf-port", type=int, default=9001)
+    parser.add_argument("--llm-port", type=int, default=9002)
+    add_stub_arguments(parser)
+    args = parser.parse_args()
+    hf, llm = start_stubs(args, args.hf_port, args.llm_port)
+    print(f"HUGGINGFACE_ENDPOINT_BASE={hf.base_url}/models")
+    print(f"LLM_ENDPOINT={llm.base_url}/v1/chat/completions")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        hf.stop()
+        llm.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,216 @@
+"""Micro-benchmarks offline dos componentes executados em toda requisicao.
+
+Uso:
+    python -m benchmarks.micro --save-baseline bench_results/micro_baseline.json
+    python -m benchmarks.micro --check bench_results/micro_baseline.json --threshold 0.25
+"""
+import argparse
+import os
+import statistics
+import sys
+import time
+from datetime import datetime, timezone
+from io import BytesIO
+from typing import Any, Callable, Dict, List, Tuple
+
+os.environ.setdefault("SECRET_KEY", "benchmark-secret")
+os.environ.setdefault("DATABASE_URL", "sqlite://")
+
+from benchmarks.common import format_table, load_report, run_metadata, write_report  # noqa: E402
+from benchmarks.corpus import build_corpus  # noqa: E402
+
+
+def build_pdf(pages: List[str]) -> bytes:
+    """Gera um PDF minimo (Helvetica, uma coluna) com o texto de cada pagina."""
+    objects: List[bytes] = [b"<< /Type /Catalog /Pages 2 0 R >>", b""]
+    kids = []
+    for text in pages:
+        lines = [line[:90] for line in text.splitlines() if line.strip()][:48]
+        commands = ["BT", "/F1 10 Tf", "40 800 Td", "12 TL"]
+        for line in lines:
+            escaped = line.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)")
+            commands.append(f"({escaped}) Tj T*")
+        commands.append("ET")
+        stream = "\n".join(commands).encode("latin-1", errors="replace")
+        content_id = len(objects) + 1
+        objects.append(b"<< /Length %d >>\nstream\n" % len(stream) + stream + b"\nendstream")
+        page_id = len(objects) + 1
+        objects.append(
+            b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 595 842] /Contents %d 0 R "
+            b"/Resources << /Font << /F1 << /Type /Font /Subtype /Type1 /BaseFont /Helvetica >> >> >> >>"
+            % content_id
+        )
+        kids.append(page_id)
+    objects[1] = b"<< /Type /Pages /Kids [%s] /Count %d >>" % (
+        b" ".join(b"%d 0 R" % kid for kid in kids),
+        len(kids),
+    )
+    output = BytesIO()
+    output.write(b"%PDF-1.4\n")
+    offsets = []
+    for index, body in enumerate(objects, start=1):
+        offsets.append(output.tell())
+        output.write(b"%d 0 obj\n" % index + body + b"\nendobj\n")
+    xref = output.tell()
+    output.write(b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1))
+    for offset in offsets:
+        output.write(b"%010d 00000 n \n" % offset)
+    output.write(b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objects) + 1, xref))
+    return output.getvalue()
+
+
+def measure(func: Callable[[], Any], ops_per_call: int = 1, rounds: int = 7, min_time: float = 0.2) -> Dict[str, float]:
+    """Mede o tempo por operacao (us) calibrando repeticoes para rodadas de ~min_time."""
+    loops = 1
+    while True:
+        started = time.perf_counter()
+        for _ in range(loops):
+            func()
+        elapsed = time.perf_counter() - started
+        if elapsed >= min_time / 5 or loops >= 1 << 20:
+            break
+        loops *= 2
+    samples = []
+    for _ in range(rounds):
+        started = time.perf_counter()
+        for _ in range(loops):
+            func()
+        samples.append((time.perf_counter() - started) / (loops * ops_per_call) * 1e6)
+    return {
+        "median_us": round(statistics.median(samples), 3),
+        "min_us": round(min(samples), 3),
+        "stdev_us": round(statistics.pstdev(samples), 3),
+        "loops": loops,
+        "ops_per_call": ops_per_call,
+    }
+
+
+def build_benchmarks(quick: bool) -> Dict[str, Tuple[Callable[[], Any], int]]:
+    """Monta os casos de benchmark sobre corpus e fixtures sinteticas."""
+    from fastapi.responses import ORJSONResponse
+    from starlette.datastructures import Headers, UploadFile
+
+    from app.api.v1.email_router import extract_text_from_file
+    from app.core.security import create_access_token, decode_token
+    from app.models.email_model import Email
+    from app.nlp.classifier_client import ClassifierClient
+    from app.nlp.text_normalizer import get_text_normalizer
+    from app.schemas.email_schema import EmailHistoryItem, EmailHistoryResponse
+    from app.services.email_service import EmailService
+
+    corpus = build_corpus(120 if quick else 600)
+    by_kind: Dict[str, List[str]] = {}
+    for email in corpus:
+        by_kind.setdefault(email.kind, []).append(email.body)
+    classifier = ClassifierClient()
+    normalizer = get_text_normalizer()
+    raw_labels = [
+        "Produtivo (trabalho, suporte, financeiro, operacoes)",
+        "Improdutivo (pessoal, irrelevante, sem acao)",
+        "Propaganda (marketing, oferta, promocao, spam)",
+    ] * 100
+
+    rows = 1_000 if quick else 10_000
+    now = datetime.now(timezone.utc)
+    emails = [
+        Email(
+            id=index,
+            user_id=1,
+            email_destinatario="cliente@empresa.com",
+            assunto=f"Assunto {index}",
+            raw_body=corpus[index % len(corpus)].body,
+            classification="Produtivo",
+            generated_response="Resposta sugerida",
+            respondido=bool(index % 2),
+            respondido_em=now if index % 2 else None,
+            created_at=now,
+            updated_at=now,
+        )
+        for index in range(rows)
+    ]
+    service = EmailService(email_repository=None, classifier_client=None, llm_client=None)
+
+    txt_payload = "\n\n".join(by_kind["long"][:3]).encode("utf-8")
+    pdf_payload = build_pdf(by_kind["long"][:4])
+
+    def extract(payload: bytes, filename: str, content_type: str) -> Callable[[], str]:
+        def run() -> str:
+            upload = UploadFile(BytesIO(payload), filename=filename, headers=Headers({"content-type": content_type}))
+            return extract_text_from_file(upload)
+
+        return run
+
+    token = create_access_token({"sub": "bench@empresa.com", "user_id": 1})
+    benchmarks: Dict[str, Tuple[Callable[[], Any], int]] = {}
+    for kind, bodies in sorted(by_kind.items()):
+        benchmarks[f"normalize_text[{kind}]"] = (lambda items=bodies: [normalizer.normalize(b) for b in items], len(bodies))
+    benchmarks["normalize_label"] = (lambda: [classifier._normalize_label(label) for label in raw_labels], len(raw_labels))
+    benchmarks["extract_text[txt]"] = (extract(txt_payload, "email.txt", "text/plain"), 1)
+    benchmarks["extract_text[pdf-4p]"] = (extract(pdf_payload, "email.pdf", "application/pdf"), 1)
+    benchmarks[f"to_history_item[{rows}]"] = (lambda: [service._to_history_item(email) for email in emails], rows)
+    benchmarks[f"to_detail_response[{rows}]"] = (lambda: [service._to_detail_response(email) for email in emails], rows)
+    history_fields = list(EmailHistoryItem.model_fields)
+    history_rows = [{field: getattr(email, field) for field in history_fields} for email in emails]
+    benchmarks[f"history_json[pydantic,{rows}]"] = (
+        lambda: EmailHistoryResponse(emails=[service._to_history_item(e) for e in emails], total=rows).model_dump_json(),
+        rows,
+    )
+    benchmarks[f"history_json[orjson-rows,{rows}]"] = (
+        lambda: ORJSONResponse({"emails": history_rows, "total": rows}).body,
+        rows,
+    )
+    benchmarks["create_access_token"] = (lambda: create_access_token({"sub": "bench@empresa.com", "user_id": 1}), 1)
+    benchmarks["decode_token"] = (lambda: decode_token(token), 1)
+    return benchmarks
+
+
+def check_regressions(results: Dict[str, Dict[str, float]], baseline: Dict[str, Any], threshold: float) -> List[List[str]]:
+    """Compara medianas com o baseline e retorna as linhas com regressao acima do limite."""
+    regressions = []
+    for name, current in results.items():
+        previous = baseline.get("results", {}).get(name)
+        if not previous:
+            continue
+        ratio = current["median_us"] / previous["median_us"] if previous["median_us"] else 1.0
+        if ratio > 1 + threshold:
+            regressions.append([name, f"{previous['median_us']}", f"{current['median_us']}", f"{(ratio - 1) * 100:+.1f}%"])
+    return regressions
+
+
+def main() -> int:
+    """Executa os micro-benchmarks e opcionalmente salva/compara baseline."""
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--filter", default="", help="Executa apenas benchmarks cujo nome contem o texto")
+    parser.add_argument("--quick", action="store_true", help="Corpus e volumes reduzidos")
+    parser.add_argument("--rounds", type=int, default=7)
+    parser.add_argument("--output", default="bench_results/micro.json")
+    parser.add_argument("--save-baseline", help="Grava os resultados tambem como baseline neste caminho")
+    parser.add_argument("--check", help="Baseline JSON para verificar regressoes")
+    parser.add_argument("--threshold", type=float, default=0.25, help="Lentidao tolerada (0.25 = 25%%)")
+    args = parser.parse_args()
+
+    results: Dict[str, Dict[str, float]] = {}
+    rows = [["benchmark", "mediana (us/op)", "min (us/op)", "desvio"]]
+    for name, (func, ops) in build_benchmarks(args.quick).items():
+        if args.filter and args.filter not in name:
+            continue
+        results[name] = measure(func, ops_per_call=ops, rounds=args.rounds)
+        rows.append([name, f"{results[name]['median_us']}", f"{results[name]['min_us']}", f"{results[name]['stdev_us']}"])
+    print(format_table(rows))
+
+    report = {"metadata": run_metadata(), "quick": args.quick, "results": results}
+    write_report(args.output, report)
+    if args.save_baseline:
+        write_report(args.save_baseline, report)
+    if args.check:
+        regressions = check_regressions(results, load_report(args.check), args.threshold)
+        if regressions:
+            print("\nRegressoes acima do limite:")
+            print(format_table([["benchmark", "baseline", "atual", "delta"]] + regressions))
+            return 1
+        print(f"\nSem regressoes acima de {args.threshold:.0%}.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
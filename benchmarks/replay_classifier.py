@@ -0,0 +1,229 @@
+"""Replay de corpus rotulado em todos os backends de classificacao configurados.
+
+Cada backend roda em um processo separado para medir pico de RSS isoladamente. O relatorio traz
+vazao, percentis de latencia por email, pico de RSS, matriz de confusao e concordancia com os
+rotulos de referencia.
+
+Uso:
+    python -m benchmarks.replay_classifier --backends remote --output bench_results/replay.json
+    python -m benchmarks.replay_classifier --backends remote,local,local-int8 --local-model MoritzLaurer/mDeBERTa-v3-base-mnli-xnli
+    python -m benchmarks.replay_classifier --export-db bench_results/emails.jsonl --limit 5000
+    python -m benchmarks.replay_classifier --corpus bench_results/emails.jsonl --backends remote
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import resource
+import sys
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+
+from benchmarks.common import format_table, latency_summary, run_metadata, write_report
+from benchmarks.corpus import build_corpus
+
+LABELS = ["Produtivo", "Improdutivo", "Propaganda"]
+
+
+def _remote_factory() -> Any:
+    from app.nlp.classifier_client import ClassifierClient
+
+    return ClassifierClient()
+
+
+def _local_factory() -> Any:
+    from app.nlp.local_classifier import LocalClassifierClient
+
+    client = LocalClassifierClient(quantize=False)
+    client.load()
+    return client
+
+
+def _local_int8_factory() -> Any:
+    from app.nlp.local_classifier import LocalClassifierClient
+
+    client = LocalClassifierClient(quantize=True)
+    client.load()
+    return client
+
+
+BACKENDS: Dict[str, Callable[[], Any]] = {
+    "remote": _remote_factory,
+    "local": _local_factory,
+    "local-int8": _local_int8_factory,
+}
+
+
+def load_corpus(path: Optional[str], size: int) -> List[Dict[str, str]]:
+    """Le corpus JSONL (text/label/subject) ou gera o corpus sintetico."""
+    if not path:
+        return [{"text": email.body, "label": email.label, "subject": email.subject} for email in build_corpus(size)]
+    items = []
+    with open(path, encoding="utf-8") as handle:
+        for line in handle:
+            if line.strip():
+                row = json.loads(line)
+                items.append({
+                    "text": row.get("text") or row.get("raw_body", ""),
+                    "label": row.get("label") or row.get("classification", ""),
+                    "subject": row.get("subject") or row.get("assunto") or "",
+                })
+    return items[:size] if size else items
+
+
+def export_from_db(path: str, limit: int) -> int:
+    """Exporta emails existentes (corpo, assunto e classificacao) para JSONL."""
+    from sqlmodel import Session, select
+
+    from app.core.database import get_engine
+    from app.models.email_model import Email
+
+    exported = 0
+    target = Path(path)
+    target.parent.mkdir(parents=True, exist_ok=True)
+    with Session(get_engine()) as session, target.open("w", encoding="utf-8") as handle:
+        statement = select(Email.raw_body, Email.assunto, Email.classification).order_by(Email.id)
+        if limit:
+            statement = statement.limit(limit)
+        for raw_body, assunto, classification in session.exec(statement):
+            row = {"text": raw_body, "subject": assunto or "", "label": classification}
+            handle.write(json.dumps(row, ensure_ascii=False) + "\n")
+            exported += 1
+    return exported
+
+
+def _run_backend(name: str, corpus: List[Dict[str, str]], env: Dict[str, str], queue: Any) -> None:
+    """Executa o backend em processo filho e devolve latencias, predicoes e pico de RSS."""
+    os.environ.update(env)
+    try:
+        load_started = time.perf_counter()
+        client = BACKENDS[name]()
+        load_seconds = time.perf_counter() - load_started
+        latencies: List[float] = []
+        predictions: List[Optional[str]] = []
+        errors = 0
+        started = time.perf_counter()
+        for item in corpus:
+            text = f"Assunto: {item['subject']}\n\n{item['text']}" if item["subject"] else item["text"]
+            call_started = time.perf_counter()
+            try:
+                predictions.append(str(client.classify_email(text)["label"]))
+            except Exception:
+                predictions.append(None)
+                errors += 1
+            latencies.append(time.perf_counter() - call_started)
+        elapsed = time.perf_counter() - started
+        peak_kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        queue.put({
+            "latencies": latencies,
+            "predictions": predictions,
+            "errors": errors,
+            "elapsed": elapsed,
+            "load_seconds": load_seconds,
+            "peak_rss_mb": round(peak_kb / 1024 if sys.platform != "darwin" else peak_kb / 1024 / 1024, 1),
+        })
+    except Exception as exc:
+        queue.put({"error": f"{type(exc).__name__}: {exc}"})
+
+
+def confusion_matrix(references: List[str], predictions: List[Optional[str]]) -> Dict[str, Dict[str, int]]:
+    """Monta a matriz de confusao referencia x predicao."""
+    labels = sorted(set(LABELS) | set(references) | {p for p in predictions if p})
+    matrix = {ref: {pred: 0 for pred in labels + ["erro"]} for ref in labels}
+    for reference, prediction in zip(references, predictions):
+        matrix.setdefault(reference, {pred: 0 for pred in labels + ["erro"]})
+        matrix[reference][prediction or "erro"] += 1
+    return matrix
+
+
+def summarize(name: str, corpus: List[Dict[str, str]], result: Dict[str, Any]) -> Dict[str, Any]:
+    """Calcula metricas de velocidade e qualidade do backend."""
+    references = [item["label"] for item in corpus]
+    predictions = result["predictions"]
+    labelled = [(ref, pred) for ref, pred in zip(references, predictions) if ref]
+    agreement = sum(1 for ref, pred in labelled if ref == pred) / len(labelled) if labelled else 0.0
+    return {
+        "backend": name,
+        "emails": len(corpus),
+        "errors": result["errors"],
+        "throughput_eps": round(len(corpus) / result["elapsed"], 3) if result["elapsed"] else 0.0,
+        "load_seconds": round(result["load_seconds"], 3),
+        "peak_rss_mb": result["peak_rss_mb"],
+        "agreement": round(agreement, 4),
+        "latency": latency_summary(result["latencies"]),
+        "confusion_matrix": confusion_matrix(references, predictions),
+    }
+
+
+def main() -> int:
+    """Executa o replay nos backends selecionados e grava o relatorio."""
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--backends", default="remote", help=f"Lista separada por virgula: {', '.join(BACKENDS)}")
+    parser.add_argument("--corpus", help="Corpus JSONL com campos text/label/subject")
+    parser.add_argument("--size", type=int, default=300, help="Tamanho do corpus (0 = todo o arquivo)")
+    parser.add_argument("--export-db", help="Exporta emails do DATABASE_URL para JSONL e encerra")
+    parser.add_argument("--limit", type=int, default=0)
+    parser.add_argument("--local-model", help="Modelo para os backends locais (LOCAL_CLASSIFIER_MODEL)")
+    parser.add_argument("--real-remote", action="store_true", help="Usa o endpoint remoto real em vez do stub local")
+    parser.add_argument("--hf-latency", default="lognormal:0.25:0.5", help="Latencia do stub HF")
+    parser.add_argument("--output", default="bench_results/replay.json")
+    args = parser.parse_args()
+
+    if args.export_db:
+        print(f"{export_from_db(args.export_db, args.limit)} emails exportados para {args.export_db}")
+        return 0
+
+    corpus = load_corpus(args.corpus, args.size)
+    env: Dict[str, str] = {}
+    if args.local_model:
+        env["LOCAL_CLASSIFIER_MODEL"] = args.local_model
+    stub = None
+    names = [name.strip() for name in args.backends.split(",") if name.strip()]
+    if "remote" in names and not args.real_remote:
+        from benchmarks.load.stub_servers import LatencyModel, StubBehavior, StubServer
+
+        stub = StubServer("hf", 0, StubBehavior(LatencyModel.parse(args.hf_latency))).start()
+        env.update({
+            "HUGGINGFACE_API_KEY": "stub",
+            "HUGGINGFACE_ENDPOINT_BASE": f"{stub.base_url}/models",
+            "RATE_LIMIT_ENABLED": "false",
+        })
+
+    context = multiprocessing.get_context("spawn")
+    summaries = []
+    try:
+        for name in names:
+            if name not in BACKENDS:
+                print(f"Backend desconhecido: {name}")
+                continue
+            queue = context.Queue()
+            process = context.Process(target=_run_backend, args=(name, corpus, env, queue))
+            process.start()
+            result = queue.get()
+            process.join()
+            if "error" in result:
+                print(f"{name}: falhou ({result['error']})")
+                summaries.append({"backend": name, "error": result["error"]})
+                continue
+            summaries.append(summarize(name, corpus, result))
+    finally:
+        if stub is not None:
+            stub.stop()
+
+    rows = [["backend", "emails/s", "p50 ms", "p95 ms", "p99 ms", "RSS MB", "concordancia"]]
+    for summary in summaries:
+        if "error" in summary:
+            continue
+        latency = summary["latency"]
+        rows.append([
+            summary["backend"], f"{summary['throughput_eps']}", f"{latency['p50_ms']}", f"{latency['p95_ms']}",
+            f"{latency['p99_ms']}", f"{summary['peak_rss_mb']}", f"{summary['agreement']:.2%}",
+        ])
+    print(format_table(rows))
+    write_report(args.output, {"metadata": run_metadata(), "corpus": args.corpus or "sintetico", "results": summaries})
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,6 +1,6 @@
 import importlib
 import os
-from typing import Generator
+from typing import Awaitable, Callable, Dict, Generator, Optional
 
 import httpx
 import pytest
@@ -8,6 +8,40 @@ import pytest_asyncio
 from fastapi import FastAPI
 from sqlmodel import Session, SQLModel, create_engine
 
+from app.core.security import hash_password
+from app.models.email_model import Email
+from app.models.user_model import User
+
+
+class CountingLlm:
+    """LLM fake que conta as geracoes e retorna respostas numeradas."""
+
+    def __init__(self) -> None:
+        """Inicializa o contador; before, se definido, roda antes de cada geracao."""
+        self.calls = 0
+        self.before: Optional[Callable[[], None]] = None
+
+    def generate_response(self, classification: str, email_body: str) -> str:
+        """Conta a geracao e retorna "Resposta <n>"."""
+        if self.before is not None:
+            self.before()
+        self.calls += 1
+        return f"Resposta {self.calls}"
+
+
+class CountingClassifier:
+    """Classificador fake que conta as chamadas e retorna um resultado configuravel."""
+
+    def __init__(self) -> None:
+        """Inicializa o contador com uma decisao Produtivo de alta confianca."""
+        self.calls = 0
+        self.result: Dict[str, float | str] = {"label": "Produtivo", "score": 0.99}
+
+    def classify_email(self, text: str) -> Dict[str, float | str]:
+        """Conta a chamada e retorna uma copia do resultado configurado."""
+        self.calls += 1
+        return dict(self.result)
+
 
 @pytest.fixture()
 def app(tmp_path) -> FastAPI:
@@ -19,6 +53,9 @@ def app(tmp_path) -> FastAPI:
     os.environ["ALGORITHM"] = "HS256"
     os.environ["ACCESS_TOKEN_EXPIRE_MINUTES"] = "5"
     os.environ["SEED_ENABLED"] = "false"
+    os.environ["CACHE_BACKENDS"] = "memory"
+    os.environ["KNN_ENABLED"] = "false"
+    os.environ["METRICS_TOKEN"] = "metrics-token"
 
     import app.core.config as config_module
 
@@ -54,3 +91,62 @@ def db_session() -> Generator[Session, None, None]:
     with Session(database_module.engine) as session:
         yield session
 
+
+
+@pytest.fixture()
+def create_user(db_session: Session) -> Callable[[str, str], User]:
+    """Fornece uma funcao que cria usuarios para os testes."""
+
+    def factory(email: str, senha: str) -> User:
+        user = User(email_institucional=email, password_hash=hash_password(senha), must_change_password=False)
+        db_session.add(user)
+        db_session.commit()
+        db_session.refresh(user)
+        return user
+
+    return factory
+
+
+@pytest.fixture()
+def create_email(db_session: Session) -> Callable[[int], Email]:
+    """Fornece uma funcao que cria um email classificado do usuario informado."""
+
+    def factory(user_id: int) -> Email:
+        email = Email(
+            user_id=user_id,
+            email_destinatario="cliente@empresa.com",
+            assunto="Teste",
+            raw_body="Conteudo do email",
+            classification="Produtivo",
+            generated_response="Resposta sugerida",
+        )
+        db_session.add(email)
+        db_session.commit()
+        db_session.refresh(email)
+        return email
+
+    return factory
+
+
+@pytest.fixture()
+def login_and_get_token(client: httpx.AsyncClient) -> Callable[[str, str], Awaitable[str]]:
+    """Fornece uma funcao que autentica o usuario e retorna o token de acesso."""
+
+    async def login(email: str, senha: str) -> str:
+        response = await client.post("/api/v1/auth/login", json={"email": email, "senha": senha})
+        assert response.status_code == 200
+        return response.json()["access_token"]
+
+    return login
+
+
+@pytest.fixture()
+def counting_llm() -> CountingLlm:
+    """Fornece um LLM fake que conta as geracoes."""
+    return CountingLlm()
+
+
+@pytest.fixture()
+def counting_classifier() -> CountingClassifier:
+    """Fornece um classificador fake que conta as chamadas."""
+    return CountingClassifier()
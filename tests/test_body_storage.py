@@ -0,0 +1,52 @@
+from sqlalchemy import text
+from sqlmodel import Session, create_engine
+
+from app.core.body_migration import ensure_schema, migrate_bodies
+from app.core.compression import PLAIN_MARKER, ZLIB_MARKER, compress_text, decompress_text
+from app.models.email_model import Email
+
+
+def test_compress_text_roundtrip_and_threshold() -> None:
+    """Valida a compressao acima do limite e a leitura de corpos comprimidos e legados."""
+    small = compress_text("curto", min_bytes=1024)
+    assert small.startswith(PLAIN_MARKER)
+    body = "Preciso do relatorio financeiro atualizado. " * 200
+    packed = compress_text(body, min_bytes=1024, codec="zlib")
+    assert packed.startswith(ZLIB_MARKER)
+    assert len(packed) < len(body) / 5
+    assert decompress_text(packed) == body
+    assert decompress_text(body.encode("utf-8")) == body
+
+
+def test_migrate_legacy_rows(tmp_path) -> None:
+    """Valida a migracao dos corpos legados para o formato comprimido com tamanho e hash."""
+    engine = create_engine(f"sqlite:///{tmp_path / 'legacy.db'}")
+    with engine.begin() as connection:
+        connection.execute(text(
+            "CREATE TABLE emails (id INTEGER PRIMARY KEY, user_id INTEGER NOT NULL, "
+            "email_destinatario VARCHAR(255) NOT NULL, assunto VARCHAR(255), raw_body TEXT NOT NULL, "
+            "classification VARCHAR(50) NOT NULL, generated_response TEXT, respondido BOOLEAN, "
+            "respondido_em DATETIME, created_at DATETIME NOT NULL, updated_at DATETIME NOT NULL)"
+        ))
+        for index in range(5):
+            connection.execute(
+                text(
+                    "INSERT INTO emails (user_id, email_destinatario, raw_body, classification, respondido, "
+                    "created_at, updated_at) VALUES (1, 'a@b.com', :body, 'Produtivo', 0, '2024-01-01', '2024-01-01')"
+                ),
+                {"body": f"Pedido {index}. " + "Detalhes do pedido. " * 100 + "\n\nAtenciosamente,\nAna"},
+            )
+
+    ensure_schema(engine)
+    assert migrate_bodies(engine, batch_size=2) == 5
+    assert migrate_bodies(engine, batch_size=2) == 0
+
+    with engine.connect() as connection:
+        stored = connection.execute(text("SELECT raw_body FROM emails WHERE id = 1")).scalar_one()
+    assert bytes(stored)[:1] == b"\x00"
+    assert len(stored) < 500
+    with Session(engine) as session:
+        email = session.get(Email, 1)
+        assert email.raw_body.startswith("Pedido 0.")
+        assert email.body_size == len(email.raw_body.encode("utf-8"))
+        assert len(email.normalized_hash) == 64
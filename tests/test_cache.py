@@ -0,0 +1,93 @@
+import time
+
+from app.core.cache import DatabaseCache, MemoryCache, SqliteCache, TieredCache
+from app.core.config import get_settings
+from app.core.metrics import CACHE_REQUESTS, CACHE_TIER_REQUESTS
+from app.services.email_service import classifier_fingerprint, llm_fingerprint
+
+
+def test_memory_cache_evicts_lru_and_expires() -> None:
+    """Valida o descarte da entrada menos usada e a expiracao por TTL."""
+    cache = MemoryCache(max_entries=2, ttl=60)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    assert cache.get("a") == 1
+    cache.set("c", 3)
+    assert cache.get("b") is None
+    assert cache.get("a") == 1
+
+    cache.set("short", "x", ttl=0.01)
+    time.sleep(0.02)
+    assert cache.get("short") is None
+
+
+def test_sqlite_cache_is_shared_between_instances(tmp_path) -> None:
+    """Valida que instancias no mesmo arquivo compartilham entradas, podas e remocoes."""
+    path = str(tmp_path / "cache.sqlite3")
+    writer = SqliteCache(path, max_entries=2, ttl=60)
+    reader = SqliteCache(path, max_entries=2, ttl=60)
+
+    writer.set("classify:v1:abc", {"label": "Produtivo"})
+    assert reader.get("classify:v1:abc") == {"label": "Produtivo"}
+
+    writer.set("b", 2)
+    writer.set("c", 3)
+    writer.prune()
+    assert reader.get("classify:v1:abc") is None
+    reader.delete("c")
+    assert writer.get("c") is None
+
+
+def test_tiered_cache_backfills_upper_tiers(app, tmp_path) -> None:
+    """Valida que um acerto no banco repopula a memoria e que a remocao vale para todos os niveis."""
+    memory = MemoryCache(max_entries=10, ttl=60)
+    database = DatabaseCache(ttl=60)
+    database.set("reply:v1:Produtivo:abc", "Resposta")
+    cache = TieredCache([memory, SqliteCache(str(tmp_path / "cache.sqlite3")), database])
+
+    assert cache.get("reply:v1:Produtivo:abc") == "Resposta"
+    assert memory.get("reply:v1:Produtivo:abc") == "Resposta"
+
+    cache.delete("reply:v1:Produtivo:abc")
+    assert database.get("reply:v1:Produtivo:abc") is None
+
+
+def test_tiered_cache_warm_up_loads_recent_entries(tmp_path) -> None:
+    """Valida que o aquecimento copia as entradas recentes do SQLite para a memoria."""
+    path = str(tmp_path / "cache.sqlite3")
+    SqliteCache(path, ttl=60).set("classify:v2:abc", {"label": "Produtivo"})
+    memory = MemoryCache(max_entries=10, ttl=60)
+    cache = TieredCache([memory, SqliteCache(path, ttl=60)])
+
+    assert cache.warm_up(10) == 1
+    assert memory.get("classify:v2:abc") == {"label": "Produtivo"}
+
+
+def test_cache_fingerprints_follow_model_configuration(monkeypatch) -> None:
+    """Valida que trocar o modelo de classificacao ou do LLM muda o prefixo das chaves de cache."""
+    settings = get_settings()
+    classifier, llm = classifier_fingerprint(), llm_fingerprint()
+
+    monkeypatch.setattr(settings, "huggingface_model", "outro/modelo-nli")
+    assert classifier_fingerprint() != classifier
+    assert llm_fingerprint() == llm
+
+    monkeypatch.setattr(settings, "llm_model", "outro/modelo-chat")
+    assert llm_fingerprint() != llm
+
+
+def test_tiered_cache_counts_lookups_per_tier_only() -> None:
+    """Conta consultas por nivel em metrica propria, sem somar em cache_requests_total."""
+    upper = MemoryCache(max_entries=10, ttl=60)
+    lower = MemoryCache(max_entries=10, ttl=60)
+    lower.set("k", "v")
+    cache = TieredCache([upper, lower])
+    requests_before = sum(child.value for _, child in CACHE_REQUESTS._items())
+    misses_before = CACHE_TIER_REQUESTS.labels("memory", "miss").value
+    hits_before = CACHE_TIER_REQUESTS.labels("memory", "hit").value
+
+    assert cache.get("k") == "v"
+
+    assert CACHE_TIER_REQUESTS.labels("memory", "miss").value == misses_before + 1
+    assert CACHE_TIER_REQUESTS.labels("memory", "hit").value == hits_before + 1
+    assert sum(child.value for _, child in CACHE_REQUESTS._items()) == requests_before
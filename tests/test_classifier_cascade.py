@@ -0,0 +1,70 @@
+from sqlmodel import Session
+
+from app.nlp.classifier_cascade import CascadeTier, ClassifierCascade, RuleClassifier
+from app.nlp.exceptions import ExternalServiceError
+from app.repositories.email_repository import EmailRepository
+from app.services.email_service import EmailService
+
+
+class FixedClassifier:
+    """Classificador fake com resposta fixa e contador de chamadas."""
+
+    def __init__(self, label: str, score: float, error: bool = False) -> None:
+        """Define o rotulo, a confianca e se a chamada deve falhar."""
+        self.label = label
+        self.score = score
+        self.error = error
+        self.calls = 0
+
+    def classify_email(self, text: str):
+        """Conta a chamada e retorna o resultado fixo ou falha."""
+        self.calls += 1
+        if self.error:
+            raise ExternalServiceError("fake", "indisponivel")
+        return {"label": self.label, "score": self.score}
+
+
+def test_cascade_escalates_only_below_threshold() -> None:
+    """Valida que so decisoes abaixo do limiar sobem de nivel e que falhas caem no melhor nivel anterior."""
+    local = FixedClassifier("Improdutivo", 0.7)
+    remote = FixedClassifier("Produtivo", 0.6)
+    cascade = ClassifierCascade(
+        [CascadeTier("rules", RuleClassifier(), 0.95), CascadeTier("local", local, 0.8), CascadeTier("remote", remote)]
+    )
+
+    confident = cascade.classify_email("Oferta imperdivel: cupom de desconto e frete gratis, promocao so hoje")
+    assert confident["label"] == "Propaganda"
+    assert confident["tier"] == "rules"
+    assert local.calls == 0
+
+    escalated = cascade.classify_email("Ola, tudo bem com voces?")
+    assert escalated == {"label": "Produtivo", "score": 0.6, "tier": "remote"}
+    assert (local.calls, remote.calls) == (1, 1)
+
+    remote.error = True
+    fallback = cascade.classify_email("Ola de novo")
+    assert fallback["tier"] == "local"
+
+
+def test_rules_match_whole_words_and_need_several_hits() -> None:
+    """Valida que termos dentro de outras palavras nao contam e que poucos termos genericos nao decidem sozinhos."""
+    rules = RuleClassifier()
+
+    assert rules.classify_email("Os dados estao imprecisos e o contratante reclamou")["score"] == 0.0
+    assert rules.classify_email("Preciso de suporte")["score"] < 0.95
+
+
+def test_process_email_records_tier_and_score(app, db_session: Session, create_user) -> None:
+    """Valida que o email gravado registra o nivel da cascata e a confianca da decisao."""
+    user = create_user("cascata@empresa.com", "senha123")
+    cascade = ClassifierCascade(
+        [CascadeTier("rules", RuleClassifier(), 0.95), CascadeTier("remote", FixedClassifier("Produtivo", 0.95))]
+    )
+    service = EmailService(EmailRepository(db_session), cascade, None)
+
+    response = service.process_email(user.id or 0, "Preciso do boleto com urgente prioridade", "cliente@empresa.com")
+
+    saved = EmailRepository(db_session).get_by_id(response.id)
+    assert saved.classification == "Produtivo"
+    assert saved.classifier_tier == "rules"
+    assert saved.classification_score >= 0.95
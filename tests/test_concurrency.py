@@ -0,0 +1,93 @@
+import httpx
+import pytest
+from fastapi import FastAPI
+from fastapi.responses import JSONResponse
+
+from app.core.concurrency import AdaptiveConcurrencyMiddleware, AimdLimiter
+from app.core.timing import ServerTimingMiddleware, record_span
+
+
+def test_aimd_limiter_grows_with_fast_responses_and_backs_off_when_slow() -> None:
+    """Valida o aumento aditivo com respostas rapidas e a reducao multiplicativa unica por janela lenta."""
+    limiter = AimdLimiter("teste", latency_target=1.0, initial_limit=2, min_limit=1, max_limit=4)
+    assert limiter.try_acquire() and limiter.try_acquire()
+    assert not limiter.try_acquire()
+
+    for _ in range(10):
+        limiter.release(0.1, overloaded=False)
+        assert limiter.try_acquire()
+    assert limiter.limit == 4
+
+    limiter.release(5.0, overloaded=False)
+    limiter.release(5.0, overloaded=False)
+    assert limiter.limit == 2
+    limiter.release(0.1, overloaded=True)
+    assert limiter.limit == 2
+
+
+@pytest.mark.asyncio
+async def test_middleware_sheds_ai_endpoints_only() -> None:
+    """Valida o 503 com Retry-After no endpoint de IA saturado enquanto o historico segue respondendo."""
+    app = FastAPI()
+
+    @app.post("/api/v1/emails/classify")
+    def classify() -> dict:
+        """Endpoint de IA limitado pelo middleware."""
+        return {"ok": True}
+
+    @app.get("/api/v1/emails/history")
+    def history() -> dict:
+        """Endpoint fora do limite adaptativo."""
+        return {"ok": True}
+
+    app.add_middleware(AdaptiveConcurrencyMiddleware)
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        assert (await client.post("/api/v1/emails/classify")).status_code == 200
+
+        middleware = app.middleware_stack
+        while not isinstance(middleware, AdaptiveConcurrencyMiddleware):
+            middleware = middleware.app
+        limiter = middleware._limiters[0][2]
+        while limiter.try_acquire():
+            pass
+
+        rejected = await client.post("/api/v1/emails/classify")
+        assert rejected.status_code == 503
+        assert rejected.headers["retry-after"] == "2"
+        assert rejected.json()["detail"]["erro"] == "sobrecarga"
+        assert (await client.get("/api/v1/emails/history")).status_code == 200
+
+
+@pytest.mark.asyncio
+async def test_middleware_ignores_queue_waits_and_application_errors() -> None:
+    """Valida que esperas em fila e erros 500 da aplicacao nao reduzem o limite, mas 502 do provedor reduz."""
+    app = FastAPI()
+    outcome = {"status": 500}
+
+    @app.post("/api/v1/emails/classify")
+    def classify() -> JSONResponse:
+        """Endpoint de IA que passou muito tempo na fila do escalonador."""
+        record_span("fair_scheduler_wait", 60.0)
+        return JSONResponse(status_code=outcome["status"], content={})
+
+    app.add_middleware(AdaptiveConcurrencyMiddleware)
+    app.add_middleware(ServerTimingMiddleware)
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        await client.post("/api/v1/emails/classify")
+
+        middleware = app.middleware_stack
+        while not isinstance(middleware, AdaptiveConcurrencyMiddleware):
+            middleware = middleware.app
+        limiter = middleware._limiters[0][2]
+        initial = limiter.limit
+
+        for _ in range(initial * 2):
+            await client.post("/api/v1/emails/classify")
+        assert limiter.limit > initial
+
+        outcome["status"] = 502
+        grown = limiter.limit
+        await client.post("/api/v1/emails/classify")
+        assert limiter.limit < grown
@@ -1,3 +1,7 @@
+import csv
+import io
+import json
+
 import httpx
 import pytest
 from sqlmodel import Session
@@ -117,3 +121,65 @@ async def test_classify_email_with_mocked_ai(app, client: httpx.AsyncClient, db_
     saved = db_session.get(Email, payload["id"])
     assert saved is not None
     assert saved.user_id == user.id
+
+
+@pytest.mark.asyncio
+async def test_export_history_streams_filtered_rows(client: httpx.AsyncClient, db_session: Session) -> None:
+    """Valida a exportacao em NDJSON e CSV com filtros."""
+    user = create_user(db_session, "export@empresa.com", "senha123")
+    other = create_user(db_session, "outro@empresa.com", "senha123")
+    create_email(db_session, user.id or 0)
+    answered = create_email(db_session, user.id or 0)
+    answered.respondido = True
+    db_session.add(answered)
+    db_session.commit()
+    create_email(db_session, other.id or 0)
+
+    token = await login_and_get_token(client, "export@empresa.com", "senha123")
+    headers = {"Authorization": f"Bearer {token}"}
+
+    response = await client.get("/api/v1/emails/export", headers=headers)
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+    rows = [json.loads(line) for line in response.text.splitlines()]
+    assert len(rows) == 2
+    assert rows[0]["raw_body"] == "Conteudo do email"
+
+    response = await client.get(
+        "/api/v1/emails/export",
+        headers=headers,
+        params={"formato": "csv", "respondido": "true", "classification": "Produtivo"},
+    )
+    assert response.status_code == 200
+    records = list(csv.DictReader(io.StringIO(response.text)))
+    assert [int(record["id"]) for record in records] == [answered.id]
+
+
+@pytest.mark.asyncio
+async def test_history_conditional_get(client: httpx.AsyncClient, db_session: Session) -> None:
+    """Valida 304 no historico inalterado e novo ETag apos alteracao."""
+    user = create_user(db_session, "etag@empresa.com", "senha123")
+    email = create_email(db_session, user.id or 0)
+    token = await login_and_get_token(client, "etag@empresa.com", "senha123")
+    headers = {"Authorization": f"Bearer {token}"}
+
+    first = await client.get("/api/v1/emails/history", headers=headers)
+    assert first.status_code == 200
+    assert first.json()["total"] == 1
+    etag = first.headers["etag"]
+
+    cached = await client.get("/api/v1/emails/history", headers={**headers, "If-None-Match": etag})
+    assert cached.status_code == 304
+    assert cached.content == b""
+
+    await client.post(f"/api/v1/emails/{email.id}/mark-responded", headers=headers)
+    changed = await client.get("/api/v1/emails/history", headers={**headers, "If-None-Match": etag})
+    assert changed.status_code == 200
+    assert changed.json()["emails"][0]["respondido"] is True
+
+    detail = await client.get(f"/api/v1/emails/{email.id}", headers=headers)
+    assert detail.json()["email_body"] == "Conteudo do email"
+    detail_cached = await client.get(
+        f"/api/v1/emails/{email.id}", headers={**headers, "If-None-Match": detail.headers["etag"]}
+    )
+    assert detail_cached.status_code == 304
@@ -0,0 +1,101 @@
+import threading
+import time
+
+import pytest
+
+from app.nlp.exceptions import RateLimitExceededError
+from app.nlp.fair_scheduler import BACKGROUND, FairScheduler
+
+
+def _wait_for_depth(scheduler: FairScheduler, depth: int) -> None:
+    """Aguarda a fila atingir a profundidade esperada."""
+    deadline = time.monotonic() + 5
+    while scheduler.queue_depth < depth:
+        assert time.monotonic() < deadline
+        time.sleep(0.005)
+
+
+def test_light_user_is_served_between_heavy_user_calls() -> None:
+    """Valida que o usuario leve nao espera a fila inteira do usuario pesado."""
+    scheduler = FairScheduler("teste", slots=1, user_concurrency=1, max_queue_per_user=10, max_wait_seconds=5)
+    order = []
+
+    def call(user_id: int) -> None:
+        """Registra a ordem em que o usuario obteve a vaga."""
+        with scheduler.slot(user_id):
+            order.append(user_id)
+
+    scheduler.acquire(1)
+    threads = [threading.Thread(target=call, args=(1,)) for _ in range(3)]
+    for index, thread in enumerate(threads, start=1):
+        thread.start()
+        _wait_for_depth(scheduler, index)
+    light = threading.Thread(target=call, args=(2,))
+    light.start()
+    _wait_for_depth(scheduler, 4)
+    scheduler.release(1)
+    for thread in threads + [light]:
+        thread.join(5)
+
+    assert order == [1, 2, 1, 1]
+
+
+def test_quota_and_per_user_queue_reject_with_rate_limit_error() -> None:
+    """Valida a recusa por cota horaria e por fila cheia do usuario, sem afetar os demais."""
+    scheduler = FairScheduler(
+        "teste", slots=1, user_concurrency=1, max_queue_per_user=1, max_wait_seconds=5, quota_per_hour=3
+    )
+    scheduler.acquire(1, cost=2)
+    with pytest.raises(RateLimitExceededError) as exc_info:
+        scheduler.acquire(1, cost=2)
+    assert "Cota" in exc_info.value.detail
+    assert exc_info.value.retry_after > 3000
+
+    def call() -> None:
+        """Aguarda a vaga em nome do usuario 2."""
+        with scheduler.slot(2):
+            pass
+
+    waiting = threading.Thread(target=call)
+    waiting.start()
+    _wait_for_depth(scheduler, 1)
+    with pytest.raises(RateLimitExceededError) as exc_info:
+        scheduler.acquire(2)
+    assert "Fila do usuario cheia" in exc_info.value.detail
+
+    scheduler.release(1)
+    waiting.join(5)
+    assert not waiting.is_alive()
+    assert scheduler.queue_depth == 0
+
+
+def test_background_lane_yields_to_users_and_ignores_quota() -> None:
+    """Valida que a fila de segundo plano cede a vez aos usuarios e nao consome cota."""
+    scheduler = FairScheduler("teste", slots=1, user_concurrency=1, max_queue_per_user=10, max_wait_seconds=5)
+    order = []
+
+    def call(key) -> None:
+        """Registra a ordem em que a fila obteve a vaga."""
+        with scheduler.slot(key):
+            order.append(key)
+
+    scheduler.acquire(1)
+    threads = [threading.Thread(target=call, args=(key,)) for key in (BACKGROUND, BACKGROUND, 2, 2)]
+    for index, thread in enumerate(threads, start=1):
+        thread.start()
+        _wait_for_depth(scheduler, index)
+    scheduler.release(1)
+    for thread in threads:
+        thread.join(5)
+    assert order == [2, 2, BACKGROUND, BACKGROUND]
+
+    limited = FairScheduler(
+        "teste", slots=1, user_concurrency=1, max_queue_per_user=1, max_wait_seconds=5, quota_per_hour=1
+    )
+    for _ in range(3):
+        with limited.slot(BACKGROUND):
+            pass
+    limited.acquire(7)
+    limited.release(7)
+    with pytest.raises(RateLimitExceededError):
+        limited.acquire(7)
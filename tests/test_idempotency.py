@@ -0,0 +1,80 @@
+import threading
+import time
+
+import httpx
+import pytest
+from sqlmodel import Session, select
+
+from app.api.v1.email_router import get_email_service
+from app.models.email_model import Email
+from app.repositories.email_repository import EmailRepository
+from app.services.email_service import EmailService
+from app.services.idempotency_service import IdempotencyService
+
+
+@pytest.mark.asyncio
+async def test_classify_replays_response_for_same_key(
+    app, client: httpx.AsyncClient, db_session: Session, create_user, login_and_get_token
+) -> None:
+    """Valida que retentativas com a mesma chave nao reclassificam nem duplicam o email."""
+    create_user("idem@empresa.com", "senha123")
+    token = await login_and_get_token("idem@empresa.com", "senha123")
+
+    calls = []
+
+    class FakeClassifierClient:
+        """Cliente fake que conta as classificacoes."""
+
+        def classify_email(self, text: str):
+            """Retorna classificacao deterministica."""
+            calls.append(text)
+            return {"label": "Produtivo", "score": 0.99}
+
+    app.dependency_overrides[get_email_service] = lambda: EmailService(
+        EmailRepository(db_session), FakeClassifierClient(), None
+    )
+    headers = {"Authorization": f"Bearer {token}", "Idempotency-Key": "retry-1"}
+    data = {"email_destinatario": "cliente@empresa.com", "email_body": "Pedido de status do chamado"}
+    try:
+        first = await client.post("/api/v1/emails/classify", headers=headers, data=data)
+        second = await client.post("/api/v1/emails/classify", headers=headers, data=data)
+        conflict = await client.post(
+            "/api/v1/emails/classify", headers=headers, data={**data, "email_body": "Outro conteudo"}
+        )
+    finally:
+        app.dependency_overrides.clear()
+
+    assert first.status_code == 200
+    assert second.status_code == 200
+    assert second.json() == first.json()
+    assert second.headers["idempotent-replayed"] == "true"
+    assert conflict.status_code == 422
+    assert len(calls) == 1
+    assert len(db_session.exec(select(Email)).all()) == 1
+
+
+def test_concurrent_duplicates_wait_for_in_flight_execution(app) -> None:
+    """Valida que execucoes concorrentes com a mesma chave executam a acao uma unica vez."""
+    executions = []
+
+    def action():
+        """Executa a acao lenta registrando cada execucao."""
+        executions.append(1)
+        time.sleep(0.2)
+        return {"id": 7}
+
+    results = []
+
+    def worker():
+        """Executa a acao pela camada de idempotencia."""
+        results.append(IdempotencyService().execute(1, "chave", "classify", "fp", action))
+
+    threads = [threading.Thread(target=worker) for _ in range(3)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(executions) == 1
+    assert sorted(replayed for _, replayed in results) == [False, True, True]
+    assert all(body == {"id": 7} for body, _ in results)
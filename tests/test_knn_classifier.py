@@ -0,0 +1,55 @@
+from sqlmodel import Session
+
+from app.nlp.knn_classifier import KnnIndexStore
+from app.repositories.email_repository import EmailRepository
+from app.services.email_service import EmailService
+
+
+def test_index_persists_and_reloads_between_instances(tmp_path) -> None:
+    """Valida que a correcao substitui o exemplo e que outro worker le o indice gravado em segundo plano."""
+    store = KnnIndexStore(str(tmp_path), dimensions=256)
+    store.learn(1, 10, "Relatorio semanal de vendas da equipe comercial", "Improdutivo")
+    store.learn(1, 10, "Relatorio semanal de vendas da equipe comercial", "Produtivo")
+    store.flush()
+
+    other_worker = KnnIndexStore(str(tmp_path), dimensions=256)
+    prediction = other_worker.predict(1, "Relatorio semanal de vendas da equipe comercial")
+    assert prediction == {"label": "Produtivo", "score": 1.0}
+    assert other_worker.predict(2, "Relatorio semanal de vendas") is None
+
+
+def test_save_merges_corrections_from_other_workers(tmp_path) -> None:
+    """Valida que gravar o indice nao descarta correcoes ja gravadas por outro worker."""
+    first_worker = KnnIndexStore(str(tmp_path), dimensions=256, reload_interval_seconds=60.0)
+    second_worker = KnnIndexStore(str(tmp_path), dimensions=256, reload_interval_seconds=60.0)
+    assert first_worker.predict(1, "Convite para o churrasco da firma") is None
+    second_worker.learn(1, 20, "Cobranca da fatura de energia vencida", "Produtivo")
+    second_worker.flush()
+
+    assert first_worker.predict(1, "Cobranca da fatura de energia vencida") is None
+    first_worker.learn(1, 21, "Convite para o churrasco da firma", "Improdutivo")
+    first_worker.flush()
+
+    reader = KnnIndexStore(str(tmp_path), dimensions=256)
+    assert reader.predict(1, "Cobranca da fatura de energia vencida")["label"] == "Produtivo"
+    assert reader.predict(1, "Convite para o churrasco da firma")["label"] == "Improdutivo"
+
+
+def test_relabel_teaches_personal_index(app, db_session: Session, tmp_path, create_user, counting_classifier) -> None:
+    """Valida que, apos a correcao, o mesmo email e decidido pelo indice pessoal sem chamar o classificador."""
+    user = create_user("knn@empresa.com", "senha123")
+    classifier = counting_classifier
+    classifier.result = {"label": "Produtivo", "score": 0.7, "tier": "remote"}
+    service = EmailService(
+        EmailRepository(db_session), classifier, None, knn_index=KnnIndexStore(str(tmp_path / "knn"))
+    )
+    body = "Newsletter semanal do clube de corrida com os resultados do fim de semana"
+
+    first = service.process_email(user.id or 0, body, "clube@corrida.com", "Resultados")
+    relabeled = service.relabel(first.id, user.id or 0, "Improdutivo")
+    assert relabeled.classification == "Improdutivo"
+
+    second = service.process_email(user.id or 0, body, "clube@corrida.com", "Resultados")
+    assert second.classification == "Improdutivo"
+    assert classifier.calls == 1
+    assert EmailRepository(db_session).get_by_id(second.id).classifier_tier == "knn"
@@ -0,0 +1,119 @@
+from contextlib import contextmanager
+
+import pytest
+
+import app.nlp.llm_client as llm_client_module
+from app.nlp.exceptions import ExternalServiceError, RateLimitExceededError
+from app.nlp.llm_client import LlmClient
+from app.nlp.llm_router import LlmBackend, LlmRouter
+
+
+def build_router() -> LlmRouter:
+    """Cria roteador com dois backends fake."""
+    backends = [
+        LlmBackend(name="lento", endpoint="http://lento", model="a", api_key="k"),
+        LlmBackend(name="rapido", endpoint="http://rapido", model="b", api_key="k"),
+    ]
+    return LlmRouter(backends, alpha=0.5, error_threshold=0.5, cooldown_seconds=60)
+
+
+def test_router_prefers_fastest_backend() -> None:
+    """Ordena backends saudaveis pela latencia EWMA."""
+    router = build_router()
+    lento, rapido = router.backends
+    router.record_success(lento, 2.0)
+    router.record_success(rapido, 0.2)
+
+    assert [backend.name for backend in router.ordered_backends()] == ["rapido", "lento"]
+
+
+def test_client_fails_over_and_cools_down_backend(monkeypatch) -> None:
+    """Falha no backend preferido aciona failover e cooldown."""
+    router = build_router()
+    lento, rapido = router.backends
+    router.record_success(lento, 2.0)
+    router.record_success(rapido, 0.2)
+    client = LlmClient(router=router)
+
+    def fake_call(backend: LlmBackend, prompt: str) -> str:
+        """Simula indisponibilidade do backend rapido."""
+        _ = prompt
+        if backend.name == "rapido":
+            raise ExternalServiceError(service="LLM", detail="indisponivel", status_code=503)
+        return "Resposta"
+
+    monkeypatch.setattr(client, "_call_backend", fake_call)
+
+    assert client.generate_response("Produtivo", "Corpo") == "Resposta"
+    stats = {item["name"]: item for item in router.snapshot()}
+    assert stats["rapido"]["healthy"] is False
+    assert router.ordered_backends()[0].name == "lento"
+
+
+def test_client_balances_in_flight_and_ignores_local_rate_limit(monkeypatch) -> None:
+    """Erros inesperados nao vazam in_flight e a fila local cheia nao coloca o backend em cooldown."""
+    router = build_router()
+    client = LlmClient(router=router)
+
+    def local_rate_limit(backend: LlmBackend, prompt: str) -> str:
+        """Simula a fila local do rate limiter cheia."""
+        raise RateLimitExceededError(service=f"LLM:{backend.name}", detail="Fila cheia")
+
+    monkeypatch.setattr(client, "_call_backend", local_rate_limit)
+    with pytest.raises(RateLimitExceededError):
+        client.generate_response("Produtivo", "Corpo")
+
+    def broken_parse(backend: LlmBackend, prompt: str) -> str:
+        """Simula resposta com formato inesperado."""
+        raise KeyError("choices")
+
+    monkeypatch.setattr(client, "_call_backend", broken_parse)
+    with pytest.raises(KeyError):
+        client.generate_response("Produtivo", "Corpo")
+
+    for item in router.snapshot():
+        assert item["healthy"] is True
+        assert item["failures"] == 0
+        assert item["in_flight"] == 0
+
+
+def test_client_holds_one_fair_slot_across_failover(monkeypatch) -> None:
+    """O failover reusa a mesma vaga da fila justa e a recusa do escalonador nao afeta o roteador."""
+    router = build_router()
+    client = LlmClient(router=router)
+    slots, calls = [], []
+
+    @contextmanager
+    def counting_slot(pool: str, cost: float = 1.0):
+        """Conta as vagas pedidas ao escalonador."""
+        slots.append(pool)
+        yield
+
+    def first_backend_down(backend: LlmBackend, prompt: str) -> str:
+        """Simula indisponibilidade do primeiro backend tentado."""
+        if len(calls) == 0:
+            calls.append(backend.name)
+            raise ExternalServiceError(service="LLM", detail="indisponivel", status_code=503)
+        calls.append(backend.name)
+        return "Resposta"
+
+    monkeypatch.setattr(llm_client_module, "fair_slot", counting_slot)
+    monkeypatch.setattr(client, "_call_backend", first_backend_down)
+    assert client.generate_response("Produtivo", "Corpo") == "Resposta"
+    assert (len(calls), slots) == (2, ["llm"])
+
+    @contextmanager
+    def rejecting_slot(pool: str, cost: float = 1.0):
+        """Simula a cota do usuario esgotada."""
+        raise RateLimitExceededError(service="Fila justa:llm", detail="Cota esgotada")
+        yield
+
+    calls.clear()
+    router = build_router()
+    client = LlmClient(router=router)
+    monkeypatch.setattr(llm_client_module, "fair_slot", rejecting_slot)
+    monkeypatch.setattr(client, "_call_backend", first_backend_down)
+    with pytest.raises(RateLimitExceededError):
+        client.generate_response("Produtivo", "Corpo")
+    assert calls == []
+    assert all(item["in_flight"] == 0 and item["failures"] == 0 for item in router.snapshot())
@@ -0,0 +1,44 @@
+import httpx
+import pytest
+
+from app.core.metrics import Histogram
+
+
+def test_histogram_renders_cumulative_buckets() -> None:
+    """Gera buckets cumulativos, soma e contagem no formato do Prometheus."""
+    metric = Histogram("teste_duracao_seconds", "Duracao de teste.", ("rota",), buckets=(0.1, 1.0))
+    metric.labels("/a").observe(0.05)
+    metric.labels("/a").observe(0.5)
+    metric.labels("/a").observe(5.0)
+
+    lines = metric.render()
+    assert 'teste_duracao_seconds_bucket{rota="/a",le="0.1"} 1' in lines
+    assert 'teste_duracao_seconds_bucket{rota="/a",le="1"} 2' in lines
+    assert 'teste_duracao_seconds_bucket{rota="/a",le="+Inf"} 3' in lines
+    assert 'teste_duracao_seconds_count{rota="/a"} 3' in lines
+
+
+@pytest.mark.asyncio
+async def test_metrics_endpoint_exposes_route_latency(client: httpx.AsyncClient) -> None:
+    """Expoe latencia por template de rota e ocupacao do threadpool."""
+    await client.get("/api/v1/health")
+
+    assert (await client.get("/metrics")).status_code == 401
+    assert (await client.get("/metrics", headers={"Authorization": "Bearer errado"})).status_code == 401
+
+    response = await client.get("/metrics", headers={"Authorization": "Bearer metrics-token"})
+
+    assert response.status_code == 200
+    assert 'http_request_duration_seconds_count{method="GET",route="/api/v1/health",status="200"}' in response.text
+    assert 'threadpool_tokens{state="total"}' in response.text
+
+
+@pytest.mark.asyncio
+async def test_rate_limits_endpoint_requires_metrics_token(client: httpx.AsyncClient) -> None:
+    """Protege o diagnostico dos limitadores com o mesmo token de /metrics."""
+    assert (await client.get("/api/v1/health/rate-limits")).status_code == 401
+
+    response = await client.get("/api/v1/health/rate-limits", headers={"Authorization": "Bearer metrics-token"})
+
+    assert response.status_code == 200
+    assert "limiters" in response.json()
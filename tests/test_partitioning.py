@@ -0,0 +1,57 @@
+from contextlib import contextmanager
+from datetime import datetime
+from types import SimpleNamespace
+from typing import Any, List
+
+from app.core.partitioning import DEFAULT_PARTITION, convert_to_partitioned
+
+
+class RecordingResult:
+    """Resultado vazio do Postgres simulado, com os limites de created_at da tabela legada."""
+
+    def one(self) -> Any:
+        """Retorna min/max de created_at da tabela emails."""
+        return (datetime(2024, 1, 15), datetime(2024, 2, 20))
+
+    def first(self) -> Any:
+        """Nenhuma linha: tabela ainda nao particionada."""
+        return None
+
+    def scalar(self) -> Any:
+        """to_regclass nulo: nenhuma particao mensal existe ainda."""
+        return None
+
+
+class RecordingConnection:
+    """Conexao Postgres falsa que registra a ordem dos comandos executados."""
+
+    dialect = SimpleNamespace(name="postgresql")
+
+    def __init__(self) -> None:
+        """Inicializa a lista de comandos."""
+        self.statements: List[str] = []
+
+    def execute(self, statement: Any, parameters: Any = None) -> RecordingResult:
+        """Registra o SQL executado."""
+        self.statements.append(str(statement))
+        return RecordingResult()
+
+
+def test_convert_creates_default_partition_before_moving_rows(monkeypatch) -> None:
+    """Cria a particao DEFAULT antes de mover linhas dela para as particoes mensais."""
+    monkeypatch.setattr("app.core.partitioning.get_settings", lambda: SimpleNamespace(partitioning_months_ahead=0))
+    connection = RecordingConnection()
+
+    @contextmanager
+    def begin():
+        yield connection
+
+    convert_to_partitioned(SimpleNamespace(dialect=connection.dialect, begin=begin))
+
+    def position(fragment: str) -> int:
+        return next(index for index, statement in enumerate(connection.statements) if fragment in statement)
+
+    create_default = position(f"CREATE TABLE IF NOT EXISTS {DEFAULT_PARTITION} PARTITION OF emails DEFAULT")
+    first_move = position(f"DELETE FROM {DEFAULT_PARTITION}")
+    assert create_default < first_move < position("ATTACH PARTITION emails_2024_01")
+    assert position("ATTACH PARTITION emails_2024_02") < position("INSERT INTO emails SELECT * FROM emails_legacy")
@@ -0,0 +1,95 @@
+import threading
+import time
+
+from sqlmodel import Session
+
+from app.models.email_model import Email
+from app.repositories.email_repository import EmailRepository
+from app.services.email_service import EmailService
+from app.services.pregeneration_service import PregenerationWorker
+
+
+def wait_until(condition, timeout: float = 5.0) -> None:
+    """Aguarda a condicao ser verdadeira ou o tempo limite expirar."""
+    deadline = time.monotonic() + timeout
+    while not condition() and time.monotonic() < deadline:
+        time.sleep(0.01)
+
+
+def test_reply_is_pregenerated_and_served_from_storage(
+    app, db_session: Session, create_user, counting_llm, counting_classifier
+) -> None:
+    """Valida que a resposta pre-gerada e servida sem nova chamada ao LLM e que regenerar chama de novo."""
+    user = create_user("pregen@empresa.com", "senha123")
+    llm = counting_llm
+    worker = PregenerationWorker(llm)
+    worker.start()
+    try:
+        service = EmailService(EmailRepository(db_session), counting_classifier, llm, pregenerator=worker)
+        created = service.process_email(user.id or 0, "Preciso do relatorio ate sexta", "cliente@empresa.com")
+        wait_until(lambda: llm.calls == 1)
+        wait_until(lambda: worker.pending_count() == 0)
+
+        detail = service.generate_response(created.id, user.id or 0)
+        assert detail.generated_response == "Resposta 1"
+        assert llm.calls == 1
+
+        regenerated = service.generate_response(created.id, user.id or 0, regenerate=True)
+        assert regenerated.generated_response == "Resposta 2"
+    finally:
+        worker.stop()
+
+
+def test_mark_responded_cancels_queued_pregeneration(
+    app, db_session: Session, create_user, counting_llm, counting_classifier
+) -> None:
+    """Valida que marcar como respondido cancela a pre-geracao enfileirada e que o orcamento limita a fila."""
+    user = create_user("cancel@empresa.com", "senha123")
+    llm = counting_llm
+    worker = PregenerationWorker(llm, budget_per_hour=1)
+    service = EmailService(EmailRepository(db_session), counting_classifier, llm, pregenerator=worker)
+    first = service.process_email(user.id or 0, "Primeiro email", "cliente@empresa.com")
+    service.process_email(user.id or 0, "Segundo email acima do orcamento", "cliente@empresa.com")
+    service.mark_responded(first.id, user.id or 0)
+
+    worker.start()
+    worker.stop()
+
+    assert llm.calls == 0
+    assert db_session.get(Email, first.id).generated_response is None
+
+
+def test_stop_discards_queue_and_result_in_flight(
+    app, db_session: Session, create_user, counting_llm, counting_classifier
+) -> None:
+    """Valida que o encerramento descarta a fila cheia, nao grava o item em andamento e termina as threads."""
+    user = create_user("stop@empresa.com", "senha123")
+    started, release = threading.Event(), threading.Event()
+
+    def hold() -> None:
+        """Sinaliza o inicio da geracao e aguarda a liberacao antes de responder."""
+        started.set()
+        release.wait(5)
+
+    llm = counting_llm
+    llm.before = hold
+    worker = PregenerationWorker(llm, queue_size=1)
+    worker.start()
+    service = EmailService(EmailRepository(db_session), counting_classifier, llm, pregenerator=worker)
+    running = service.process_email(user.id or 0, "Primeiro email", "cliente@empresa.com")
+    assert started.wait(5)
+    queued = service.process_email(user.id or 0, "Segundo email na fila", "cliente@empresa.com")
+    assert worker.pending_count() == 2
+
+    stopper = threading.Thread(target=worker.stop)
+    stopper.start()
+    wait_until(lambda: worker.pending_count() == 1)
+    release.set()
+    stopper.join(5)
+
+    assert not stopper.is_alive()
+    assert worker.pending_count() == 0
+    assert llm.calls == 1
+    db_session.expire_all()
+    assert db_session.get(Email, running.id).generated_response is None
+    assert db_session.get(Email, queued.id).generated_response is None
@@ -0,0 +1,74 @@
+import pytest
+
+from app.nlp.exceptions import RateLimitExceededError
+from app.nlp.rate_limiter import ProviderRateLimiter, parse_reset_seconds
+
+
+def build_limiter(**overrides) -> ProviderRateLimiter:
+    """Cria um limitador com valores pequenos para testes."""
+    options = {
+        "name": "LLM",
+        "capacity": 2,
+        "window_seconds": 60.0,
+        "max_queue": 1,
+        "max_wait_seconds": 0.05,
+    }
+    options.update(overrides)
+    return ProviderRateLimiter(**options)
+
+
+def test_parse_reset_seconds_formats() -> None:
+    """Aceita segundos, duracoes estilo OpenAI e epoch em milissegundos."""
+    assert parse_reset_seconds("2") == 2.0
+    assert parse_reset_seconds("1m30s") == 90.0
+    assert parse_reset_seconds("250ms") == 0.25
+    assert parse_reset_seconds("1700000010000", now=1700000000.0) == pytest.approx(10.0)
+    assert parse_reset_seconds("abc") is None
+
+
+def test_limiter_learns_capacity_from_headers() -> None:
+    """Ajusta a capacidade e o saldo conforme headers do provedor."""
+    limiter = build_limiter()
+    limiter.observe({"x-ratelimit-limit-requests": "50", "x-ratelimit-remaining-requests": "0"}, 200)
+
+    snapshot = limiter.snapshot()
+    assert snapshot["capacity"] == 50.0
+    with pytest.raises(RateLimitExceededError):
+        limiter.acquire()
+
+
+def test_retry_after_pauses_provider() -> None:
+    """Retry-after pausa o provedor e chamadas alem do tempo maximo falham rapido."""
+    limiter = build_limiter(capacity=100)
+    limiter.acquire()
+    limiter.observe({"retry-after": "5"}, 429)
+
+    assert limiter.paused_for > 4
+    with pytest.raises(RateLimitExceededError) as exc_info:
+        limiter.acquire()
+    assert exc_info.value.status_code == 429
+    assert limiter.queue_depth == 0
+
+
+def test_limiter_derives_window_from_reset_header() -> None:
+    """Calcula a janela de reposicao a partir do reset informado pelo provedor."""
+    limiter = build_limiter()
+    limiter.observe(
+        {
+            "x-ratelimit-limit-requests": "60",
+            "x-ratelimit-remaining-requests": "59",
+            "x-ratelimit-reset-requests": "1s",
+        },
+        200,
+    )
+    assert limiter.snapshot()["window_seconds"] == pytest.approx(60.0)
+
+    limiter.observe(
+        {
+            "x-ratelimit-limit-requests": "10",
+            "x-ratelimit-remaining-requests": "5",
+            "x-ratelimit-reset-requests": "500ms",
+        },
+        200,
+    )
+    assert limiter.snapshot()["window_seconds"] == pytest.approx(1.0)
@@ -0,0 +1,37 @@
+import time
+
+from fastapi.testclient import TestClient
+
+from app.core.warmup import WarmupState, WarmupStep, run_warmup
+
+
+def test_readiness_waits_for_required_steps() -> None:
+    """Valida que apenas falhas em etapas obrigatorias deixam o worker nao pronto."""
+    state = WarmupState()
+
+    def failing() -> None:
+        """Etapa que sempre falha."""
+        raise RuntimeError("pool indisponivel")
+
+    run_warmup(state, [WarmupStep("opcional", failing), WarmupStep("db_pool", lambda: None, required=True)])
+    assert state.ready is True
+    assert state.steps["opcional"]["status"] == "error"
+
+    blocked = WarmupState()
+    run_warmup(blocked, [WarmupStep("db_pool", failing, required=True)])
+    assert blocked.ready is False
+    assert blocked.finished is True
+
+
+def test_ready_endpoint_reports_warmup(app) -> None:
+    """Valida o 200 apos o aquecimento e o 503 enquanto o worker nao esta pronto."""
+    with TestClient(app) as client:
+        deadline = time.time() + 5
+        while not app.state.warmup.finished and time.time() < deadline:
+            time.sleep(0.05)
+        response = client.get("/api/v1/health/ready")
+        assert response.status_code == 200
+        assert response.json()["steps"]["db_pool"]["status"] == "ok"
+        assert response.json()["steps"]["result_cache"]["status"] == "ok"
+        app.state.warmup = WarmupState()
+        assert client.get("/api/v1/health/ready").status_code == 503
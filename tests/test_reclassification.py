@@ -0,0 +1,97 @@
+import json
+
+from sqlmodel import Session, select
+
+import app.core.database as database_module
+from app.core.reclassification import reclassify
+from app.models.email_model import Email
+from app.nlp.exceptions import ExternalServiceError
+
+
+class LengthClassifier:
+    """Classificador fake: textos longos sao Produtivo."""
+
+    def __init__(self) -> None:
+        """Inicializa o contador de chamadas."""
+        self.calls = 0
+
+    def classify_email(self, text: str):
+        """Conta a chamada e classifica pelo tamanho do texto."""
+        self.calls += 1
+        label = "Produtivo" if len(text) > 20 else "Improdutivo"
+        return {"label": label, "score": 0.9, "tier": "remote"}
+
+
+def test_reclassification_resumes_from_checkpoint(app, db_session: Session, tmp_path, create_user) -> None:
+    """Valida a retomada pelo ultimo id do checkpoint sem reclassificar emails corrigidos pelo usuario."""
+    user = create_user("reclass@empresa.com", "senha123")
+    bodies = ["curto", "um email bem mais comprido que vinte", "oi", "outro texto longo o bastante", "ok"]
+    for body in bodies:
+        db_session.add(Email(user_id=user.id or 0, email_destinatario="a@b.com", raw_body=body, classification="X"))
+    db_session.add(
+        Email(
+            user_id=user.id or 0,
+            email_destinatario="a@b.com",
+            raw_body="corrigido pelo usuario manualmente",
+            classification="Improdutivo",
+            classifier_tier="user",
+        )
+    )
+    db_session.commit()
+    checkpoint = tmp_path / "checkpoint.json"
+    classifier = LengthClassifier()
+
+    first = reclassify(
+        database_module.engine, classifier, checkpoint, batch_size=2, workers=2, rate_per_second=0, limit=3
+    )
+    assert first["processed"] == 3
+    assert json.loads(checkpoint.read_text())["last_id"] == 3
+
+    final = reclassify(database_module.engine, classifier, checkpoint, batch_size=2, workers=2, rate_per_second=0)
+    assert final["processed"] == 5
+    assert classifier.calls == 5
+
+    db_session.expire_all()
+    emails = db_session.exec(select(Email).order_by(Email.id)).all()
+    assert [email.classification for email in emails] == [
+        "Improdutivo",
+        "Produtivo",
+        "Improdutivo",
+        "Produtivo",
+        "Improdutivo",
+        "Improdutivo",
+    ]
+    assert emails[-1].classifier_tier == "user"
+    assert emails[0].classifier_tier == "remote"
+
+
+def test_reclassification_retries_failed_emails_on_resume(app, db_session: Session, tmp_path, create_user) -> None:
+    """Valida que emails com falha ficam no checkpoint e sao refeitos na execucao seguinte."""
+    user = create_user("falhas@empresa.com", "senha123")
+    for body in ["um email bem mais comprido que vinte", "instavel", "outro texto longo o bastante"]:
+        db_session.add(Email(user_id=user.id or 0, email_destinatario="a@b.com", raw_body=body, classification="X"))
+    db_session.commit()
+    checkpoint = tmp_path / "checkpoint.json"
+
+    class FlakyClassifier(LengthClassifier):
+        """Classificador fake que falha enquanto o provedor estiver indisponivel."""
+
+        available = False
+
+        def classify_email(self, text: str):
+            """Falha para o texto instavel enquanto indisponivel."""
+            if text == "instavel" and not self.available:
+                raise ExternalServiceError("fake", "indisponivel")
+            return super().classify_email(text)
+
+    classifier = FlakyClassifier()
+    first = reclassify(database_module.engine, classifier, checkpoint, batch_size=2, workers=2, rate_per_second=0)
+    assert (first["processed"], first["failed"], first["failed_ids"]) == (3, 1, [2])
+
+    classifier.available = True
+    final = reclassify(database_module.engine, classifier, checkpoint, batch_size=2, workers=2, rate_per_second=0)
+    assert (final["processed"], final["failed"], final["failed_ids"]) == (3, 0, [])
+    assert json.loads(checkpoint.read_text())["failed_ids"] == []
+
+    db_session.expire_all()
+    assert db_session.get(Email, 2).classification == "Improdutivo"
@@ -0,0 +1,41 @@
+from sqlmodel import Session
+
+from app.models.email_model import Email
+from app.nlp.reply_templates import DEFAULT_TEMPLATES, ReplyTemplateEngine, extract_sender_name
+from app.repositories.email_repository import EmailRepository
+from app.services.email_service import EmailService
+
+
+def test_extract_sender_name() -> None:
+    """Valida a extracao do nome pela assinatura ou pelo cabecalho De: e a rejeicao de linhas que nao sao nomes."""
+    assert extract_sender_name("Oi, tudo bem?\n\nAbracos,\nMaria da Silva\n") == "Maria da Silva"
+    assert extract_sender_name('De: "Joao Souza" <joao@x.com>\nAssunto: oi\n\nBom dia') == "Joao Souza"
+    assert extract_sender_name("Compre agora!\n\nAtt,\nwww.loja.com") is None
+
+
+def test_low_value_replies_use_template_unless_llm_is_forced(
+    app, db_session: Session, create_user, counting_llm
+) -> None:
+    """Valida que classificacoes de baixo valor usam template sem chamar o LLM, salvo quando forcado."""
+    user = create_user("template@empresa.com", "senha123")
+    email = Email(
+        user_id=user.id or 0,
+        email_destinatario="cliente@empresa.com",
+        assunto="Feliz Natal",
+        raw_body="Boas festas a toda a equipe!\n\nAtenciosamente,\nCarla Mendes",
+        classification="Improdutivo",
+    )
+    db_session.add(email)
+    db_session.commit()
+    llm = counting_llm
+    engine = ReplyTemplateEngine(DEFAULT_TEMPLATES, ["Improdutivo", "Propaganda"])
+    service = EmailService(EmailRepository(db_session), None, llm, reply_templates=engine)
+
+    detail = service.generate_response(email.id or 0, user.id or 0)
+    assert detail.generated_response.startswith("Ola, Carla Mendes,")
+    assert 'sobre "Feliz Natal"' in detail.generated_response
+    assert llm.calls == 0
+
+    forced = service.generate_response(email.id or 0, user.id or 0, regenerate=True, force_llm=True)
+    assert forced.generated_response == "Resposta 1"
+    assert llm.calls == 1
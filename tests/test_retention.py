@@ -0,0 +1,48 @@
+from datetime import datetime, timedelta
+
+import httpx
+import pytest
+from sqlmodel import Session
+
+import app.core.database as database_module
+from app.api.v1.email_router import get_archive_repository
+from app.core.retention import archive_older_than
+from app.models.email_model import Email
+from app.repositories.archive_repository import EmailArchiveRepository
+
+
+@pytest.mark.asyncio
+async def test_archived_emails_are_read_back_when_requested(
+    app, client: httpx.AsyncClient, db_session: Session, tmp_path, create_user, create_email, login_and_get_token
+) -> None:
+    """Valida que emails antigos saem do banco e voltam no historico/exportacao sob demanda."""
+    user = create_user("arquivo@empresa.com", "senha123")
+    old = create_email(user.id or 0)
+    old.created_at = datetime.utcnow() - timedelta(days=400)
+    db_session.add(old)
+    db_session.commit()
+    recent = create_email(user.id or 0)
+    old_id, recent_id = old.id, recent.id
+
+    archive = EmailArchiveRepository(str(tmp_path / "archive"))
+    cutoff = datetime.utcnow() - timedelta(days=365)
+    assert archive_older_than(database_module.engine, archive, cutoff, batch_size=1) == 1
+    db_session.expire_all()
+    assert db_session.get(Email, old_id) is None
+
+    app.dependency_overrides[get_archive_repository] = lambda: archive
+    try:
+        token = await login_and_get_token("arquivo@empresa.com", "senha123")
+        headers = {"Authorization": f"Bearer {token}"}
+        current = await client.get("/api/v1/emails/history", headers=headers)
+        assert [row["id"] for row in current.json()["emails"]] == [recent_id]
+
+        full = await client.get("/api/v1/emails/history", headers=headers, params={"incluir_arquivados": "true"})
+        assert [row["id"] for row in full.json()["emails"]] == [recent_id, old_id]
+        assert full.headers["etag"] != current.headers["etag"]
+
+        export = await client.get("/api/v1/emails/export", headers=headers, params={"incluir_arquivados": "true"})
+        assert export.text.count("\n") == 2
+        assert '"raw_body": "Conteudo do email"' in export.text.splitlines()[0]
+    finally:
+        app.dependency_overrides.clear()
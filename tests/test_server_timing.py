@@ -0,0 +1,45 @@
+import httpx
+import pytest
+
+from app.core.config import get_settings
+
+
+async def login(client: httpx.AsyncClient, email: str) -> dict:
+    """Autentica o usuario e retorna headers com o token."""
+    response = await client.post("/api/v1/auth/login", json={"email": email, "senha": "senha123"})
+    return {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+
+@pytest.mark.asyncio
+async def test_server_timing_reports_auth_span(client: httpx.AsyncClient, create_user) -> None:
+    """Inclui o span de autenticacao e o total no header Server-Timing."""
+    _ = create_user("timing@empresa.com", "senha123")
+    headers = await login(client, "timing@empresa.com")
+
+    response = await client.get("/api/v1/auth/me", headers=headers)
+
+    assert response.status_code == 200
+    server_timing = response.headers["server-timing"]
+    assert "auth;dur=" in server_timing
+    assert "total;dur=" in server_timing
+    assert "x-profile-report" not in response.headers
+
+
+@pytest.mark.asyncio
+async def test_profile_flag_only_for_admins(
+    client: httpx.AsyncClient, monkeypatch, tmp_path, create_user
+) -> None:
+    """Gera relatorio de profiling apenas quando o usuario e administrador."""
+    _ = create_user("admin@empresa.com", "senha123")
+    headers = await login(client, "admin@empresa.com")
+    settings = get_settings()
+    monkeypatch.setattr(settings, "profile_dir", str(tmp_path))
+
+    response = await client.get("/api/v1/auth/me?profile=1", headers=headers)
+    assert "x-profile-report" not in response.headers
+
+    monkeypatch.setattr(settings, "admin_emails", "admin@empresa.com")
+    response = await client.get("/api/v1/auth/me?profile=1", headers=headers)
+
+    report = response.headers["x-profile-report"]
+    assert (tmp_path / report).exists()
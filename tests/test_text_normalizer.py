@@ -0,0 +1,81 @@
+from app.nlp.classifier_cascade import RuleClassifier
+from app.nlp.text_normalizer import TextNormalizer, get_text_normalizer, normalize_text, normalized_hash, prepare_text
+
+
+def test_normalizer_strips_quotes_forwards_and_signature() -> None:
+    """Valida a remocao de encaminhamento, assinatura e resposta citada no fim da mensagem."""
+    text = (
+        "Ola,\n\nSegue abaixo.\n\n"
+        "---------- Mensagem encaminhada ----------\n"
+        "De: Ana <ana@empresa.com>\nData: seg., 10 de jun. de 2024\nAssunto: Pedido\nPara: equipe@empresa.com\n\n"
+        "Preciso   da aprovacao do pedido 123.\n\n"
+        "Atenciosamente,\nJoao\n\n"
+        "Em ter., 11 de jun. de 2024 as 14:02, Ana escreveu:\n> mensagem antiga\n> citada"
+    )
+    result = TextNormalizer().normalize(text)
+    assert result.text == "Ola,\n\nSegue abaixo.\n\nPreciso da aprovacao do pedido 123."
+    assert result.matches["forward"] == 1
+    assert result.matches["signature"] == 1
+    assert result.removed_chars["signature"] > 0
+
+
+def test_normalizer_converts_html_and_removes_disclaimer() -> None:
+    """Valida a conversao de HTML e entidades e a remocao do aviso de confidencialidade."""
+    text = (
+        "<div>Favor enviar&nbsp;o boleto &amp; a nota.</div>"
+        "<p>AVISO: Esta mensagem e seus anexos sao confidenciais e destinados ao destinatario.</p>"
+    )
+    result = TextNormalizer().normalize(text)
+    assert result.text == "Favor enviar o boleto & a nota."
+    assert result.matches["html"] >= 4
+    assert result.matches["disclaimer"] == 1
+
+
+def test_normalizer_keeps_body_with_closing_words_and_inline_mentions() -> None:
+    """Valida que agradecimentos e "escreveu:" no meio do texto nao apagam o restante da mensagem."""
+    normalizer = TextNormalizer()
+
+    thanks = "Ola equipe,\nObrigado pelo retorno.\nPreciso do boleto ate sexta, urgente."
+    assert normalizer.normalize(thanks).text == thanks
+
+    mention = "Bom dia\nEm anexo segue a nota. Maria escreveu: ok?\nPor favor confirmar."
+    assert normalizer.normalize(mention).text == mention
+
+    headers = "Ola\nDe: quem puder, responda.\nData: amanha.\nPode ser?"
+    assert normalizer.normalize(headers).text == headers
+
+
+def test_normalizer_strips_trailing_signature_before_outlook_reply() -> None:
+    """Valida a remocao da assinatura final e do bloco de resposta do Outlook."""
+    text = (
+        "Pode enviar o contrato?\n\nObrigado!\nMaria Silva\nFinanceiro\n\n"
+        "De: Joao\nEnviado: terca-feira\nPara: Maria\nAssunto: Contrato\n\nTexto antigo da conversa."
+    )
+    result = TextNormalizer().normalize(text)
+    assert result.text == "Pode enviar o contrato?"
+    assert result.matches["signature"] == 1
+    assert result.matches["reply"] == 1
+
+
+def test_prepared_text_is_normalized_only_once(monkeypatch) -> None:
+    """Valida que o texto preparado reaproveita a normalizacao nos classificadores, no hash e no prompt."""
+    expected_hash = normalized_hash("Preciso do boleto, urgente.")
+    normalizer = get_text_normalizer()
+    pattern = normalizer._pattern
+    calls = []
+
+    class CountingPattern:
+        """Conta as passadas da expressao de normalizacao."""
+
+        def sub(self, replacement, text):
+            """Delega a substituicao ao padrao real."""
+            calls.append(text)
+            return pattern.sub(replacement, text)
+
+    monkeypatch.setattr(normalizer, "_pattern", CountingPattern())
+    prepared = prepare_text("Preciso do boleto, urgente.\n\nAtenciosamente,\nJoao")
+
+    assert RuleClassifier().classify_email(prepared)["label"] == "Produtivo"
+    assert normalize_text(prepared) == "Preciso do boleto, urgente."
+    assert normalized_hash(prepared) == expected_hash
+    assert len(calls) == 1
@@ -0,0 +1,80 @@
+import httpx
+import pytest
+from sqlmodel import Session, select
+
+from app.api.v1.auth_router import get_current_admin
+from app.core.metrics import provider_call, set_usage_sink
+from app.core.usage import UsageWriter, usage_scope
+from app.models.usage_model import ProviderUsage
+from app.repositories.email_repository import EmailRepository
+from app.repositories.usage_repository import UsageRepository
+from app.services.email_service import EmailService
+
+
+@pytest.mark.asyncio
+async def test_usage_is_buffered_and_rolled_up(
+    app, client: httpx.AsyncClient, db_session: Session, create_user, login_and_get_token
+) -> None:
+    """Valida gravacao em lote dos registros de uso e a agregacao por usuario."""
+    writer = UsageWriter(batch_size=100, prices={"gpt-mini": (1.0, 2.0)})
+    set_usage_sink(writer.record)
+    try:
+        with usage_scope(1, 10):
+            with provider_call("llm", "gpt-mini") as call:
+                call.status = "200"
+                call.input_tokens = 100
+                call.output_tokens = 50
+            with provider_call("llm", "gpt-mini") as call:
+                call.status = "429"
+        with provider_call("huggingface", "bart") as call:
+            call.status = "200"
+    finally:
+        set_usage_sink(None)
+
+    assert db_session.exec(select(ProviderUsage)).first() is None
+    assert writer.flush() == 3
+
+    rows = UsageRepository(db_session).rollup("usuario")
+    llm = next(row for row in rows if row["chave"] == 1)
+    assert (llm["chamadas"], llm["erros"], llm["tokens_entrada"], llm["tokens_saida"]) == (2, 1, 100, 50)
+    assert llm["custo"] == pytest.approx(0.2)
+
+    admin = create_user("usage@empresa.com", "senha123")
+    token = await login_and_get_token("usage@empresa.com", "senha123")
+    app.dependency_overrides[get_current_admin] = lambda: admin
+    try:
+        response = await client.get(
+            "/api/v1/admin/usage", params={"agrupar": "dia"}, headers={"Authorization": f"Bearer {token}"}
+        )
+    finally:
+        app.dependency_overrides.clear()
+    assert response.status_code == 200
+    assert sum(row["chamadas"] for row in response.json()["linhas"]) == 3
+
+
+def test_classification_usage_is_linked_to_created_email(app, db_session: Session, create_user) -> None:
+    """Valida que a chamada de classificacao, feita antes de o email existir, e gravada com o id do email."""
+    user = create_user("uso-email@empresa.com", "senha123")
+    writer = UsageWriter(batch_size=100)
+
+    class MeteredClassifier:
+        """Classificador fake que registra uma chamada de provedor."""
+
+        def classify_email(self, text: str):
+            """Mede uma chamada e verifica que o registro aguarda o fim do escopo."""
+            with provider_call("huggingface", "bart") as call:
+                call.status = "200"
+            assert writer.flush() == 0
+            return {"label": "Produtivo", "score": 0.9}
+
+    set_usage_sink(writer.record)
+    try:
+        created = EmailService(EmailRepository(db_session), MeteredClassifier(), None).process_email(
+            user.id or 0, "Preciso do boleto", "cliente@empresa.com"
+        )
+    finally:
+        set_usage_sink(None)
+
+    assert writer.flush() == 1
+    row = db_session.exec(select(ProviderUsage)).one()
+    assert (row.user_id, row.email_id) == (user.id, created.id)
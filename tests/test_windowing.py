@@ -0,0 +1,53 @@
+from app.nlp.classifier_client import ClassifierClient
+from app.nlp.windowing import aggregate_scores, split_windows
+
+
+def test_split_windows_overlaps_and_caps_count() -> None:
+    """Valida a sobreposicao entre janelas e o limite de janelas espalhadas ou apenas iniciais."""
+    text = " ".join(f"t{index}" for index in range(1000))
+
+    windows = split_windows(text, window_tokens=100, overlap=20, max_windows=50)
+    assert len(windows) == 13
+    assert windows[0].split()[-20:] == windows[1].split()[:20]
+
+    capped = split_windows(text, window_tokens=100, overlap=20, max_windows=4)
+    assert len(capped) == 4
+    assert capped[0].startswith("t0 ") and capped[-1].endswith("t999")
+    assert split_windows(text, 100, 20, 2, first_only=True)[1].startswith("t80 ")
+    assert split_windows("curto", 100, 20, 4) == ["curto"]
+
+
+def test_aggregate_strategies() -> None:
+    """Valida as estrategias de agregacao max, mean e first_n dos scores por janela."""
+    results = [
+        {"labels": ["Produtivo", "Improdutivo"], "scores": [0.6, 0.4]},
+        {"labels": ["Improdutivo", "Produtivo"], "scores": [0.9, 0.1]},
+        {"labels": ["Improdutivo", "Produtivo"], "scores": [0.7, 0.3]},
+    ]
+    assert aggregate_scores(results, "max")["labels"][0] == "Improdutivo"
+    assert aggregate_scores(results, "mean")["scores"][0] == (0.4 + 0.9 + 0.7) / 3
+    assert aggregate_scores(results, "first_n", first_n=1)["labels"][0] == "Produtivo"
+
+
+def test_long_email_is_classified_as_one_batch(app) -> None:
+    """Valida que as janelas de um email longo seguem numa unica chamada em lote."""
+    class BatchClient(ClassifierClient):
+        """Cliente com inferencia local deterministica para observar o lote enviado."""
+
+        batches = []
+
+        def _ensure_configured(self) -> None:
+            """Dispensa a chave de API."""
+            return None
+
+        def _infer_batch(self, texts):
+            """Registra o lote e retorna scores fixos por janela."""
+            self.batches.append(texts)
+            return [{"labels": ["Produtivo", "Improdutivo"], "scores": [0.8, 0.2]} for _ in texts]
+
+    client = BatchClient()
+    result = client.classify_email(" ".join(["palavra"] * 5000))
+
+    assert result == {"label": "Produtivo", "score": 0.8}
+    assert len(BatchClient.batches) == 1
+    assert len(BatchClient.batches[0]) == 8